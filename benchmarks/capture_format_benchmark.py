@@ -0,0 +1,145 @@
+"""
+Benchmark dos formatos de captura (CAPTURE_FORMATS).
+
+Para cada formato e nível de compressão informa o tempo de gravação (o custo que o
+CaptureWriter paga por captura), o tamanho do arquivo, o tempo de leitura e o tempo de
+preparo da página no PDF (PNGs são copiados sem recompressão; os demais são decodificados).
+
+As imagens de teste imitam capturas de interface: "interface" (barras e blocos, como em
+pdf_benchmark.py), "texto" (página de texto com anti-aliasing) e "foto" (interface com uma
+área de foto ou vídeo). Também é possível usar capturas reais de uma sessão.
+
+Uso:
+    python benchmarks/capture_format_benchmark.py
+    python benchmarks/capture_format_benchmark.py --size 2560x1440 --repeat 5
+    python benchmarks/capture_format_benchmark.py --images "caminho/da/sessão"
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from benchmarks.pdf_benchmark import synthetic_screenshot
+from src.config.config import SUPPORTED_IMAGE_FORMATS
+from src.core.capture_writer import capture_format_settings, save_image_atomic
+from src.core.pdf_generator import _prepare_image
+
+# (rótulo, formato, nível de compressão PNG, optimize, opções extras)
+CANDIDATES = [
+    ("png nível 0", "png", 0, False, {}),
+    ("png nível 1", "png", 1, False, {}),
+    ("png nível 3", "png", 3, False, {}),
+    ("png nível 6 (padrão Pillow)", "png", 6, False, {}),
+    ("png nível 9", "png", 9, False, {}),
+    ("png optimize", "png", 9, True, {}),
+    ("webp sem perda, rápido", "webp", None, None, {'quality': 0, 'method': 0}),
+    ("webp sem perda (padrão)", "webp", None, None, {}),
+    ("bmp (sem compressão)", "bmp", None, None, {}),
+]
+
+
+def text_screenshot(index: int, size: tuple) -> Image.Image:
+    """Página de documento com várias linhas de texto renderizado com anti-aliasing."""
+    width, height = size
+    rng = random.Random(index)
+    img = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(15)
+    words = ["captura", "relatório", "sessão", "anotação", "automação", "página", "imagem",
+             "configuração", "documento", "janela", "intervalo", "tutorial"]
+    draw.rectangle([0, 0, width, 36], fill=(240, 240, 240))
+    for y in range(60, height - 20, 22):
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+        draw.text((60, y), line, fill=(30, 30, 30), font=font)
+    return img
+
+
+def photo_screenshot(index: int, size: tuple) -> Image.Image:
+    """Interface com uma área de foto/vídeo (ruído suavizado, pouco compressível)."""
+    width, height = size
+    img = synthetic_screenshot(index, size)
+    photo_size = (width // 2, height // 2)
+    photo = Image.merge('RGB', [Image.effect_noise(photo_size, 60).filter(ImageFilter.GaussianBlur(2))
+                                for _ in range(3)])
+    img.paste(photo, (width // 4, height // 4))
+    return img
+
+
+def load_images(args) -> list:
+    if args.images:
+        names = sorted(f for f in os.listdir(args.images)
+                       if f.lower().endswith(tuple(SUPPORTED_IMAGE_FORMATS)))[:args.limit]
+        images = []
+        for name in names:
+            with Image.open(os.path.join(args.images, name)) as img:
+                images.append((name, img.convert('RGB')))
+        return images
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    return [("interface", synthetic_screenshot(0, size)),
+            ("texto", text_screenshot(0, size)),
+            ("foto", photo_screenshot(0, size))]
+
+
+def measure(image: Image.Image, directory: str, settings: dict, repeat: int) -> dict:
+    path = os.path.join(directory, f"bench{settings['extension']}")
+    write_times, read_times, prepare_times = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        save_image_atomic(image, path, settings['format'], settings['options'])
+        write_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with Image.open(path) as img:
+            img.load()
+        read_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        _prepare_image(path)
+        prepare_times.append(time.perf_counter() - start)
+    size = os.path.getsize(path)
+    os.remove(path)
+    return {
+        'write_ms': statistics.median(write_times) * 1000,
+        'read_ms': statistics.median(read_times) * 1000,
+        'prepare_ms': statistics.median(prepare_times) * 1000,
+        'size_kb': size / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos formatos de captura")
+    parser.add_argument('--size', default="1920x1080", help="Resolução das imagens sintéticas (LxA)")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições por medida (mediana)")
+    parser.add_argument('--images', help="Pasta com capturas reais em vez das imagens sintéticas")
+    parser.add_argument('--limit', type=int, default=5, help="Máximo de capturas reais usadas")
+    args = parser.parse_args()
+
+    images = load_images(args)
+    if not images:
+        print("Nenhuma imagem encontrada.")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="capture_bench_") as directory:
+        for name, image in images:
+            print(f"\n{name} ({image.width}x{image.height})")
+            print(f"{'formato':<28} {'gravar (ms)':>12} {'ler (ms)':>9} {'PDF (ms)':>9} {'arquivo (KB)':>13}")
+            for label, capture_format, level, optimize, extra in CANDIDATES:
+                settings = capture_format_settings(capture_format, level, optimize)
+                settings['options'].update(extra)
+                r = measure(image, directory, settings, args.repeat)
+                print(f"{label:<28} {r['write_ms']:>12.1f} {r['read_ms']:>9.1f} "
+                      f"{r['prepare_ms']:>9.1f} {r['size_kb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
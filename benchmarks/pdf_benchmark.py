@@ -0,0 +1,154 @@
+"""
+Benchmark da geração de PDF com páginas sintéticas.
+
+Roda os motores escolhidos sobre a mesma sessão sintética e informa tempo, pico de
+memória e tamanho do PDF. Cada cenário roda em um subprocesso separado para que o pico
+de memória (RSS) medido corresponda apenas àquela execução.
+
+Uso:
+    python benchmarks/pdf_benchmark.py --pages 100 1000 10000
+    python benchmarks/pdf_benchmark.py --pages 1000 --engines native reportlab pymupdf
+    python benchmarks/pdf_benchmark.py --pages 2000 --workers 16
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.core.pdf_engines import PDF_ENGINES
+
+
+def synthetic_screenshot(index: int, size: tuple):
+    """Cria uma imagem que imita uma captura de interface (barras, blocos de texto, ícones)."""
+    from PIL import Image, ImageDraw
+
+    width, height = size
+    rng = random.Random(index)
+    img = Image.new('RGB', size, (245, 246, 248))
+    draw = ImageDraw.Draw(img)
+
+    # Barra de título, menu lateral e área de conteúdo
+    draw.rectangle([0, 0, width, 40], fill=(32, 38, 46))
+    sidebar = width // 7
+    draw.rectangle([0, 40, sidebar, height], fill=(228, 231, 236))
+    for row in range(60, height - 40, 28):
+        line_width = rng.randint(width // 10, width - sidebar - 60)
+        shade = rng.randint(40, 120)
+        draw.rectangle([sidebar + 40, row, sidebar + 40 + line_width, row + 10], fill=(shade, shade, shade))
+    for _ in range(12):
+        x = rng.randint(0, width - 64)
+        y = rng.randint(40, height - 64)
+        color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        draw.ellipse([x, y, x + 48, y + 48], fill=color)
+    draw.text((sidebar + 40, height - 30), f"Página sintética {index}", fill=(0, 0, 0))
+    return img
+
+
+def create_synthetic_images(directory: str, count: int, size: tuple) -> list:
+    """Cria imagens PNG sintéticas de interface no diretório informado."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"screenshot_{index:05d}.png")
+        synthetic_screenshot(index, size).save(path)
+        paths.append(path)
+    return paths
+
+
+def peak_rss_mb() -> float:
+    """Retorna o pico de memória residente do processo atual em MB (quando disponível)."""
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_child(args):
+    """Executa um único cenário e imprime o resultado em JSON."""
+    from src.core.pdf_generator import PDFGenerator
+
+    pool = sorted(
+        os.path.join(args.images_dir, f)
+        for f in os.listdir(args.images_dir)
+        if f.lower().endswith('.png')
+    )
+    paths = [pool[i % len(pool)] for i in range(args.child_pages)]
+    output = os.path.join(args.images_dir, f"bench_{args.child_engine}_{args.child_pages}.pdf")
+
+    generator = PDFGenerator(engine=args.child_engine,
+                             max_images_in_memory=args.max_images,
+                             workers=args.workers)
+    start = time.perf_counter()
+    ok = generator.generate_pdf(paths, output)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'engine': args.child_engine,
+        'pages': args.child_pages,
+        'ok': ok,
+        'seconds': elapsed,
+        'pages_per_second': args.child_pages / elapsed if elapsed else 0,
+        'peak_rss_mb': peak_rss_mb(),
+        'output_mb': os.path.getsize(output) / (1024 * 1024) if ok else 0,
+    }
+    os.remove(output)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da geração de PDF")
+    parser.add_argument('--pages', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--engines', nargs='+', default=['native'], choices=list(PDF_ENGINES))
+    parser.add_argument('--pool', type=int, default=0,
+                        help="Quantidade de imagens distintas (0 = uma imagem única por página)")
+    parser.add_argument('--size', default="1920x1080", help="Resolução das imagens (LxA)")
+    parser.add_argument('--max-images', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos para preparar páginas (0 = um por núcleo)")
+    parser.add_argument('--images-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--child-engine', help=argparse.SUPPRESS)
+    parser.add_argument('--child-pages', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_engine:
+        run_child(args)
+        return
+
+    size = tuple(int(v) for v in args.size.lower().split('x'))
+    pool = args.pool or max(args.pages)
+    with tempfile.TemporaryDirectory(prefix="pdf_bench_") as images_dir:
+        print(f"Gerando {pool} imagens sintéticas {size[0]}x{size[1]}...")
+        create_synthetic_images(images_dir, pool, size)
+
+        print(f"{'motor':<10} {'páginas':>8} {'tempo (s)':>10} {'pág/s':>8} {'pico RSS (MB)':>14} {'PDF (MB)':>9}")
+        for engine in args.engines:
+            for pages in args.pages:
+                cmd = [sys.executable, os.path.abspath(__file__),
+                       '--images-dir', images_dir, '--child-engine', engine,
+                       '--child-pages', str(pages), '--max-images', str(args.max_images),
+                       '--workers', str(args.workers)]
+                completed = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT_DIR)
+                lines = [l for l in completed.stdout.splitlines() if l.startswith('{')]
+                if completed.returncode != 0 or not lines:
+                    print(f"{engine:<10} {pages:>8} falhou: {completed.stderr.strip()[-200:]}")
+                    continue
+                r = json.loads(lines[-1])
+                print(f"{r['engine']:<10} {r['pages']:>8} {r['seconds']:>10.1f} "
+                      f"{r['pages_per_second']:>8.1f} {r['peak_rss_mb']:>14.1f} {r['output_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
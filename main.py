@@ -1,7 +1,11 @@
+import multiprocessing
 import tkinter as tk
 from src.gui.main_window import PDFMakerApp
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos da geração de PDF no executável (PyInstaller)
+    multiprocessing.freeze_support()
+
     root = tk.Tk()
     app = PDFMakerApp(root)
     
@@ -0,0 +1,146 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import Any, List, Optional, TextIO
+
+# Exportação em lote sem interface gráfica:
+#   python -m src.cli export <pasta_da_sessão> -o saida.pdf --workers 4 --engine native
+#
+# Nenhum módulo da interface (tkinter) é importado. O progresso é impresso em stdout como
+# uma linha JSON por evento; as mensagens de diagnóstico dos módulos vão para stderr.
+
+EXIT_OK = 0
+EXIT_FAILED = 1          # Falha ao gerar o PDF
+EXIT_USAGE = 2           # Argumentos inválidos (argparse)
+EXIT_NO_IMAGES = 3       # Pasta inexistente ou sem imagens
+EXIT_PAGE_ERRORS = 4     # PDF gerado, mas algumas imagens foram ignoradas
+
+
+class ProgressReporter:
+    """Imprime os eventos da exportação como linhas JSON."""
+
+    def __init__(self, stream: TextIO, session_dir: str):
+        self.stream = stream
+        self.session_dir = session_dir
+        self.started = time.perf_counter()
+
+    def emit(self, event: str, **data: Any):
+        record = {'event': event, 'session': self.session_dir}
+        record.update(data)
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def progress(self, done: int, total: int):
+        self.emit('progress', page=done, total=total,
+                  elapsed=round(time.perf_counter() - self.started, 3))
+
+    def error(self, message: str):
+        self.emit('error', message=message)
+
+
+def _default_output(session_dir: str) -> str:
+    """Mesmo nome usado pela interface: 'PDF Maker_<timestamp>.pdf' dentro da sessão."""
+    timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+    return os.path.join(session_dir, f"PDF Maker_{timestamp}.pdf")
+
+
+def export_session(args: argparse.Namespace, stdout: TextIO) -> int:
+    """Gera o PDF de uma sessão e retorna o código de saída."""
+    from src.core.screenshot import ScreenshotManager
+    from src.core.pdf_generator import PDFGenerator
+
+    session_dir = os.path.abspath(args.session_dir)
+    reporter = ProgressReporter(stdout, session_dir)
+
+    if not os.path.isdir(session_dir):
+        reporter.error(f"Pasta da sessão não encontrada: {session_dir}")
+        return EXIT_NO_IMAGES
+
+    screenshot_manager = ScreenshotManager()
+    screenshot_manager.set_directory(session_dir)
+    paths = screenshot_manager.get_image_paths()
+    if not paths:
+        reporter.error("Nenhuma imagem para gerar PDF.")
+        return EXIT_NO_IMAGES
+
+    output_pdf = os.path.abspath(args.output) if args.output else _default_output(session_dir)
+    options = {}
+    if args.engine:
+        options['engine'] = args.engine
+    if args.workers is not None:
+        options['workers'] = args.workers
+    if args.dpi:
+        options['dpi'] = args.dpi
+    if args.profile:
+        options['profile'] = args.profile
+    if args.drop_duplicate_pages:
+        options['drop_duplicate_pages'] = True
+    if args.raster_annotations:
+        options['vector_annotations'] = False
+
+    generator = PDFGenerator(error_callback=reporter.error, progress_callback=reporter.progress,
+                             **options)
+    reporter.emit('start', output=output_pdf, pages=len(paths), engine=generator.engine,
+                  workers=generator.workers, profile=generator.profile)
+
+    if not generator.generate_pdf(paths, output_pdf, incremental=args.append):
+        reporter.emit('failed', output=output_pdf)
+        return EXIT_FAILED
+
+    reporter.emit('done', output=output_pdf, size=os.path.getsize(output_pdf),
+                  elapsed=round(time.perf_counter() - reporter.started, 3),
+                  appended=generator.last_appended, skipped=generator.last_errors,
+                  **generator.last_stats)
+    return EXIT_PAGE_ERRORS if generator.last_errors else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from src.config.config import PDF_PROFILES
+    from src.core.pdf_engines import PDF_ENGINES
+
+    parser = argparse.ArgumentParser(prog="python -m src.cli",
+                                     description="PDF Maker pela linha de comando")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help="Gera o PDF de uma sessão salva")
+    export.add_argument('session_dir', help="Pasta da sessão com as capturas")
+    export.add_argument('-o', '--output', help="Arquivo PDF de saída (padrão: dentro da sessão)")
+    export.add_argument('--workers', type=int,
+                        help="Processos para preparar as páginas (0 = um por núcleo, 1 = desativado)")
+    export.add_argument('--engine', choices=sorted(PDF_ENGINES), help="Motor de escrita do PDF")
+    export.add_argument('--dpi', type=int, help="DPI usado para converter pixels em pontos")
+    export.add_argument('--profile', choices=sorted(PDF_PROFILES),
+                        help="Perfil de saída: resolução e cores das imagens embutidas")
+    export.add_argument('--append', action='store_true',
+                        help="Acrescenta apenas as novas imagens ao PDF de saída, se ele for o "
+                             "último PDF gerado para a sessão")
+    export.add_argument('--drop-duplicate-pages', action='store_true',
+                        help="Remove páginas idênticas à anterior")
+    export.add_argument('--raster-annotations', action='store_true',
+                        help="Usa a imagem renderizada com as anotações em vez de vetores")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # stdout fica reservado para os eventos JSON; os prints dos módulos vão para stderr
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            if args.command == 'export':
+                return export_session(args, stdout)
+        except KeyboardInterrupt:
+            ProgressReporter(stdout, os.path.abspath(args.session_dir)).error("Interrompido")
+            return EXIT_FAILED
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    # Necessário para o pool de processos da geração de PDF (Windows/PyInstaller)
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
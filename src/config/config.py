@@ -42,12 +42,124 @@ ICON = "assets/PDF-Maker.ico"
 # Configurações de automação
 DEFAULT_INTERVAL = 2.0
 DEFAULT_NUM_CAPTURES = 10
+# Capturas agendadas em prazos fixos (início + n * intervalo). Quando uma captura passa do prazo
+# seguinte: "skip" pula os horários perdidos, "catch_up" captura os atrasados em sequência e
+# "stretch" recomeça a contagem a partir do atraso
+DEFAULT_OVERRUN_POLICY = "skip"
+# Captura por mudança de tela: a região é amostrada CHANGE_SAMPLE_RATE vezes por segundo, reduzida
+# a CHANGE_SAMPLE_WIDTH pixels de largura em tons de cinza; um pixel da amostra conta como alterado
+# quando a diferença passa de CHANGE_PIXEL_TOLERANCE (0-255)
+CHANGE_SAMPLE_RATE = 5
+CHANGE_SAMPLE_WIDTH = 320
+CHANGE_PIXEL_TOLERANCE = 24
+# Padrões do preset: % mínima de pixels alterados, tempo de tela estável antes de salvar (s)
+# e intervalo mínimo entre capturas salvas (s)
+DEFAULT_CHANGE_THRESHOLD = 0.5
+DEFAULT_CHANGE_DEBOUNCE = 0.3
+DEFAULT_CHANGE_MIN_GAP = 1.0
+# Esperar a tela estabilizar após a ação entre capturas: a região é amostrada a cada
+# SETTLE_POLL_INTERVAL segundos e está estável quando SETTLE_STABLE_SAMPLES amostras seguidas
+# diferem menos de SETTLE_THRESHOLD % dos pixels. Se a tela não começar a mudar em
+# SETTLE_START_GRACE segundos, a ação não alterou a tela e a captura segue
+SETTLE_POLL_INTERVAL = 0.05
+SETTLE_STABLE_SAMPLES = 2
+SETTLE_THRESHOLD = 0.1
+SETTLE_START_GRACE = 0.5
+DEFAULT_SETTLE_TIMEOUT = 5.0
+# Capturas repetidas na automação (hash de diferença): tamanho do hash (16 = 256 bits) e
+# distância máxima, em bits, para considerar uma captura igual à anterior
+DUPLICATE_FRAME_HASH_SIZE = 16
+DEFAULT_DUPLICATE_FRAME_DISTANCE = 0
+# Parada por fim de conteúdo: capturas seguidas iguais à anterior que encerram a automação
+DEFAULT_STOP_REPEAT_COUNT = 3
+# Captura com rolagem (ver ScrollStitcher): as linhas de cada captura são comparadas com as da
+# anterior por hash, ignorando STITCH_IGNORE_RIGHT colunas à direita (barra de rolagem). A rolagem
+# é aceita quando ao menos STITCH_MIN_MATCH das linhas sobrepostas são iguais e há pelo menos
+# STITCH_MIN_OVERLAP linhas com conteúdo na sobreposição. STITCH_END_REPEATS rolagens seguidas
+# sem linhas novas indicam o fim da página. Cada imagem emendada tem no máximo STITCH_MAX_HEIGHT
+# pixels de altura (o PDF limita a página a 14400 pt, cerca de 19160 px a 96 DPI com as margens)
+STITCH_IGNORE_RIGHT = 24
+STITCH_MIN_MATCH = 0.9
+STITCH_MIN_OVERLAP = 16
+STITCH_END_REPEATS = 2
+STITCH_MAX_HEIGHT = 19000
+# Macro da ação entre capturas (ver src/core/macro.py): pausa entre as teclas de um passo "keys"
+MACRO_KEY_INTERVAL = 0.03
+# Gravação das capturas em segundo plano: threads que codificam e gravam as imagens e quantas
+# capturas podem aguardar na fila antes de a automação esperar (cada uma ocupa a imagem inteira na memória)
+CAPTURE_WRITER_WORKERS = 2
+CAPTURE_WRITER_QUEUE_SIZE = 8
+# Capturas que podem aguardar a etapa de análise (hash, repetidas, fim do conteúdo) do pipeline da
+# automação antes de a captura seguinte esperar
+CAPTURE_PIPELINE_QUEUE_SIZE = 4
+# Telemetria da automação (ver src/core/telemetry.py): arquivo JSONL gravado na pasta da sessão com
+# o tempo de cada etapa por captura, e quantas capturas recentes entram no p50/p95 da barra de status.
+# Desativada por padrão, para diagnóstico: "capture_telemetry": true no arquivo de configuração
+DEFAULT_CAPTURE_TELEMETRY = False
+TELEMETRY_FILE = ".capture_telemetry.jsonl"
+TELEMETRY_WINDOW = 50
+# Tempo máximo de espera (s) para a janela capturada ficar em primeiro plano após ativá-la
+WINDOW_ACTIVATE_TIMEOUT = 0.2
+# Formato das capturas em disco (todos sem perda; ver docs/performance.md e
+# benchmarks/capture_format_benchmark.py):
+#   png  - nível de compressão (0-9) e optimize configuráveis; copiado para o PDF sem recompressão
+#   webp - WebP sem perda: arquivos bem menores, gravação mais lenta em telas com fotos
+#   bmp  - sem compressão: gravação mais rápida, para rajadas; arquivos grandes
+# O nível 1 grava mais rápido que os demais níveis em todos os tipos de tela medidos
+CAPTURE_FORMATS = {
+    "png": {'extension': '.png', 'format': 'PNG'},
+    "webp": {'extension': '.webp', 'format': 'WEBP', 'options': {'lossless': True, 'quality': 50, 'method': 4}},
+    "bmp": {'extension': '.bmp', 'format': 'BMP'},
+}
+DEFAULT_CAPTURE_FORMAT = "png"
+DEFAULT_CAPTURE_PNG_COMPRESS_LEVEL = 1
+DEFAULT_CAPTURE_PNG_OPTIMIZE = False
 
 # Configurações de DPI e qualidade
 DEFAULT_DPI = 96
 PDF_DPI = 96
 OCR_DPI = 300
 
+# Configurações de geração de PDF
+# Motor de escrita: "native" (streaming: páginas gravadas no arquivo conforme processadas,
+# com no máximo PDF_MAX_DECODED_IMAGES imagens decodificadas em memória),
+# "reportlab" (motor original) ou "pymupdf"
+DEFAULT_PDF_ENGINE = "native"
+DEFAULT_PDF_MAX_DECODED_IMAGES = 4
+PDF_ZLIB_LEVEL = 6
+# Processos usados para preparar as páginas em paralelo (0 = um por núcleo, 1 = desativado)
+DEFAULT_PDF_WORKERS = 0
+# Abaixo desta quantidade de páginas o custo de iniciar os processos não compensa
+PDF_PARALLEL_MIN_PAGES = 32
+# Reaproveitar um único XObject para imagens idênticas (mesmo hash de conteúdo)
+DEFAULT_PDF_DEDUPLICATE_IMAGES = True
+# Remover páginas idênticas à página anterior (ex: tela parada durante a automação)
+DEFAULT_PDF_DROP_DUPLICATE_PAGES = False
+# Desenhar anotações como vetores e texto sobre a captura original, sem gerar imagens .rendered
+DEFAULT_PDF_VECTOR_ANNOTATIONS = True
+# Perfis de saída: reduzem as imagens antes de embuti-las no PDF (apenas no motor "native")
+#   dpi: DPI efetivo máximo da imagem na página (None = resolução original)
+#   max_dimension: maior lado da imagem em pixels (None = sem limite); em páginas longas
+#                  (captura com rolagem) limita apenas a largura
+#   grayscale: converter para tons de cinza
+#   resample: filtro do Pillow ("bilinear" é rápido; "lanczos" preserva melhor textos pequenos)
+# O tamanho da página continua calculado pela resolução original (DEFAULT_DPI)
+PDF_PROFILES = {
+    "archive": {"dpi": None, "max_dimension": None, "grayscale": False, "resample": "lanczos"},
+    "screen": {"dpi": None, "max_dimension": 1920, "grayscale": False, "resample": "bilinear"},
+    "email": {"dpi": 72, "max_dimension": 1280, "grayscale": True, "resample": "bilinear"},
+}
+DEFAULT_PDF_PROFILE = "archive"
+# Acrescentar apenas as novas capturas ao último PDF da sessão (atualização incremental),
+# em vez de gerar um novo arquivo com todas as imagens
+DEFAULT_PDF_INCREMENTAL = True
+# PDF montado durante a automação: o arquivo é finalizado (árvore de páginas, xref e trailer)
+# a cada PDF_LIVE_CHECKPOINT_SECONDS segundos ou PDF_LIVE_CHECKPOINT_PAGES páginas novas
+PDF_LIVE_CHECKPOINT_SECONDS = 5
+PDF_LIVE_CHECKPOINT_PAGES = 25
+# Intervalo de atualização da barra de progresso da geração de PDF na interface (ms)
+PDF_PROGRESS_UPDATE_MS = 200
+
 # Hotkeys padrão
 DEFAULT_SCREENSHOT_HOTKEY = 'ctrl+shift+s'
 DEFAULT_AUTOMATION_HOTKEY = 'ctrl+alt+r'
@@ -61,7 +173,7 @@ POPPLER_PATH = r"C:\Program Files\poppler-24.08.0\Library\bin"
 TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 # Configurações de arquivo
-SUPPORTED_IMAGE_FORMATS = ['.png', '.jpg', '.jpeg']
+SUPPORTED_IMAGE_FORMATS = ['.png', '.webp', '.bmp', '.jpg', '.jpeg']
 
 # Configurações de anotação padrão
 DEFAULT_ANNOTATION_COLOR = "#FF0000"  # Vermelho
@@ -72,6 +184,18 @@ DEFAULT_ANNOTATION_FONT_SIZE = 36
 ANNOTATION_COLOR = DEFAULT_ANNOTATION_COLOR
 ANNOTATION_FONT_FAMILY = DEFAULT_ANNOTATION_FONT_FAMILY
 ANNOTATION_FONT_SIZE = DEFAULT_ANNOTATION_FONT_SIZE
+PDF_ENGINE = DEFAULT_PDF_ENGINE
+PDF_MAX_DECODED_IMAGES = DEFAULT_PDF_MAX_DECODED_IMAGES
+PDF_WORKERS = DEFAULT_PDF_WORKERS
+PDF_DEDUPLICATE_IMAGES = DEFAULT_PDF_DEDUPLICATE_IMAGES
+PDF_DROP_DUPLICATE_PAGES = DEFAULT_PDF_DROP_DUPLICATE_PAGES
+PDF_VECTOR_ANNOTATIONS = DEFAULT_PDF_VECTOR_ANNOTATIONS
+PDF_PROFILE = DEFAULT_PDF_PROFILE
+PDF_INCREMENTAL = DEFAULT_PDF_INCREMENTAL
+CAPTURE_FORMAT = DEFAULT_CAPTURE_FORMAT
+CAPTURE_PNG_COMPRESS_LEVEL = DEFAULT_CAPTURE_PNG_COMPRESS_LEVEL
+CAPTURE_PNG_OPTIMIZE = DEFAULT_CAPTURE_PNG_OPTIMIZE
+CAPTURE_TELEMETRY = DEFAULT_CAPTURE_TELEMETRY
 
 # Tenta carregar configurações personalizadas de arquivo
 try:
@@ -102,6 +226,34 @@ try:
         if 'annotation_font_size' in config_data:
             ANNOTATION_FONT_SIZE = config_data['annotation_font_size']
             print(f"Tamanho da fonte carregado: {ANNOTATION_FONT_SIZE}")
+
+        # Carregar configurações de geração de PDF
+        if 'pdf_engine' in config_data:
+            PDF_ENGINE = str(config_data['pdf_engine']).lower()
+        if 'pdf_max_decoded_images' in config_data:
+            PDF_MAX_DECODED_IMAGES = max(1, int(config_data['pdf_max_decoded_images']))
+        if 'pdf_workers' in config_data:
+            PDF_WORKERS = max(0, int(config_data['pdf_workers']))
+        if 'pdf_deduplicate_images' in config_data:
+            PDF_DEDUPLICATE_IMAGES = bool(config_data['pdf_deduplicate_images'])
+        if 'pdf_drop_duplicate_pages' in config_data:
+            PDF_DROP_DUPLICATE_PAGES = bool(config_data['pdf_drop_duplicate_pages'])
+        if 'pdf_vector_annotations' in config_data:
+            PDF_VECTOR_ANNOTATIONS = bool(config_data['pdf_vector_annotations'])
+        if config_data.get('pdf_profile') in PDF_PROFILES:
+            PDF_PROFILE = config_data['pdf_profile']
+        if 'pdf_incremental' in config_data:
+            PDF_INCREMENTAL = bool(config_data['pdf_incremental'])
+
+        # Carregar formato das capturas
+        if config_data.get('capture_format') in CAPTURE_FORMATS:
+            CAPTURE_FORMAT = config_data['capture_format']
+        if 'capture_png_compress_level' in config_data:
+            CAPTURE_PNG_COMPRESS_LEVEL = min(9, max(0, int(config_data['capture_png_compress_level'])))
+        if 'capture_png_optimize' in config_data:
+            CAPTURE_PNG_OPTIMIZE = bool(config_data['capture_png_optimize'])
+        if 'capture_telemetry' in config_data:
+            CAPTURE_TELEMETRY = bool(config_data['capture_telemetry'])
 except Exception as e:
     print(f"Erro ao carregar configurações: {e}")
     # Continuar com os valores padrão
@@ -118,7 +270,19 @@ def save_config():
             'automation_hotkey': AUTOMATION_HOTKEY,
             'annotation_color': ANNOTATION_COLOR,
             'annotation_font_family': ANNOTATION_FONT_FAMILY,
-            'annotation_font_size': ANNOTATION_FONT_SIZE
+            'annotation_font_size': ANNOTATION_FONT_SIZE,
+            'pdf_engine': PDF_ENGINE,
+            'pdf_max_decoded_images': PDF_MAX_DECODED_IMAGES,
+            'pdf_workers': PDF_WORKERS,
+            'pdf_deduplicate_images': PDF_DEDUPLICATE_IMAGES,
+            'pdf_drop_duplicate_pages': PDF_DROP_DUPLICATE_PAGES,
+            'pdf_vector_annotations': PDF_VECTOR_ANNOTATIONS,
+            'pdf_profile': PDF_PROFILE,
+            'pdf_incremental': PDF_INCREMENTAL,
+            'capture_format': CAPTURE_FORMAT,
+            'capture_png_compress_level': CAPTURE_PNG_COMPRESS_LEVEL,
+            'capture_png_optimize': CAPTURE_PNG_OPTIMIZE,
+            'capture_telemetry': CAPTURE_TELEMETRY
         }
         
         print(f"Salvando configurações: {config_data}")
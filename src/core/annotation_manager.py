@@ -3,6 +3,8 @@ import json
 from typing import Dict, List, Any, Optional
 import shutil
 from PIL import Image, ImageDraw, ImageFont
+from src.config.config import PDF_ENGINE, PDF_VECTOR_ANNOTATIONS
+from src.core.pdf_engines import get_engine_class
 
 class AnnotationManager:
     """Gerencia anotações para imagens sem modificar os arquivos originais."""
@@ -13,9 +15,13 @@ class AnnotationManager:
         self.annotations_dir = os.path.join(session_dir, ".annotations")
         os.makedirs(self.annotations_dir, exist_ok=True)
         
-        # Diretório para as imagens anotadas renderizadas
+        # Diretório para as imagens anotadas renderizadas (criado apenas quando necessário)
         self.rendered_dir = os.path.join(session_dir, ".rendered")
-        os.makedirs(self.rendered_dir, exist_ok=True)
+        
+        # Com anotações vetoriais no PDF não é preciso renderizar a imagem a cada salvamento;
+        # get_image_for_pdf ainda gera a versão renderizada sob demanda quando for necessária
+        self.render_on_save = not (PDF_VECTOR_ANNOTATIONS and
+                                   get_engine_class(PDF_ENGINE).supports_vector_annotations)
     
     def get_annotation_file_path(self, image_path: str) -> str:
         """Retorna o caminho para o arquivo de anotações correspondente à imagem."""
@@ -43,8 +49,13 @@ class AnnotationManager:
             with open(annotation_file, 'w') as f:
                 json.dump(annotations, f, indent=2)
             
-            # Renderizar a imagem com anotações
-            self.render_annotated_image(image_path, annotations)
+            # Renderizar a imagem com anotações ou descartar a versão antiga
+            if self.render_on_save:
+                self.render_annotated_image(image_path, annotations)
+            else:
+                rendered_file = self.get_rendered_image_path(image_path)
+                if os.path.exists(rendered_file):
+                    os.remove(rendered_file)
             
             return True
         except Exception as e:
@@ -102,6 +113,7 @@ class AnnotationManager:
                     self._draw_annotation(draw, annotation, (img_width, img_height))
                 
                 # Salvar a imagem renderizada
+                os.makedirs(self.rendered_dir, exist_ok=True)
                 output_path = self.get_rendered_image_path(image_path)
                 annotated_img.save(output_path)
                 
@@ -229,7 +241,14 @@ class AnnotationManager:
         # Se a imagem tem anotações, usar a versão renderizada
         if self.has_annotations(image_path):
             rendered_path = self.get_rendered_image_path(image_path)
-            if os.path.exists(rendered_path):
+            annotation_file = self.get_annotation_file_path(image_path)
+            
+            # Renderizar sob demanda se a versão renderizada não existir ou estiver desatualizada
+            if (not os.path.exists(rendered_path) or
+                    os.path.getmtime(rendered_path) < os.path.getmtime(annotation_file)):
+                rendered_path = self.render_annotated_image(image_path, self.load_annotations(image_path))
+            
+            if rendered_path and os.path.exists(rendered_path):
                 return rendered_path
         
         # Caso contrário, usar a imagem original
@@ -1,12 +1,32 @@
+import os
 import time
 import threading
 import keyboard
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional
+from PIL import Image
 from src.core.screenshot import ScreenshotManager
+from src.core.live_pdf import LivePDFSink
+from src.core.capture_writer import CaptureWriter, CapturePipeline
+from src.core.scheduler import CaptureScheduler
+from src.core.screen_change import ChangeTrigger, sample_image, wait_until_stable
+from src.core.frame_filter import DuplicateFrameFilter, RepeatedFrameStop, difference_hash, frames_equal
+from src.core.stitcher import ScrollStitcher
+from src.core.macro import Macro, MacroError, compile_macro
+from src.core.input_events import InputEventService, get_input_service
+from src.core.telemetry import CaptureTelemetry
+from src.config.config import (
+    DEFAULT_DUPLICATE_FRAME_DISTANCE, DEFAULT_STOP_REPEAT_COUNT, DEFAULT_OVERRUN_POLICY, CHANGE_SAMPLE_RATE,
+    DEFAULT_CHANGE_THRESHOLD, DEFAULT_CHANGE_DEBOUNCE, DEFAULT_CHANGE_MIN_GAP, DEFAULT_SETTLE_TIMEOUT,
+    STITCH_END_REPEATS, CAPTURE_TELEMETRY
+)
 
 class AutomationManager:
-    def __init__(self, screenshot_manager: ScreenshotManager):
+    def __init__(self, screenshot_manager: ScreenshotManager,
+                 input_service: Optional[InputEventService] = None):
         self.screenshot_manager = screenshot_manager
+        # Tecla de parada registrada no serviço de teclado durante a automação
+        self.input_service = input_service or get_input_service()
+        self._stop_key_handle: Optional[int] = None
         self.is_running = False
         self.thread: Optional[threading.Thread] = None
         self.on_screenshot_callback: Optional[Callable[[str], None]] = None
@@ -14,13 +34,49 @@ class AutomationManager:
         self.on_finish_callback: Optional[Callable[[], None]] = None
         
         # Configurações de ações e condições de parada
+        # Ação entre capturas: "none", "key" (uma tecla) ou "macro" (sequência de passos, ver Macro)
         self.action_type = "none"
         self.action_key = None
+        self.action_macro: Optional[Macro] = None
+        # Após a ação, esperar a tela parar de mudar e capturar em seguida (em vez do intervalo)
+        self.wait_for_settle = False
+        self.settle_timeout = DEFAULT_SETTLE_TIMEOUT
         self.stop_on_key = False
         self.stop_key = None
         self.stop_after_time = False
         self.stop_time_value = 0
+        # Fim do conteúdo: parar após N capturas seguidas iguais à anterior (e excluí-las)
+        self.stop_on_repeat = False
+        self.stop_repeat_count = DEFAULT_STOP_REPEAT_COUNT
+        self.delete_repeated = False
+        self.deleted_repeated: List[str] = []
         self.start_delay = 0
+        self._stop_event: Optional[threading.Event] = None
+
+        # Capturas em prazos fixos; o que fazer quando uma captura passa do prazo seguinte
+        # ("skip", "catch_up" ou "stretch", ver CaptureScheduler)
+        self.overrun_policy = DEFAULT_OVERRUN_POLICY
+        self.schedule_stats: Dict[str, float] = {}
+
+        # Quando capturar: "interval" (a cada intervalo), "change" (quando a tela mudar, ver ChangeTrigger)
+        # ou "stitch" (rolar com a ação entre capturas e emendar tudo em uma imagem longa, ver ScrollStitcher)
+        self.trigger_mode = "interval"
+        self.change_threshold = DEFAULT_CHANGE_THRESHOLD  # % de pixels alterados
+        self.change_debounce = DEFAULT_CHANGE_DEBOUNCE
+        self.change_min_gap = DEFAULT_CHANGE_MIN_GAP
+
+        # Capturas repetidas: "off", "skip" (não salvar) ou "tag" (salvar com sufixo "_dup")
+        self.duplicate_filter = DuplicateFrameFilter("off")
+
+        # PDF montado durante a automação (ver LivePDFSink)
+        self.live_pdf = False
+        self.last_live_pdf: Optional[str] = None
+
+        # Tempo médio de cada etapa da captura na última automação, em ms (ver ScreenshotManager.last_timings)
+        self.capture_timings: Dict[str, float] = {}
+        # Tempo de cada etapa por captura (ver CaptureTelemetry): resumo da última automação e arquivo
+        self.telemetry: Optional[CaptureTelemetry] = None
+        self.telemetry_summary: Dict[str, Dict[str, float]] = {}
     
     def set_callbacks(self, 
                      on_screenshot: Optional[Callable[[str], None]] = None,
@@ -31,22 +87,63 @@ class AutomationManager:
         self.on_status_callback = on_status
         self.on_finish_callback = on_finish
     
-    def set_action_between_captures(self, action_type: Optional[str], action_key: Optional[str]):
-        """Define a ação a ser executada entre capturas."""
+    def set_action_between_captures(self, action_type: Optional[str], action_key: Optional[str],
+                                    action_macro: Optional[str] = None):
+        """Define a ação a ser executada entre capturas. A macro é compilada aqui, uma única vez."""
         self.action_type = action_type if action_type else "none"
         self.action_key = action_key
+        self.action_macro = None
+        if self.action_type == "macro":
+            try:
+                self.action_macro = compile_macro(action_macro or "")
+            except MacroError as e:
+                print(f"Macro inválida, nenhuma ação entre capturas: {e}")
+                self.action_type = "none"
+    
+    def set_wait_for_settle(self, enabled: bool, timeout: Optional[float] = None):
+        """Ativa a espera pela tela estabilizar após a ação entre capturas."""
+        self.wait_for_settle = bool(enabled)
+        self.settle_timeout = DEFAULT_SETTLE_TIMEOUT if not timeout else timeout
     
     def set_stop_conditions(self, 
                            stop_on_key: bool, 
                            stop_key: Optional[str], 
                            stop_after_time: bool, 
-                           stop_time_value: Optional[float]):
+                           stop_time_value: Optional[float],
+                           stop_on_repeat: bool = False,
+                           stop_repeat_count: Optional[int] = None,
+                           delete_repeated: bool = False):
         """Define as condições de parada da automação."""
         self.stop_on_key = stop_on_key
         self.stop_key = stop_key
         self.stop_after_time = stop_after_time
         self.stop_time_value = stop_time_value if stop_time_value else 0
+        self.stop_on_repeat = bool(stop_on_repeat)
+        self.stop_repeat_count = stop_repeat_count if stop_repeat_count else DEFAULT_STOP_REPEAT_COUNT
+        self.delete_repeated = bool(delete_repeated)
     
+    def set_duplicate_filter(self, mode: Optional[str], max_distance: Optional[int] = None):
+        """Define o tratamento de capturas iguais à anterior."""
+        if max_distance is None:
+            max_distance = DEFAULT_DUPLICATE_FRAME_DISTANCE
+        self.duplicate_filter = DuplicateFrameFilter(mode or "off", max_distance)
+
+    def set_overrun_policy(self, policy: Optional[str]):
+        """Define a política para capturas que passam do prazo seguinte."""
+        self.overrun_policy = policy or DEFAULT_OVERRUN_POLICY
+
+    def set_trigger_mode(self, mode: Optional[str], threshold: Optional[float] = None,
+                         debounce: Optional[float] = None, min_gap: Optional[float] = None):
+        """Define quando capturar: a cada intervalo, quando a tela mudar ou rolando e emendando."""
+        self.trigger_mode = mode if mode in ("change", "stitch") else "interval"
+        self.change_threshold = DEFAULT_CHANGE_THRESHOLD if threshold is None else threshold
+        self.change_debounce = DEFAULT_CHANGE_DEBOUNCE if debounce is None else debounce
+        self.change_min_gap = DEFAULT_CHANGE_MIN_GAP if min_gap is None else min_gap
+
+    def set_live_pdf(self, enabled: bool):
+        """Ativa a gravação do PDF durante a automação."""
+        self.live_pdf = bool(enabled)
+
     def start(self, interval: float, num_captures: int, start_delay: float = 0) -> bool:
         """Inicia a automação de capturas."""
         if self.is_running:
@@ -68,11 +165,24 @@ class AutomationManager:
     def stop(self):
         """Para a automação."""
         self.is_running = False
+        if self._stop_event:
+            self._stop_event.set()  # Interrompe a espera pela próxima captura
         if self.on_status_callback:
             self.on_status_callback("Status: Parando...")
     
     def _run_automation(self, interval: float, num_captures: int):
         """Executa o loop de automação."""
+        live_sink: Optional[LivePDFSink] = None
+        pipeline: Optional[CapturePipeline] = None
+        telemetry: Optional[CaptureTelemetry] = None
+        self.last_live_pdf = None
+        self.telemetry_summary = {}
+        self.capture_timings = {}
+        self.schedule_stats = {}
+        self.deleted_repeated = []
+        repeated_paths: List[str] = []
+        repeated_reference: Optional[str] = None  # Captura que as repetidas do fim repetem
+        timing_totals: Dict[str, float] = {}
         try:
             # Verificar se o diretório está configurado
             if not self.screenshot_manager.get_base_dir():
@@ -83,13 +193,64 @@ class AutomationManager:
                         self.on_finish_callback()
                     return
             
-            # Configurar listener de tecla para parada
+            # Registrar a tecla de parada no serviço de teclado (removida ao terminar)
             stop_event = threading.Event()
+            self._stop_event = stop_event
             if self.stop_on_key and self.stop_key:
-                self._setup_key_listener(stop_event)
+                self._stop_key_handle = self.input_service.register_key(self.stop_key, stop_event.set)
             
+            # PDF ao vivo: cada captura é gravada no PDF por uma thread em segundo plano
+            if self.live_pdf:
+                session_dir = self.screenshot_manager.get_images_dir()
+                live_sink = LivePDFSink(LivePDFSink.default_output(session_dir), session_dir)
+                live_sink.start()
+
+            # Telemetria (se ativada): uma linha por captura no arquivo da sessão
+            if CAPTURE_TELEMETRY:
+                telemetry = CaptureTelemetry(
+                    CaptureTelemetry.default_path(self.screenshot_manager.get_images_dir()))
+                telemetry.start()
+            self.telemetry = telemetry
+
+            self.duplicate_filter.reset()
+            # Fim do conteúdo: decidido na etapa de análise, que avisa a captura por content_ended
+            repeat_stop = (RepeatedFrameStop(self.stop_repeat_count)
+                           if self.stop_on_repeat and self.trigger_mode == "interval" else None)
+            content_ended = threading.Event()
+
+            # Pipeline: a thread da automação só captura e navega. A análise (um único hash por
+            # captura para as repetidas e o fim do conteúdo), a codificação e a gravação seguem em
+            # outras threads; o PDF ao vivo e a interface recebem cada arquivo já gravado
+            def analyze(image, img_path: str) -> Optional[str]:
+                nonlocal repeated_reference
+                frame_hash = (difference_hash(image)
+                              if self.duplicate_filter.enabled or repeat_stop else None)
+                if self.duplicate_filter.is_duplicate(image, frame_hash):
+                    if self.duplicate_filter.mode == "skip":
+                        print("Captura igual à anterior, ignorada")
+                        img_path = None
+                    else:
+                        base, extension = os.path.splitext(img_path)
+                        img_path = f"{base}_dup{extension}"
+                if repeat_stop and repeat_stop.update(image, img_path, frame_hash):
+                    if not content_ended.is_set():
+                        print(f"Fim do conteúdo: {repeat_stop.count} capturas seguidas iguais à anterior")
+                    repeated_paths[:] = repeat_stop.trailing_paths
+                    repeated_reference = repeat_stop.reference_path
+                    content_ended.set()
+                return img_path
+
+            def on_saved(img_path: str):
+                if live_sink:
+                    live_sink.add(img_path)
+                if self.on_screenshot_callback:
+                    self.on_screenshot_callback(img_path)
+
+            pipeline = CapturePipeline(CaptureWriter(on_saved, telemetry=telemetry), analyze)
+            pipeline.start()
+
             # Tempo de início para verificar limite de tempo
-            start_time = time.time()
+            start_time = time.monotonic()
             
             # Atraso inicial
             if self.start_delay > 0:
@@ -97,47 +258,23 @@ class AutomationManager:
                     self.on_status_callback(f"Status: Preparando... {self.start_delay}s")
                 time.sleep(self.start_delay)
             
-            for i in range(num_captures):
-                if not self.is_running:
-                    break
-                
-                # Verificar condição de parada por tempo
-                if self.stop_after_time and self.stop_time_value > 0:
-                    elapsed = time.time() - start_time
-                    if elapsed >= self.stop_time_value:
-                        if self.on_status_callback:
-                            self.on_status_callback("Status: Tempo limite atingido")
-                        break
-                
-                # Verificar se o botão de parada foi pressionado
-                if stop_event.is_set():
-                    if self.on_status_callback:
-                        self.on_status_callback("Status: Interrompido pelo usuário")
-                    break
-                
-                # Atualiza status
-                if self.on_status_callback:
-                    self.on_status_callback(f"Status: Capturando {i+1}/{num_captures}")
-                
-                # Captura screenshot
-                img_path = self.screenshot_manager.take_screenshot()
-                if img_path and self.on_screenshot_callback:
-                    self.on_screenshot_callback(img_path)
-                
-                # Verifica se é a última captura
-                if i < num_captures - 1 and self.is_running:
-                    # Executa ação entre capturas
-                    if self.action_type == "key" and self.action_key:
-                        try:
-                            keyboard.press_and_release(self.action_key)
-                            time.sleep(0.1)  # Pequena pausa após pressionar tecla
-                        except Exception as e:
-                            print(f"Erro ao simular tecla {self.action_key}: {e}")
-                    
-                    # Aguarda intervalo antes da próxima captura
-                    time.sleep(interval)
+            if self.trigger_mode == "change":
+                captures = self._run_change_trigger(num_captures, stop_event, start_time,
+                                                    pipeline, timing_totals)
+            elif self.trigger_mode == "stitch":
+                captures = self._run_stitch(interval, num_captures, stop_event, start_time,
+                                            pipeline, timing_totals)
+            else:
+                captures = self._run_interval(interval, num_captures, stop_event, start_time,
+                                              pipeline, timing_totals, content_ended)
             
             # Finaliza
+            self._report_capture_timings(timing_totals, captures)
+            self._close_pipeline(pipeline)
+            self._close_telemetry(telemetry)
+            self._close_live_pdf(live_sink)
+            if repeated_paths and self.delete_repeated:
+                self._delete_repeated(repeated_paths, repeated_reference)
             if self.on_finish_callback:
                 self.on_finish_callback()
                 
@@ -145,21 +282,313 @@ class AutomationManager:
             print(f"Erro na automação: {e}")
             if self.on_status_callback:
                 self.on_status_callback(f"Status: Erro - {str(e)[:30]}")
+            self._close_pipeline(pipeline)
+            self._close_telemetry(telemetry)
+            self._close_live_pdf(live_sink)
             if self.on_finish_callback:
                 self.on_finish_callback()
         finally:
+            self.input_service.unregister(self._stop_key_handle)
+            self._stop_key_handle = None
             self.is_running = False
     
-    def _setup_key_listener(self, stop_event: threading.Event):
-        """Configura um listener para a tecla de parada."""
-        def key_pressed(e):
-            if e.name == self.stop_key:
-                stop_event.set()
-                return False  # Para parar o listener
+    def _run_interval(self, interval: float, num_captures: int, stop_event: threading.Event,
+                      start_time: float, pipeline: CapturePipeline,
+                      timing_totals: Dict[str, float], content_ended: threading.Event) -> int:
+        """
+        Captura a cada intervalo, com a ação entre capturas logo após cada captura. Retorna o
+        número de capturas. Termina quando a análise acusa o fim do conteúdo (`content_ended`).
+        """
+        scheduler = CaptureScheduler(interval, self.overrun_policy, stop_event)
+        captures = 0
+        settled_image = None  # Captura já estável, obtida ao esperar a tela após a ação
+        settle_times = []
+        settle_timeouts = 0
+        stages: Dict[str, float] = {}  # Ação, espera e atraso que antecederam a próxima captura
+
+        # Prazos fixos a partir daqui: captura n em início + n * intervalo
+        scheduler.start()
+        for i in range(num_captures):
+            if not self.is_running:
+                break
+            
+            # Aguarda o horário desta captura (a primeira é imediata)
+            if not scheduler.wait() and not self.is_running:
+                break
+            stages['overshoot'] = scheduler.lateness[-1]
+            
+            if self._should_stop(stop_event, start_time):
+                break
+            
+            # Atualiza status
+            if self.on_status_callback:
+                self.on_status_callback(f"Status: Capturando {i+1}/{num_captures}"
+                                        f"{self.duplicate_filter.status_text()}"
+                                        f"{self._telemetry_status()}")
+            
+            # Captura screenshot
+            self._capture(pipeline, timing_totals, settled_image, stages)
+            settled_image = None
+            stages = {}
+            captures += 1
+
+            # Fim do conteúdo: a ação não muda mais a tela (a análise pode estar algumas capturas atrás)
+            if content_ended.is_set():
+                if self.on_status_callback:
+                    self.on_status_callback("Status: Fim do conteúdo (capturas repetidas)")
+                break
+            
+            # Verifica se é a última captura
+            if i < num_captures - 1 and self.is_running:
+                # Executa ação entre capturas
+                started = time.monotonic()
+                acted = self._run_action(stop_event)
+                stages['action'] = time.monotonic() - started
+                if acted and self.wait_for_settle:
+                    # Esperar a tela terminar de mudar e capturar logo em seguida
+                    started = time.monotonic()
+                    last_frame = self.screenshot_manager.last_frame
+                    before = sample_image(last_frame) if last_frame is not None else None
+                    settled_image, settled = wait_until_stable(
+                        self.screenshot_manager.grab_screenshot, before, stop_event,
+                        self.settle_timeout)
+                    settle_times.append(time.monotonic() - started)
+                    stages['settle'] = settle_times[-1]
+                    if not settled and settled_image is not None:
+                        settle_timeouts += 1
+                        print(f"Tela não estabilizou em {self.settle_timeout}s, capturando assim mesmo")
+                    scheduler.restart()
+                    continue
+                
+                # Prazo da próxima captura (o tempo gasto acima já conta no intervalo)
+                scheduler.advance()
+
+        if settle_times:
+            print(f"Estabilização após a ação: média {sum(settle_times) * 1000 / len(settle_times):.0f} ms, "
+                  f"máximo {max(settle_times) * 1000:.0f} ms, tempo esgotado {settle_timeouts} vezes")
+        else:
+            self.schedule_stats = scheduler.stats()
+            if self.schedule_stats:
+                print(f"Pontualidade das capturas: {scheduler.status_text()}")
+        return captures
+
+    def _run_change_trigger(self, num_captures: int, stop_event: threading.Event,
+                            start_time: float, pipeline: CapturePipeline,
+                            timing_totals: Dict[str, float]) -> int:
+        """
+        Captura quando a tela muda: a região é amostrada CHANGE_SAMPLE_RATE vezes por segundo e
+        a captura completa só é salva quando ChangeTrigger decide. Retorna o número de capturas.
+        """
+        trigger = ChangeTrigger(self.change_threshold / 100, self.change_debounce, self.change_min_gap)
+        sampler = CaptureScheduler(1 / CHANGE_SAMPLE_RATE, "skip", stop_event)
+        captures = 0
+
+        if self.on_status_callback:
+            self.on_status_callback("Status: Aguardando mudanças na tela...")
+        sampler.start()
+        while captures < num_captures and self.is_running:
+            if not sampler.wait() and not self.is_running:
+                break
+            if self._should_stop(stop_event, start_time):
+                break
+
+            # A mesma imagem da amostra é salva, sem capturar de novo
+            image = self.screenshot_manager.grab_screenshot()
+            if trigger.update(sample_image(image)):
+                captures += 1
+                if self.on_status_callback:
+                    self.on_status_callback(f"Status: Mudança capturada {captures}/{num_captures}"
+                                            f"{self.duplicate_filter.status_text()}"
+                                            f"{self._telemetry_status()}")
+                self._capture(pipeline, timing_totals, image)
+            sampler.advance()
+
+        print(f"Captura por mudança: {trigger.samples} amostras, {captures} capturas salvas")
+        return captures
+
+    def _run_stitch(self, interval: float, num_captures: int, stop_event: threading.Event,
+                    start_time: float, pipeline: CapturePipeline,
+                    timing_totals: Dict[str, float]) -> int:
+        """
+        Captura com rolagem: a cada passo a tela é capturada e emendada à anterior pelas linhas em
+        comum (ScrollStitcher), e a ação entre capturas rola o conteúdo. Termina quando a rolagem
+        não traz linhas novas (fim da página) ou no limite de capturas. A imagem emendada é salva
+        como uma captura (ou algumas, se passar de STITCH_MAX_HEIGHT). Retorna o número de capturas salvas.
+        """
+        stitcher = ScrollStitcher()
+        scheduler = CaptureScheduler(interval, self.overrun_policy, stop_event)
+        image = None  # Captura já estável, obtida ao esperar a tela após a rolagem
+
+        scheduler.start()
+        for i in range(num_captures):
+            if not self.is_running:
+                break
+            if not scheduler.wait() and not self.is_running:
+                break
+            if self._should_stop(stop_event, start_time):
+                break
+
+            if image is None:
+                image = self.screenshot_manager.grab_screenshot()
+            stitcher.add(image)
+            if self.on_status_callback:
+                self.on_status_callback(f"Status: Rolando {i+1}/{num_captures} - {stitcher.height} linhas")
+            if stitcher.unchanged >= STITCH_END_REPEATS:
+                if self.on_status_callback:
+                    self.on_status_callback("Status: Fim da página")
+                break
+
+            last_image, image = image, None
+            if i < num_captures - 1 and self.is_running:
+                if self._run_action(stop_event) and self.wait_for_settle:
+                    image, _ = wait_until_stable(self.screenshot_manager.grab_screenshot,
+                                                 sample_image(last_image), stop_event,
+                                                 self.settle_timeout)
+                    scheduler.restart()
+                    continue
+                scheduler.advance()
+
+        print(f"Captura com rolagem: {stitcher.frames} telas, {stitcher.height} linhas, "
+              f"{stitcher.gaps} sem sobreposição")
+        parts = stitcher.compose()
+        for part in parts:
+            self._capture(pipeline, timing_totals, part)
+        return len(parts)
+
+    def _run_action(self, stop_event: threading.Event) -> bool:
+        """Executa a ação entre capturas. Retorna False se não há ação ou ela não foi concluída."""
+        if self.action_type == "macro" and self.action_macro:
+            try:
+                return self.action_macro.run(self.screenshot_manager.capture_origin(), stop_event)
+            except Exception as e:
+                print(f"Erro ao executar a macro: {e}")
+                return False
+        if self.action_type == "key" and self.action_key:
+            try:
+                keyboard.press_and_release(self.action_key)
+                if not self.wait_for_settle:
+                    time.sleep(0.1)  # Pequena pausa após pressionar tecla
+                return True
+            except Exception as e:
+                print(f"Erro ao simular tecla {self.action_key}: {e}")
+        return False
+
+    def _should_stop(self, stop_event: threading.Event, start_time: float) -> bool:
+        """Verifica o tempo limite e a tecla de parada, atualizando o status."""
+        # Verificar condição de parada por tempo
+        if self.stop_after_time and self.stop_time_value > 0:
+            elapsed = time.monotonic() - start_time
+            if elapsed >= self.stop_time_value:
+                if self.on_status_callback:
+                    self.on_status_callback("Status: Tempo limite atingido")
+                return True
         
-        # Inicia o listener em um thread separado
-        listener_thread = threading.Thread(
-            target=lambda: keyboard.hook(key_pressed),
-            daemon=True
-        )
-        listener_thread.start()
+        # Verificar se o botão de parada foi pressionado
+        if stop_event.is_set():
+            if self.on_status_callback:
+                self.on_status_callback("Status: Interrompido pelo usuário")
+            return True
+        return False
+
+    def _capture(self, pipeline: CapturePipeline, timing_totals: Dict[str, float], image=None,
+                 stages: Optional[Dict[str, float]] = None):
+        """
+        Captura a tela (ou usa `image`, já capturada) e a enfileira no pipeline; a thread da
+        automação fica livre para a ação entre capturas. Acumula o tempo de cada etapa e cria o
+        registro de telemetria da captura, com as etapas anteriores a ela (`stages`).
+        """
+        screenshot_manager = self.screenshot_manager
+        screenshot_manager.last_timings = {}
+        record = self.telemetry.new_record() if self.telemetry else None
+        if image is None:
+            image = screenshot_manager.grab_screenshot()
+        screenshot_manager.last_frame = image
+        if record is not None:
+            # Preenchido antes de enfileirar: depois disso o registro pertence às outras etapas
+            record.update(stages or {})
+            record.update(screenshot_manager.last_timings)
+        capture_format = screenshot_manager.capture_format
+        started = time.perf_counter()
+        pipeline.submit(image, screenshot_manager.next_capture_path(),
+                        capture_format['format'], capture_format['options'], record)
+        screenshot_manager.last_timings['queue'] = time.perf_counter() - started
+        for stage, seconds in screenshot_manager.last_timings.items():
+            timing_totals[stage] = timing_totals.get(stage, 0.0) + seconds
+
+    def _delete_repeated(self, repeated_paths: List[str], reference_path: Optional[str]):
+        """
+        Exclui as capturas repetidas do fim do conteúdo (depois de gravadas). Cada arquivo é
+        conferido antes: só é excluído se for idêntico, pixel a pixel, à captura de referência.
+        """
+        reference = self._load_frame(reference_path)
+        if reference is None:
+            print("Capturas repetidas mantidas: a captura de referência não está disponível")
+            return
+        for img_path in repeated_paths:
+            if not frames_equal(self._load_frame(img_path), reference):
+                print(f"Captura mantida, difere da captura de referência: {img_path}")
+                continue
+            try:
+                os.remove(img_path)
+                self.deleted_repeated.append(img_path)
+            except OSError as e:
+                print(f"Erro ao excluir captura repetida {img_path}: {e}")
+        if self.deleted_repeated:
+            print(f"Capturas repetidas excluídas: {len(self.deleted_repeated)}")
+
+    @staticmethod
+    def _load_frame(img_path: Optional[str]) -> Optional[Image.Image]:
+        """Lê uma captura gravada para comparação (None se não existir ou não abrir)."""
+        if not img_path:
+            return None
+        try:
+            with Image.open(img_path) as img:
+                return img.convert('RGB')
+        except Exception as e:
+            print(f"Erro ao ler captura {img_path}: {e}")
+            return None
+
+    def _report_capture_timings(self, timing_totals: Dict[str, float], captures: int):
+        """Calcula e mostra o tempo médio de cada etapa da captura."""
+        if not captures:
+            return
+        self.capture_timings = {stage: total * 1000 / captures for stage, total in timing_totals.items()}
+        self.capture_timings['total'] = sum(timing_totals.values()) * 1000 / captures
+        details = ", ".join(f"{stage}: {ms:.1f} ms" for stage, ms in self.capture_timings.items())
+        print(f"Tempo médio por captura ({captures} capturas) - {details}")
+
+    def _close_pipeline(self, pipeline: Optional[CapturePipeline]):
+        """Aguarda a análise e a gravação das capturas que ainda estão nas filas."""
+        if not pipeline:
+            return
+        if pipeline.pending and self.on_status_callback:
+            self.on_status_callback(f"Status: Gravando {pipeline.pending} capturas...")
+        pipeline.close()
+        writer = pipeline.writer
+        analysis_ms = pipeline.analysis_seconds * 1000 / pipeline.submitted if pipeline.submitted else 0.0
+        print(f"Capturas gravadas: {writer.written}, falhas: {writer.failed}, descartadas: {pipeline.dropped}, "
+              f"análise: {analysis_ms:.1f} ms por captura, espera pelas filas: "
+              f"captura {pipeline.blocked_seconds:.2f}s, análise {writer.blocked_seconds:.2f}s")
+
+    def _telemetry_status(self) -> str:
+        """p50/p95 das últimas capturas para a barra de status."""
+        return self.telemetry.status_text() if self.telemetry else ""
+
+    def _close_telemetry(self, telemetry: Optional[CaptureTelemetry]):
+        """Grava o resumo da telemetria e mostra o relatório por etapa."""
+        if not telemetry:
+            return
+        telemetry.close()
+        self.telemetry_summary = telemetry.summary()
+        if self.telemetry_summary:
+            print(f"Telemetria ({telemetry.records} capturas, tempos em ms, {telemetry.path}):\n"
+                  f"{telemetry.report()}")
+
+    def _close_live_pdf(self, live_sink: Optional[LivePDFSink]):
+        """Grava as capturas restantes e finaliza o PDF ao vivo."""
+        if not live_sink:
+            return
+        if self.on_status_callback:
+            self.on_status_callback("Status: Finalizando PDF...")
+        if live_sink.close():
+            self.last_live_pdf = live_sink.output_pdf
@@ -0,0 +1,233 @@
+import io
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from PIL import Image
+from src.core.telemetry import CaptureTelemetry
+from src.config.config import (
+    CAPTURE_WRITER_WORKERS, CAPTURE_WRITER_QUEUE_SIZE, CAPTURE_FORMATS, CAPTURE_FORMAT,
+    CAPTURE_PNG_COMPRESS_LEVEL, CAPTURE_PNG_OPTIMIZE, CAPTURE_PIPELINE_QUEUE_SIZE
+)
+
+
+def capture_format_settings(name: str = CAPTURE_FORMAT,
+                            compress_level: Optional[int] = None,
+                            optimize: Optional[bool] = None) -> Dict[str, Any]:
+    """Extensão, formato do Pillow e opções de gravação de um formato de captura (CAPTURE_FORMATS)."""
+    if name not in CAPTURE_FORMATS:
+        print(f"Formato de captura desconhecido '{name}', usando 'png'")
+        name = "png"
+    settings = CAPTURE_FORMATS[name]
+    options = dict(settings.get('options', {}))
+    if settings['format'] == 'PNG':
+        level = CAPTURE_PNG_COMPRESS_LEVEL if compress_level is None else compress_level
+        options['compress_level'] = min(9, max(0, int(level)))
+        options['optimize'] = CAPTURE_PNG_OPTIMIZE if optimize is None else bool(optimize)
+    return {'name': name, 'extension': settings['extension'], 'format': settings['format'],
+            'options': options}
+
+
+def save_image_atomic(image: Image.Image, path: str, image_format: Optional[str] = None,
+                      options: Optional[Dict[str, Any]] = None,
+                      timings: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Grava a imagem em um arquivo temporário e o renomeia para o nome final, para que a pasta
+    da sessão nunca mostre uma captura gravada pela metade. A imagem é codificada na memória
+    antes da gravação; com `timings`, os dois tempos ficam em timings['encode'] e timings['write'].
+    """
+    temp_path = path + ".tmp"
+    if not image_format:
+        image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower(), 'PNG')
+    try:
+        started = time.perf_counter()
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **(options or {}))
+        encoded = time.perf_counter()
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(temp_path, path)
+        if timings is not None:
+            timings['encode'] = encoded - started
+            timings['write'] = time.perf_counter() - encoded
+        return True
+    except Exception as e:
+        print(f"Erro ao gravar captura {path}: {e}")
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+
+
+class CaptureWriter:
+    """
+    Codifica e grava as capturas da automação em threads separadas.
+
+    A captura só enfileira a imagem já obtida; quando a fila enche, `submit` espera uma vaga
+    (a automação desacelera em vez de acumular imagens na memória). `on_saved` é chamado com
+    o caminho de cada arquivo gravado, na mesma ordem das capturas. Com `telemetry`, o registro
+    de cada captura (ver CaptureTelemetry) recebe os tempos de codificação, gravação e callback.
+    """
+
+    def __init__(self, on_saved: Optional[Callable[[str], None]] = None,
+                 workers: int = CAPTURE_WRITER_WORKERS,
+                 queue_size: int = CAPTURE_WRITER_QUEUE_SIZE,
+                 telemetry: Optional[CaptureTelemetry] = None):
+        self.on_saved = on_saved
+        self.telemetry = telemetry
+        self.workers = max(1, workers)
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._next_delivery = 0
+        self._finished: Dict[int, Tuple[Optional[str], Optional[Dict[str, Any]]]] = {}
+        self.written = 0
+        self.failed = 0
+        self.blocked_seconds = 0.0  # Tempo que a automação esperou por vaga na fila
+
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    @property
+    def pending(self) -> int:
+        """Capturas enfileiradas ou sendo gravadas."""
+        return self._submitted - self._next_delivery
+
+    def submit(self, image: Image.Image, path: str, image_format: Optional[str] = None,
+               options: Optional[Dict[str, Any]] = None, record: Optional[Dict[str, Any]] = None):
+        """Enfileira uma captura para gravação; espera se a fila estiver cheia."""
+        job = (self._submitted, image, path, image_format, options, record)
+        self._submitted += 1
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            started = time.perf_counter()
+            self.queue.put(job)
+            self.blocked_seconds += time.perf_counter() - started
+
+    def close(self, timeout: Optional[float] = None):
+        """Grava as capturas pendentes e encerra as threads."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            index, image, path, image_format, options, record = job
+            saved = save_image_atomic(image, path, image_format, options, record)
+            self._finish(index, path if saved else None, record)
+
+    def _finish(self, index: int, path: Optional[str], record: Optional[Dict[str, Any]] = None):
+        # Threads diferentes podem terminar fora de ordem; entrega apenas a sequência contínua
+        with self._lock:
+            self._finished[index] = (path, record)
+            while self._next_delivery in self._finished:
+                saved_path, saved_record = self._finished.pop(self._next_delivery)
+                self._next_delivery += 1
+                if saved_path is None:
+                    self.failed += 1
+                else:
+                    self.written += 1
+                    if self.on_saved:
+                        started = time.perf_counter()
+                        try:
+                            self.on_saved(saved_path)
+                        except Exception as e:
+                            print(f"Erro ao processar captura gravada {saved_path}: {e}")
+                        if saved_record is not None:
+                            saved_record['callback'] = time.perf_counter() - started
+                if self.telemetry:
+                    self.telemetry.finish(saved_record, saved_path)
+
+
+class CapturePipeline:
+    """
+    Etapas da automação depois da captura, fora da thread que captura e navega.
+
+    `analyze(image, path)` roda em uma thread própria, na ordem das capturas, e retorna o caminho
+    final do arquivo (ou None para descartar a captura); em seguida o `writer` codifica e grava.
+    O registro de telemetria da captura, se houver, acompanha a imagem pelas etapas. As duas
+    filas têm tamanho limitado: se as etapas ficarem para trás, `submit` espera.
+    """
+
+    def __init__(self, writer: CaptureWriter,
+                 analyze: Optional[Callable[[Image.Image, str], Optional[str]]] = None,
+                 queue_size: int = CAPTURE_PIPELINE_QUEUE_SIZE):
+        self.writer = writer
+        self.analyze = analyze
+        self.queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self.thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.dropped = 0               # Capturas descartadas pela análise
+        self.analysis_seconds = 0.0    # Tempo total da etapa de análise
+        self.blocked_seconds = 0.0     # Tempo que a automação esperou por vaga na fila
+
+    def start(self):
+        self.writer.start()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Capturas aguardando a análise ou a gravação."""
+        return self.queue.qsize() + self.writer.pending
+
+    def submit(self, image: Image.Image, path: str, image_format: Optional[str] = None,
+               options: Optional[Dict[str, Any]] = None, record: Optional[Dict[str, Any]] = None):
+        """Enfileira uma captura para análise e gravação; espera se a fila estiver cheia."""
+        job = (image, path, image_format, options, record)
+        self.submitted += 1
+        if record is not None:
+            record['queued_at'] = time.perf_counter()
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            started = time.perf_counter()
+            self.queue.put(job)
+            self.blocked_seconds += time.perf_counter() - started
+
+    def close(self, timeout: Optional[float] = None):
+        """Processa as capturas pendentes e encerra as etapas."""
+        if self.thread:
+            self.queue.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+        self.writer.close(timeout)
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            image, path, image_format, options, record = job
+            if record is not None and 'queued_at' in record:
+                # Espera até a análise, incluindo a espera por vaga na fila
+                record['queue'] = time.perf_counter() - record.pop('queued_at')
+            if self.analyze:
+                started = time.perf_counter()
+                try:
+                    path = self.analyze(image, path)
+                except Exception as e:
+                    print(f"Erro ao analisar captura {path}: {e}")
+                elapsed = time.perf_counter() - started
+                self.analysis_seconds += elapsed
+                if record is not None:
+                    record['analysis'] = elapsed
+            if path is None:
+                self.dropped += 1
+                if self.writer.telemetry:
+                    self.writer.telemetry.finish(record)
+                continue
+            # A fila do writer também é limitada: esta etapa espera em vez de acumular imagens
+            self.writer.submit(image, path, image_format, options, record)
@@ -0,0 +1,131 @@
+from typing import List, Optional
+from PIL import Image, ImageChops
+from src.config.config import DUPLICATE_FRAME_HASH_SIZE, DEFAULT_DUPLICATE_FRAME_DISTANCE
+
+# Detecção de capturas repetidas pelo hash de diferença (dHash): a imagem é reduzida a uma
+# grade de (tamanho + 1) x tamanho em tons de cinza e cada bit indica se um pixel é mais claro
+# que o vizinho da direita. Capturas iguais ou quase iguais têm hashes a poucos bits de distância.
+#
+# O dHash é grosseiro: duas páginas de texto que diferem só no número da página (ou em uma linha)
+# podem ter o mesmo hash. Ele serve apenas de pré-filtro barato; antes de descartar uma captura,
+# a comparação é confirmada pixel a pixel (frames_equal).
+
+DUPLICATE_MODES = ("off", "skip", "tag")
+
+
+def difference_hash(image: Image.Image, hash_size: int = DUPLICATE_FRAME_HASH_SIZE) -> int:
+    """Calcula o dHash da imagem em memória."""
+    width, height = image.size
+    # Redução inteira primeiro (rápida), para que a conversão e o filtro final usem poucos pixels
+    factor = max(1, min(width // (hash_size * 8), height // (hash_size * 8)))
+    if factor > 1:
+        image = image.reduce(factor)
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    pixels = small.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(first: int, second: int) -> int:
+    return bin(first ^ second).count("1")
+
+
+def frames_equal(first: Optional[Image.Image], second: Optional[Image.Image]) -> bool:
+    """Verifica se duas imagens são exatamente iguais (mesmo tamanho, modo e pixels)."""
+    if first is None or second is None or first.size != second.size or first.mode != second.mode:
+        return False
+    if first.mode in ('L', 'RGB'):
+        return ImageChops.difference(first, second).getbbox() is None
+    return first.tobytes() == second.tobytes()
+
+
+class DuplicateFrameFilter:
+    """
+    Compara cada captura com a última captura mantida.
+    No modo "skip" as repetidas não são salvas: o hash só pré-seleciona, e a captura é descartada
+    apenas se for idêntica pixel a pixel. No modo "tag" as capturas a até `max_distance` bits
+    (quase iguais) são salvas com o sufixo "_dup", para revisão.
+    """
+
+    def __init__(self, mode: str = "skip", max_distance: int = 2):
+        self.mode = mode if mode in DUPLICATE_MODES else "off"
+        self.max_distance = max(0, int(max_distance))
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def reset(self):
+        """Zera os contadores e esquece a última captura (início de uma nova automação)."""
+        self.last_hash: Optional[int] = None
+        self.last_image: Optional[Image.Image] = None
+        self.checked = 0
+        self.duplicates = 0
+
+    def is_duplicate(self, image: Optional[Image.Image], frame_hash: Optional[int] = None) -> bool:
+        """Verifica se a captura repete a última captura mantida (`frame_hash` evita recalcular o hash)."""
+        if not self.enabled:
+            return False
+        if frame_hash is None:
+            frame_hash = difference_hash(image)
+        self.checked += 1
+        if (self.last_hash is not None and hamming_distance(frame_hash, self.last_hash) <= self.max_distance
+                and (self.mode != "skip" or frames_equal(image, self.last_image))):
+            self.duplicates += 1
+            return True
+        self.last_hash = frame_hash
+        self.last_image = image
+        return False
+
+    def status_text(self) -> str:
+        """Contadores para a linha de status da automação."""
+        if not self.enabled or not self.duplicates:
+            return ""
+        action = "ignoradas" if self.mode == "skip" else "marcadas"
+        return f" - repetidas {action}: {self.duplicates}"
+
+
+class RepeatedFrameStop:
+    """
+    Condição de parada por fim de conteúdo: detecta `repeats` capturas seguidas idênticas à
+    anterior (ex: a última página de um documento, quando a tecla de avançar não muda mais nada).
+    O hash só pré-seleciona; a repetição é confirmada pixel a pixel (páginas que diferem só no
+    número da página têm o mesmo hash). Guarda os caminhos dessas capturas repetidas e o da
+    captura de referência (a primeira da sequência) para que possam ser excluídas ao final.
+    """
+
+    def __init__(self, repeats: int, max_distance: int = DEFAULT_DUPLICATE_FRAME_DISTANCE):
+        self.repeats = max(1, int(repeats))
+        self.max_distance = max(0, int(max_distance))
+        self.reset()
+
+    def reset(self):
+        self.last_hash: Optional[int] = None
+        self.last_image: Optional[Image.Image] = None
+        self.reference_path: Optional[str] = None  # Captura que as repetidas repetem
+        self.trailing_paths: List[str] = []        # Capturas repetidas desde a última mudança
+        self.count = 0
+
+    def update(self, image: Optional[Image.Image], path: Optional[str],
+               frame_hash: Optional[int] = None) -> bool:
+        """Registra uma captura e retorna True quando o limite de repetições foi atingido."""
+        if frame_hash is None:
+            frame_hash = difference_hash(image)
+        if (self.last_hash is not None and hamming_distance(frame_hash, self.last_hash) <= self.max_distance
+                and frames_equal(image, self.last_image)):
+            self.count += 1
+            if path:
+                self.trailing_paths.append(path)
+        else:
+            self.count = 0
+            self.reference_path = path
+            self.trailing_paths = []
+        self.last_hash = frame_hash
+        self.last_image = image
+        return self.count >= self.repeats
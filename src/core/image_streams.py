@@ -0,0 +1,181 @@
+import struct
+from typing import Any, Dict, Optional
+
+# Leitura de arquivos de imagem já comprimidos para embuti-los no PDF sem decodificar.
+# Cada função retorna o mesmo dicionário usado por PDFGenerator (largura, altura,
+# espaço de cor, bits, filtro e dados) ou None quando o arquivo precisa ser recodificado.
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Tipos de cor do PNG que podem ser copiados diretamente: 0 = cinza, 2 = RGB, 3 = paleta
+PNG_PASSTHROUGH_COLORS = {0: 1, 2: 3, 3: 1}
+
+# Marcadores SOF do JPEG suportados pelo filtro DCTDecode: baseline, estendido e progressivo
+JPEG_DCT_SOF_MARKERS = {0xC0, 0xC1, 0xC2}
+# Demais SOF (lossless, hierárquico, aritmético) exigem recodificação
+JPEG_OTHER_SOF_MARKERS = {0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_COLOR_SPACES = {1: "/DeviceGray", 3: "/DeviceRGB", 4: "/DeviceCMYK"}
+
+
+def scale_to_8bit(img):
+    """
+    Reduz imagens de 16 bits em tons de cinza (modos I;16 e I do Pillow) para 8 bits (modo L).
+    O `convert('L')` ou `convert('RGB')` do Pillow corta os valores acima de 255 em vez de
+    escalá-los, e a imagem sairia quase toda branca. Outros modos são devolvidos sem alteração.
+    """
+    if img.mode == 'I' or img.mode.startswith('I;16'):
+        return img.convert('I').point(lambda value: value / 256).convert('L')
+    return img
+
+
+def read_png_stream(img_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Extrai os dados IDAT de um PNG para uso direto como stream FlateDecode.
+
+    O PDF entende os filtros de linha do PNG através do Predictor 15, então os dados
+    comprimidos podem ser copiados byte a byte. Retorna None para PNGs entrelaçados,
+    com canal alfa, com transparência (tRNS), com 16 bits por componente ou incompletos.
+    """
+    with open(img_path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+
+    header = None
+    palette = None
+    idat_parts = []
+    complete = False
+    pos = len(PNG_SIGNATURE)
+
+    while pos + 8 <= len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        chunk_start = pos + 8
+        chunk_end = chunk_start + length
+        if chunk_end + 4 > len(data):
+            return None  # Arquivo truncado
+        chunk = data[chunk_start:chunk_end]
+
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif chunk_type == b"PLTE":
+            palette = chunk
+        elif chunk_type == b"tRNS":
+            return None
+        elif chunk_type == b"IDAT":
+            idat_parts.append(chunk)
+        elif chunk_type == b"IEND":
+            complete = True
+            break
+
+        pos = chunk_end + 4  # Pula o CRC
+
+    if not header or not idat_parts or not complete:
+        return None
+
+    width, height, bits, color_type, _compression, _filter, interlace = header
+    if interlace != 0 or color_type not in PNG_PASSTHROUGH_COLORS:
+        return None
+    if bits == 16:
+        return None  # 16 bits por componente só existe a partir do PDF 1.5 (o writer gera 1.4)
+
+    idat = b"".join(idat_parts)
+    if not is_valid_zlib_stream(idat):
+        return None
+
+    colors = PNG_PASSTHROUGH_COLORS[color_type]
+    if color_type == 0:
+        color_space: Any = "/DeviceGray"
+    elif color_type == 2:
+        if bits != 8:
+            return None
+        color_space = "/DeviceRGB"
+    else:
+        if not palette or bits not in (1, 2, 4, 8):
+            return None
+        entries = len(palette) // 3
+        color_space = ["/Indexed", "/DeviceRGB", entries - 1, f"<{palette[:entries * 3].hex()}>"]
+
+    return {
+        'width': width,
+        'height': height,
+        'color_space': color_space,
+        'bits': bits,
+        'filter': 'FlateDecode',
+        'decode_parms': {
+            'Predictor': 15,
+            'Colors': colors,
+            'BitsPerComponent': bits,
+            'Columns': width,
+        },
+        'data': idat,
+    }
+
+
+def read_jpeg_stream(img_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lê apenas os cabeçalhos de um JPEG para embuti-lo como stream DCTDecode.
+
+    O arquivo é copiado byte a byte; dimensões e espaço de cor vêm do segmento SOF.
+    Retorna None para JPEGs sem suporte no PDF (lossless, aritméticos, 12 bits).
+    """
+    with open(img_path, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(b"\xff\xd8"):
+        return None
+
+    adobe = False
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+
+        # Marcadores sem segmento (preenchimento, RSTn)
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        segment = data[pos + 4:pos + 2 + length]
+
+        if marker == 0xEE and segment.startswith(b"Adobe"):
+            adobe = True
+        elif marker in JPEG_DCT_SOF_MARKERS:
+            if len(segment) < 6:
+                return None
+            bits, height, width, components = struct.unpack(">BHHB", segment[:6])
+            if bits != 8 or components not in JPEG_COLOR_SPACES or not width or not height:
+                return None
+
+            prepared: Dict[str, Any] = {
+                'width': width,
+                'height': height,
+                'color_space': JPEG_COLOR_SPACES[components],
+                'bits': 8,
+                'filter': 'DCTDecode',
+                'data': data,
+            }
+            # JPEGs CMYK do Photoshop (marcador Adobe) são gravados com valores invertidos
+            if components == 4 and adobe:
+                prepared['decode'] = [1, 0, 1, 0, 1, 0, 1, 0]
+            return prepared
+        elif marker in JPEG_OTHER_SOF_MARKERS or marker == 0xDA:
+            # Formato sem suporte ou início dos dados sem SOF compatível
+            return None
+
+        pos += 2 + length
+
+    return None
+
+
+def is_valid_zlib_stream(data: bytes) -> bool:
+    """Verifica rapidamente se os dados começam com um cabeçalho zlib válido."""
+    if len(data) < 2:
+        return False
+    cmf, flg = data[0], data[1]
+    return (cmf & 0x0F) == 8 and ((cmf << 8) | flg) % 31 == 0
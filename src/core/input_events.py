@@ -0,0 +1,182 @@
+import sys
+import threading
+import time
+import keyboard
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+# Serviço central de teclado: um único hook global (keyboard.hook) para o programa inteiro e uma
+# tabela de despacho com os atalhos e teclas registrados. Cada tecla pressionada custa uma busca
+# na tabela, não importa quantas automações já rodaram; quem registra um handler recebe um
+# identificador e o remove com `unregister` ao terminar.
+
+# Nomes equivalentes das teclas (o lado do modificador não importa nos atalhos)
+_KEY_ALIASES = {
+    "left ctrl": "ctrl", "right ctrl": "ctrl", "control": "ctrl",
+    "left shift": "shift", "right shift": "shift",
+    "left alt": "alt", "right alt": "alt",
+    "left windows": "windows", "right windows": "windows", "win": "windows", "command": "windows",
+    "escape": "esc", "return": "enter", "del": "delete",
+}
+
+
+if sys.platform == "win32":
+    import ctypes
+
+    _user32 = ctypes.windll.user32
+    _MAPVK_VSC_TO_VK = 1  # Sem distinguir o lado: Ctrl, Shift e Alt viram VK_CONTROL etc.
+
+    def _key_is_down(scan_code: int) -> bool:
+        """Estado real da tecla (GetAsyncKeyState), para descartar teclas cuja soltura se perdeu."""
+        vk = _user32.MapVirtualKeyW(scan_code, _MAPVK_VSC_TO_VK)
+        return not vk or bool(_user32.GetAsyncKeyState(vk) & 0x8000)
+else:
+    def _key_is_down(scan_code: int) -> bool:
+        return True  # Sem como consultar o estado: confia nos eventos
+
+
+def normalize_key(name: Optional[str]) -> str:
+    """Nome da tecla em minúsculas, com os aliases de _KEY_ALIASES resolvidos."""
+    name = (name or "").strip().lower()
+    return _KEY_ALIASES.get(name, name)
+
+
+def parse_hotkey(hotkey: str) -> FrozenSet[str]:
+    """Converte um atalho como "ctrl+shift+s" no conjunto de teclas que precisam estar pressionadas."""
+    keys = frozenset(normalize_key(part) for part in hotkey.split('+') if part.strip())
+    if not keys:
+        raise ValueError(f"Atalho inválido: '{hotkey}'")
+    return keys
+
+
+class InputEventService:
+    """
+    Despacha os eventos do teclado para os handlers registrados.
+
+    - `register_hotkey("ctrl+shift+s", callback)`: chamado quando exatamente essas teclas estão
+      pressionadas (como keyboard.add_hotkey).
+    - `register_key("esc", callback)`: chamado quando a tecla é pressionada, com ou sem
+      modificadores (teclas de parada).
+
+    O hook é instalado no primeiro registro e removido quando a tabela fica vazia. Os handlers
+    rodam na thread do hook; devem ser rápidos e não tocar em estado da interface (agendar o
+    trabalho com `root.after`, por exemplo).
+
+    As teclas pressionadas são acompanhadas pelos eventos. Se a soltura de uma tecla se perde
+    (troca de foco, tela de bloqueio), a tecla ficaria "presa" e os atalhos deixariam de
+    disparar; por isso, a cada tecla pressionada, as demais são conferidas com o estado real
+    do teclado (no Windows) e o conjunto é zerado sempre que o hook é instalado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hook = None
+        self._next_id = 1
+        self._hotkeys: Dict[FrozenSet[str], Dict[int, Callable[[], None]]] = {}
+        self._keys: Dict[str, Dict[int, Callable[[], None]]] = {}
+        self._handles: Dict[int, Tuple[str, object]] = {}
+        self._pressed: Dict[str, int] = {}  # Teclas pressionadas -> scan code
+        self.events = 0              # Teclas pressionadas despachadas
+        self.dispatch_seconds = 0.0  # Tempo total de despacho (busca + handlers)
+
+    @property
+    def active_handlers(self) -> int:
+        """Handlers registrados no momento."""
+        return len(self._handles)
+
+    @property
+    def hooked(self) -> bool:
+        return self._hook is not None
+
+    def register_hotkey(self, hotkey: str, callback: Callable[[], None]) -> int:
+        """Registra um atalho e retorna o identificador para `unregister`."""
+        return self._register("hotkey", parse_hotkey(hotkey), callback)
+
+    def register_key(self, key: str, callback: Callable[[], None]) -> int:
+        """Registra uma tecla (qualquer combinação de modificadores) e retorna o identificador."""
+        return self._register("key", normalize_key(key), callback)
+
+    def unregister(self, handle: Optional[int]):
+        """Remove um handler; identificadores já removidos ou None são ignorados."""
+        if handle is None:
+            return
+        with self._lock:
+            entry = self._handles.pop(handle, None)
+            if entry is None:
+                return
+            kind, trigger = entry
+            table = self._hotkeys if kind == "hotkey" else self._keys
+            handlers = table.get(trigger, {})
+            handlers.pop(handle, None)
+            if not handlers:
+                table.pop(trigger, None)
+            if not self._handles:
+                self._remove_hook()
+
+    def stats(self) -> Dict[str, float]:
+        """Dados para o diagnóstico: handlers ativos, eventos e tempo médio de despacho."""
+        return {
+            'active_handlers': self.active_handlers,
+            'hooked': self.hooked,
+            'events': self.events,
+            'dispatch_mean_us': self.dispatch_seconds * 1e6 / self.events if self.events else 0.0,
+        }
+
+    def _register(self, kind: str, trigger, callback: Callable[[], None]) -> int:
+        with self._lock:
+            handle = self._next_id
+            self._next_id += 1
+            table = self._hotkeys if kind == "hotkey" else self._keys
+            table.setdefault(trigger, {})[handle] = callback
+            self._handles[handle] = (kind, trigger)
+            if self._hook is None:
+                self._pressed.clear()
+                self._hook = keyboard.hook(self._on_event)
+        return handle
+
+    def _remove_hook(self):
+        # Chamado com o lock
+        if self._hook is not None:
+            try:
+                keyboard.unhook(self._hook)
+            except (KeyError, ValueError):
+                pass
+            self._hook = None
+            self._pressed.clear()
+
+    def _on_event(self, event):
+        name = normalize_key(event.name)
+        if not name:
+            return
+        if event.event_type == keyboard.KEY_UP:
+            self._pressed.pop(name, None)
+            return
+        # Teclas cuja soltura não chegou (presas no conjunto, mas já soltas no teclado)
+        for other, scan_code in list(self._pressed.items()):
+            if other != name and not _key_is_down(scan_code):
+                del self._pressed[other]
+        if name in self._pressed:
+            return  # Repetição automática da tecla segurada
+        self._pressed[name] = event.scan_code
+
+        started = time.perf_counter()
+        with self._lock:
+            callbacks = list(self._keys.get(name, {}).values())
+            callbacks += self._hotkeys.get(frozenset(self._pressed), {}).values()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro no atalho de teclado '{name}': {e}")
+        self.events += 1
+        self.dispatch_seconds += time.perf_counter() - started
+
+
+_service: Optional[InputEventService] = None
+
+
+def get_input_service() -> InputEventService:
+    """Serviço de teclado compartilhado pelo programa (um único hook)."""
+    global _service
+    if _service is None:
+        _service = InputEventService()
+    return _service
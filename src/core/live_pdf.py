@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from src.config.config import PDF_LIVE_CHECKPOINT_SECONDS, PDF_LIVE_CHECKPOINT_PAGES
+from src.core.pdf_engines import NativePDFEngine
+from src.core.pdf_generator import PDFGenerator, _prepare_image
+from src.core.pdf_manifest import page_entry, remove_manifest
+
+
+class LivePDFSink:
+    """
+    Monta o PDF durante a automação. Cada captura é preparada e gravada por uma thread em
+    segundo plano assim que é salva.
+
+    A cada checkpoint o arquivo recebe a árvore de páginas, a tabela xref e o trailer
+    (atualização incremental), então uma interrupção deixa um PDF legível com as páginas
+    gravadas até o último checkpoint. O manifesto da sessão também é atualizado, e
+    "Gerar PDF" depois da automação apenas acrescenta o que estiver faltando.
+    """
+
+    def __init__(self, output_pdf: str, session_dir: str, generator: Optional[PDFGenerator] = None,
+                 checkpoint_seconds: float = PDF_LIVE_CHECKPOINT_SECONDS,
+                 checkpoint_pages: int = PDF_LIVE_CHECKPOINT_PAGES):
+        self.output_pdf = output_pdf
+        self.session_dir = session_dir
+        self.generator = generator or PDFGenerator()
+        self.checkpoint_seconds = checkpoint_seconds
+        self.checkpoint_pages = max(1, checkpoint_pages)
+        self.queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.pages_written = 0
+        self.failed: List[str] = []
+        self.error: Optional[Exception] = None
+
+    def start(self):
+        """Cria o arquivo e inicia a thread de gravação."""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, img_path: str):
+        """Enfileira uma captura recém-salva."""
+        self.queue.put(img_path)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Grava as capturas pendentes, finaliza o PDF e aguarda a thread terminar."""
+        if not self.thread:
+            return False
+        self.queue.put(None)
+        self.thread.join(timeout)
+        return self.error is None and self.pages_written > 0
+
+    def _run(self):
+        generator = self.generator
+        engine = NativePDFEngine(generator._page_layout, generator.dpi,
+                                 deduplicate_images=generator.deduplicate_images)
+        profile = generator._profile_settings()
+        entries: List[Dict[str, Any]] = []
+        previous_key = None
+        pending = 0
+        last_checkpoint = time.monotonic()
+
+        try:
+            engine.open(self.output_pdf)
+            while True:
+                # Sem páginas pendentes, espera indefinidamente; com páginas, até o próximo checkpoint
+                timeout = None
+                if pending:
+                    timeout = max(0.0, last_checkpoint + self.checkpoint_seconds - time.monotonic())
+                try:
+                    img_path = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    img_path = ""
+                if img_path is None:
+                    break
+
+                if img_path:
+                    try:
+                        prepared = _prepare_image(img_path, profile, generator.dpi)
+                        page_key = (prepared['hash'], "[]")
+                        if generator.drop_duplicate_pages and page_key == previous_key:
+                            engine.stats['pages_dropped'] += 1
+                        else:
+                            engine.add_page({'source': img_path, 'path': img_path,
+                                             'annotations': [], 'prepared': prepared})
+                            self.pages_written += 1
+                        previous_key = page_key
+                        entries.append(page_entry(img_path, None))
+                        pending += 1
+                    except Exception as e:
+                        self.failed.append(img_path)
+                        print(f"PDF ao vivo: erro ao adicionar {img_path}: {e}")
+
+                if pending and (pending >= self.checkpoint_pages
+                                or time.monotonic() - last_checkpoint >= self.checkpoint_seconds):
+                    self._checkpoint(engine, entries, previous_key)
+                    pending = 0
+                    last_checkpoint = time.monotonic()
+
+            if not self.pages_written:
+                engine.abort()
+                return
+            self._checkpoint(engine, entries, previous_key, reopen=False)
+            print(f"PDF ao vivo finalizado: {self.output_pdf} ({self.pages_written} páginas)")
+        except Exception as e:
+            self.error = e
+            print(f"Erro no PDF ao vivo: {e}")
+            # Numa atualização incremental o arquivo volta ao último checkpoint
+            if hasattr(engine, 'writer') and not engine.writer.closed:
+                engine.abort()
+
+    def _checkpoint(self, engine: NativePDFEngine, entries: List[Dict[str, Any]],
+                    previous_key, reopen: bool = True):
+        """Finaliza o arquivo em disco e, se `reopen`, continua com uma nova atualização incremental."""
+        engine.close()
+        if self.failed:
+            # Capturas com erro ficaram de fora; "Gerar PDF" deve gerar o arquivo completo
+            remove_manifest(self.session_dir)
+        else:
+            self.generator.write_manifest(self.session_dir, self.output_pdf, entries, engine, previous_key)
+        if reopen:
+            engine.open_append(self.output_pdf, engine.append_state())
+
+    @staticmethod
+    def default_output(session_dir: str) -> str:
+        """Mesmo padrão de nome usado por "Gerar PDF"."""
+        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+        return os.path.join(session_dir, f"PDF Maker_{timestamp}.pdf")
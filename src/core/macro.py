@@ -0,0 +1,138 @@
+import threading
+import time
+import keyboard
+from typing import Callable, List, Optional, Tuple
+from src.config.config import MACRO_KEY_INTERVAL
+
+# Macro da ação entre capturas: um passo por linha, executados em ordem.
+#
+#   key ctrl+pagedown      atalho (teclas pressionadas juntas)
+#   keys down down tab     sequência de teclas (MACRO_KEY_INTERVAL segundos entre elas)
+#   wait 0.5               espera, em segundos
+#   click 120 340          clique esquerdo (também doubleclick e rightclick)
+#   scroll -5              rolagem do mouse (negativo = para baixo), opcionalmente em "x y"
+#
+# As coordenadas são relativas ao canto superior esquerdo da área capturada (ou da janela
+# capturada; na tela inteira, da tela). Qualquer passo aceita "delay=<segundos>" no fim: a
+# espera depois dele. Linhas vazias e linhas começando com # são ignoradas.
+
+Origin = Tuple[int, int]
+Action = Callable[[Origin], None]
+
+_MOUSE_BUTTONS = {"click": ("left", 1), "doubleclick": ("left", 2), "rightclick": ("right", 1)}
+
+
+class MacroError(ValueError):
+    """Erro na macro, com o número da linha."""
+
+
+def _key_action(hotkey: str) -> Action:
+    return lambda origin: keyboard.press_and_release(hotkey)
+
+
+def _click_action(x: int, y: int, button: str, clicks: int) -> Action:
+    def run(origin: Origin):
+        import pyautogui
+        pyautogui.click(origin[0] + x, origin[1] + y, clicks=clicks, button=button, _pause=False)
+    return run
+
+
+def _scroll_action(amount: int, point: Optional[Tuple[int, int]]) -> Action:
+    def run(origin: Origin):
+        import pyautogui
+        if point:
+            pyautogui.scroll(amount, x=origin[0] + point[0], y=origin[1] + point[1], _pause=False)
+        else:
+            pyautogui.scroll(amount, _pause=False)
+    return run
+
+
+class Macro:
+    """
+    Macro compilada: cada ação tem um horário fixo, em segundos a partir do início da execução.
+    O tempo que uma ação leva conta na espera seguinte, então a macro dura o mesmo a cada captura.
+    """
+
+    def __init__(self, source: str, actions: List[Tuple[float, Action]], duration: float):
+        self.source = source
+        self.actions = actions
+        self.duration = duration
+        self.last_lateness = 0.0  # Maior atraso de uma ação na última execução (s)
+
+    def run(self, origin: Origin = (0, 0), stop_event: Optional[threading.Event] = None) -> bool:
+        """Executa a macro. Retorna False se `stop_event` for acionado durante uma espera."""
+        stop_event = stop_event or threading.Event()
+        start = time.monotonic()
+        self.last_lateness = 0.0
+        for offset, action in self.actions:
+            remaining = start + offset - time.monotonic()
+            if remaining > 0:
+                if stop_event.wait(remaining):
+                    return False
+            else:
+                self.last_lateness = max(self.last_lateness, -remaining)
+            action(origin)
+        remaining = start + self.duration - time.monotonic()
+        return not (remaining > 0 and stop_event.wait(remaining))
+
+
+def _number(value: str, line: int, cast=float):
+    try:
+        return cast(value)
+    except ValueError:
+        raise MacroError(f"Linha {line}: número inválido '{value}'")
+
+
+def compile_macro(source: str) -> Macro:
+    """Valida o texto da macro e monta a lista de ações com seus horários."""
+    actions: List[Tuple[float, Action]] = []
+    offset = 0.0
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        words = line.split()
+        if not words or words[0].startswith('#'):
+            continue
+        command, args = words[0].lower(), words[1:]
+
+        delay = 0.0
+        if args and args[-1].lower().startswith("delay="):
+            delay = _number(args.pop()[6:], line_number)
+        if delay < 0:
+            raise MacroError(f"Linha {line_number}: delay não pode ser negativo")
+
+        if command == "key":
+            if len(args) != 1:
+                raise MacroError(f"Linha {line_number}: use 'key <atalho>', ex: key ctrl+pagedown")
+            actions.append((offset, _key_action(args[0])))
+        elif command == "keys":
+            if not args:
+                raise MacroError(f"Linha {line_number}: use 'keys <tecla> <tecla> ...'")
+            for index, key in enumerate(args):
+                if index:
+                    offset += MACRO_KEY_INTERVAL
+                actions.append((offset, _key_action(key)))
+        elif command == "wait":
+            if len(args) != 1:
+                raise MacroError(f"Linha {line_number}: use 'wait <segundos>'")
+            seconds = _number(args[0], line_number)
+            if seconds < 0:
+                raise MacroError(f"Linha {line_number}: a espera não pode ser negativa")
+            offset += seconds
+        elif command in _MOUSE_BUTTONS:
+            if len(args) != 2:
+                raise MacroError(f"Linha {line_number}: use '{command} <x> <y>'")
+            button, clicks = _MOUSE_BUTTONS[command]
+            x, y = (_number(value, line_number, int) for value in args)
+            actions.append((offset, _click_action(x, y, button, clicks)))
+        elif command == "scroll":
+            if len(args) not in (1, 3):
+                raise MacroError(f"Linha {line_number}: use 'scroll <quantidade>' ou 'scroll <quantidade> <x> <y>'")
+            amount = _number(args[0], line_number, int)
+            point = tuple(_number(value, line_number, int) for value in args[1:]) or None
+            actions.append((offset, _scroll_action(amount, point)))
+        else:
+            raise MacroError(f"Linha {line_number}: comando desconhecido '{words[0]}'")
+        offset += delay
+
+    if not actions:
+        raise MacroError("A macro não tem nenhuma ação")
+    return Macro(source, actions, offset)
@@ -0,0 +1,171 @@
+import math
+from typing import Any, Dict, List, Tuple
+from PIL import ImageColor
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from src.core.pdf_writer import pdf_number
+
+# Converte as anotações salvas pelo editor (JSON em coordenadas de pixel da imagem)
+# em operadores vetoriais do PDF, desenhados sobre a imagem original.
+
+# Fontes padrão do PDF (não precisam ser embutidas) usadas no lugar das fontes do sistema
+PDF_STANDARD_FONTS = {
+    'times': 'Times-Roman',
+    'times new roman': 'Times-Roman',
+    'georgia': 'Times-Roman',
+    'courier': 'Courier',
+    'courier new': 'Courier',
+    'consolas': 'Courier',
+}
+DEFAULT_PDF_FONT = 'Helvetica'
+
+# Proporções aproximadas das fontes sans-serif usadas pelo Pillow (ascendente e altura de linha)
+TEXT_ASCENT = 0.905
+TEXT_LINE_HEIGHT = 1.15
+# Espaçamento extra entre linhas usado pelo Pillow em textos com várias linhas (pixels)
+TEXT_LINE_SPACING = 4
+
+DEFAULT_COLOR = (255, 0, 0)
+
+
+def pdf_font_for(font_family: str) -> str:
+    """Retorna a fonte padrão do PDF mais próxima da família informada."""
+    return PDF_STANDARD_FONTS.get((font_family or '').strip().lower(), DEFAULT_PDF_FONT)
+
+
+def _color(value: Any) -> str:
+    """Converte uma cor do editor (#RRGGBB ou nome) para componentes RGB do PDF."""
+    try:
+        rgb = ImageColor.getrgb(value)[:3]
+    except (ValueError, TypeError, AttributeError):
+        rgb = DEFAULT_COLOR
+    return " ".join(pdf_number(round(c / 255.0, 4)) for c in rgb)
+
+
+def _pdf_text(text: str) -> str:
+    """Codifica o texto em WinAnsi (cp1252) como string literal do PDF, preservando acentos."""
+    raw = text.encode('cp1252', errors='replace')
+    escaped = []
+    for byte in raw:
+        char = chr(byte)
+        if char in '()\\':
+            escaped.append('\\' + char)
+        elif byte < 32 or byte > 126:
+            escaped.append(f"\\{byte:03o}")
+        else:
+            escaped.append(char)
+    return "(" + "".join(escaped) + ")"
+
+
+def _wrap_lines(text: str, font: str, size: float, max_width: float) -> List[str]:
+    """Quebra o texto nas linhas explícitas e, se houver largura máxima, por palavras."""
+    lines = []
+    for paragraph in text.split('\n'):
+        if not max_width:
+            lines.append(paragraph)
+            continue
+        current = ""
+        for word in paragraph.split(' '):
+            candidate = f"{current} {word}" if current else word
+            if current and stringWidth(candidate, font, size) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+    return lines
+
+
+def _line_ops(props: Dict[str, Any]) -> List[str]:
+    x1, y1 = props.get('x1', 0), props.get('y1', 0)
+    x2, y2 = props.get('x2', 0), props.get('y2', 0)
+    return [
+        f"{_color(props.get('color', 'red'))} RG {pdf_number(props.get('width', 2))} w",
+        f"{pdf_number(x1)} {pdf_number(y1)} m {pdf_number(x2)} {pdf_number(y2)} l S",
+    ]
+
+
+def _arrow_head_ops(props: Dict[str, Any]) -> List[str]:
+    """Gera o triângulo da ponta da seta, com as mesmas proporções do AnnotationManager."""
+    x1, y1 = props.get('x1', 0), props.get('y1', 0)
+    x2, y2 = props.get('x2', 0), props.get('y2', 0)
+    width = props.get('width', 2)
+
+    angle = math.atan2(y2 - y1, x2 - x1)
+    arrow_size = width * 4
+    p1 = (x2 - arrow_size * math.cos(angle - math.pi / 6), y2 - arrow_size * math.sin(angle - math.pi / 6))
+    p2 = (x2 - arrow_size * math.cos(angle + math.pi / 6), y2 - arrow_size * math.sin(angle + math.pi / 6))
+
+    return [
+        f"{_color(props.get('color', 'red'))} rg",
+        f"{pdf_number(x2)} {pdf_number(y2)} m {pdf_number(p1[0])} {pdf_number(p1[1])} l "
+        f"{pdf_number(p2[0])} {pdf_number(p2[1])} l h f",
+    ]
+
+
+def _rect_ops(props: Dict[str, Any]) -> List[str]:
+    x1, x2 = sorted((props.get('x1', 0), props.get('x2', 0)))
+    y1, y2 = sorted((props.get('y1', 0), props.get('y2', 0)))
+    return [
+        f"{_color(props.get('color', 'red'))} RG {pdf_number(props.get('width', 2))} w",
+        f"{pdf_number(x1)} {pdf_number(y1)} {pdf_number(x2 - x1)} {pdf_number(y2 - y1)} re S",
+    ]
+
+
+def _text_ops(props: Dict[str, Any], font_resources: Dict[str, str]) -> List[str]:
+    text = props.get('text', '')
+    if not text:
+        return []
+
+    font = pdf_font_for(props.get('font_family', 'Arial'))
+    resource = font_resources.setdefault(font, f"F{len(font_resources) + 1}")
+    size = float(props.get('font_size', 12))
+    line_height = size * TEXT_LINE_HEIGHT + TEXT_LINE_SPACING
+
+    x = props.get('x', 0)
+    baseline = props.get('y', 0) + size * TEXT_ASCENT
+    ops = [f"BT /{resource} {pdf_number(size)} Tf {_color(props.get('color', 'red'))} rg"]
+    for index, line in enumerate(_wrap_lines(text, font, size, props.get('width'))):
+        # A matriz de texto desfaz a inversão do eixo Y usada para as coordenadas em pixels
+        ops.append(f"1 0 0 -1 {pdf_number(x)} {pdf_number(baseline + index * line_height)} Tm "
+                   f"{_pdf_text(line)} Tj")
+    ops.append("ET")
+    return ops
+
+
+def annotation_operators(annotations: List[Dict[str, Any]], image_size: Tuple[int, int],
+                         origin: Tuple[float, float], scale: float) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Converte as anotações em operadores de conteúdo do PDF.
+
+    As coordenadas das anotações estão em pixels da imagem (origem no canto superior
+    esquerdo); a transformação inicial posiciona esse sistema sobre a imagem na página.
+    Retorna os operadores e o mapa {fonte padrão: nome do recurso} usado no texto.
+    """
+    img_width, img_height = image_size
+    x0, y0 = origin
+    font_resources: Dict[str, str] = {}
+
+    ops = [
+        "q",
+        f"{pdf_number(scale)} 0 0 {pdf_number(-scale)} {pdf_number(x0)} {pdf_number(y0 + img_height * scale)} cm",
+        # Recorta na área da imagem, como acontece ao desenhar sobre o bitmap
+        f"0 0 {img_width} {img_height} re W n",
+    ]
+    for annotation in annotations:
+        annotation_type = annotation.get('type')
+        props = annotation.get('properties', {})
+        try:
+            if annotation_type == "text":
+                ops.extend(_text_ops(props, font_resources))
+            elif annotation_type == "arrow":
+                ops.extend(_line_ops(props))
+                ops.extend(_arrow_head_ops(props))
+            elif annotation_type == "rect":
+                ops.extend(_rect_ops(props))
+            elif annotation_type == "line":
+                ops.extend(_line_ops(props))
+        except Exception as e:
+            print(f"Erro ao converter anotação '{annotation_type}' para o PDF: {e}")
+    ops.append("Q")
+
+    return "\n".join(ops).encode('latin-1'), font_resources
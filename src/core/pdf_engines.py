@@ -0,0 +1,311 @@
+import hashlib
+import io
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.core.pdf_writer import PDFStreamWriter, pdf_number, pdf_value
+from src.core.pdf_annotations import annotation_operators
+from src.core.image_streams import scale_to_8bit
+
+# Motores de escrita usados pelo PDFGenerator. O gerador resolve as páginas (anotações,
+# preparo das imagens, páginas repetidas) e entrega cada uma ao motor selecionado.
+
+# (largura da página, altura da página, largura da imagem, altura da imagem) em pontos
+PageLayout = Callable[[int, int], Tuple[float, float, float, float]]
+
+
+class PDFEngine:
+    """Interface comum dos motores de escrita do PDF."""
+    name = ""
+    # O PDFGenerator entrega streams prontos (page['prepared']) preparados em paralelo
+    uses_prepared_images = False
+    # As anotações são entregues em page['annotations'] para desenho vetorial;
+    # caso contrário, page['path'] aponta para a imagem já renderizada com as anotações
+    supports_vector_annotations = False
+    # Pode acrescentar páginas a um PDF gravado anteriormente (atualização incremental)
+    supports_append = False
+
+    def __init__(self, page_layout: PageLayout, dpi: int, deduplicate_images: bool = True):
+        self.page_layout = page_layout
+        self.dpi = dpi
+        self.deduplicate_images = deduplicate_images
+        self.stats: Dict[str, int] = {}
+
+    def _reset_stats(self):
+        self.stats = {
+            'pages': 0,
+            'images_embedded': 0,
+            'images_reused': 0,
+            'pages_dropped': 0,
+            'bytes_saved': 0,
+        }
+
+    def open(self, output_pdf: str):
+        """Inicia um novo documento."""
+        raise NotImplementedError
+
+    def open_append(self, output_pdf: str, state: Dict[str, Any]):
+        """Reabre um documento gravado por este motor para acrescentar páginas."""
+        raise NotImplementedError
+
+    def append_state(self) -> Dict[str, Any]:
+        """Estado a guardar no manifesto para acrescentar páginas depois do `close()`."""
+        raise NotImplementedError
+
+    def add_page(self, page: Dict[str, Any]):
+        """Adiciona uma página. Deve lançar uma exceção se a imagem não puder ser usada."""
+        raise NotImplementedError
+
+    def close(self):
+        """Finaliza e grava o documento."""
+        raise NotImplementedError
+
+    def abort(self):
+        """Descarta o documento em andamento, removendo a saída parcial."""
+        raise NotImplementedError
+
+    def _centered(self, width_px: int, height_px: int) -> Tuple[float, float, float, float, float, float]:
+        """Retorna o layout da página com a posição (x, y) da imagem centralizada."""
+        page_width, page_height, img_width_pt, img_height_pt = self.page_layout(width_px, height_px)
+        x = (page_width - img_width_pt) / 2
+        y = (page_height - img_height_pt) / 2
+        return page_width, page_height, img_width_pt, img_height_pt, x, y
+
+
+class NativePDFEngine(PDFEngine):
+    """
+    Motor próprio baseado no PDFStreamWriter: grava cada página assim que recebida,
+    copia streams PNG/JPEG sem recompressão e desenha anotações como vetores.
+    """
+    name = "native"
+    uses_prepared_images = True
+    supports_vector_annotations = True
+    supports_append = True
+
+    def open(self, output_pdf: str):
+        self._reset_stats()
+        self.writer = PDFStreamWriter(output_pdf)
+        # Objetos compartilhados entre páginas: imagens (hash -> XObject) e fontes (nome -> objeto)
+        self.image_objects: Dict[str, int] = {}
+        self.font_objects: Dict[str, int] = {}
+
+    def open_append(self, output_pdf: str, state: Dict[str, Any]):
+        """Continua o arquivo com uma atualização incremental, reaproveitando imagens e fontes já gravadas."""
+        self._reset_stats()
+        self.writer = PDFStreamWriter(output_pdf, append_state=state['writer'])
+        self.image_objects = dict(state.get('image_objects', {}))
+        self.font_objects = dict(state.get('font_objects', {}))
+
+    def append_state(self) -> Dict[str, Any]:
+        return {
+            'writer': self.writer.state(),
+            'image_objects': self.image_objects,
+            'font_objects': self.font_objects,
+        }
+
+    def add_page(self, page: Dict[str, Any]):
+        """
+        Escreve uma página com a imagem preparada centralizada, reaproveitando imagens repetidas.
+        As anotações, se houver, são desenhadas como vetores e texto sobre a imagem.
+        """
+        prepared = page['prepared']
+        # Imagens reduzidas pelo perfil de saída ocupam o espaço da imagem original
+        display_size = prepared.get('display_size', (prepared['width'], prepared['height']))
+        page_width, page_height, img_width_pt, img_height_pt, x, y = self._centered(*display_size)
+
+        image_hash = prepared.get('hash')
+        image_obj = self.image_objects.get(image_hash) if self.deduplicate_images and image_hash else None
+        if image_obj:
+            self.stats['images_reused'] += 1
+            self.stats['bytes_saved'] += len(prepared['data'])
+        else:
+            image_obj = self.writer.add_image(
+                prepared['width'], prepared['height'],
+                prepared['color_space'], prepared['bits'], prepared['data'],
+                filter_name=prepared.get('filter'),
+                decode_parms=prepared.get('decode_parms'),
+                extra={'Decode': prepared['decode']} if prepared.get('decode') else None
+            )
+            self.stats['images_embedded'] += 1
+            if self.deduplicate_images and image_hash:
+                self.image_objects[image_hash] = image_obj
+
+        # Desenha a imagem centralizada
+        content = (f"q {pdf_number(img_width_pt)} 0 0 {pdf_number(img_height_pt)} "
+                   f"{pdf_number(x)} {pdf_number(y)} cm /Im0 Do Q").encode('latin-1')
+
+        page_fonts: Dict[str, int] = {}
+        if page.get('annotations'):
+            overlay, font_names = annotation_operators(
+                page['annotations'], display_size, (x, y), 72.0 / self.dpi)
+            content += b"\n" + overlay
+            for font_name, resource_name in font_names.items():
+                page_fonts[resource_name] = self._font_object(font_name)
+
+        self.writer.add_page(page_width, page_height, content, xobjects={'Im0': image_obj},
+                             fonts=page_fonts)
+        self.stats['pages'] += 1
+
+    def _font_object(self, font_name: str) -> int:
+        """Retorna o objeto de uma fonte padrão do PDF, gravando-o na primeira vez que é usada."""
+        if font_name not in self.font_objects:
+            self.font_objects[font_name] = self.writer.add_object(pdf_value({
+                'Type': "/Font",
+                'Subtype': "/Type1",
+                'BaseFont': f"/{font_name}",
+                'Encoding': "/WinAnsiEncoding",
+            }))
+        return self.font_objects[font_name]
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+
+class ReportlabPDFEngine(PDFEngine):
+    """
+    Motor original com reportlab `canvas.Canvas`. Mantém todo o documento em memória até
+    o `save()` e recodifica as imagens; as anotações vêm da imagem renderizada.
+    """
+    name = "reportlab"
+
+    def open(self, output_pdf: str):
+        from reportlab.pdfgen import canvas
+
+        self._reset_stats()
+        self.output_pdf = output_pdf
+        self.canvas = canvas.Canvas(output_pdf)
+
+    def add_page(self, page: Dict[str, Any]):
+        """Adiciona uma imagem ao PDF."""
+        from PIL import Image
+        from reportlab.lib.utils import ImageReader
+
+        img_path = page['path']
+        with open(img_path, 'rb') as f:
+            img = Image.open(f)
+            img.load()
+
+            # Obtém dimensões em pixels e converte para pontos
+            page_width, page_height, img_width_pt, img_height_pt, x, y = self._centered(*img.size)
+
+            # Define o tamanho da página e desenha a imagem centralizada; imagens de 16 bits
+            # são reduzidas antes (o reportlab as converteria para RGB cortando os valores)
+            self.canvas.setPageSize((page_width, page_height))
+            scaled = scale_to_8bit(img)
+            image = img_path if scaled is img else ImageReader(scaled)
+            self.canvas.drawImage(image, x, y, width=img_width_pt, height=img_height_pt)
+            self.canvas.showPage()
+        self.stats['pages'] += 1
+
+    def close(self):
+        self.canvas.save()
+
+    def abort(self):
+        _remove_partial(self.output_pdf)
+
+
+class PyMuPDFEngine(PDFEngine):
+    """
+    Motor baseado no PyMuPDF: os bytes do arquivo são entregues a `insert_image`, que copia
+    JPEGs sem recompressão, e imagens repetidas reutilizam o mesmo xref. Formatos que o MuPDF
+    não lê (WebP) são convertidos para PNG pelo Pillow antes. O documento fica em memória até
+    o `save()` com `garbage`/`deflate`; as anotações vêm da imagem renderizada.
+    """
+    name = "pymupdf"
+    # Formatos do Pillow que o MuPDF decodifica a partir dos bytes do arquivo
+    NATIVE_FORMATS = {"PNG", "JPEG", "BMP", "GIF", "TIFF", "JPEG2000"}
+
+    def open(self, output_pdf: str):
+        import fitz
+
+        self._reset_stats()
+        self.output_pdf = output_pdf
+        self.document = fitz.open()
+        # Hash do arquivo -> xref da imagem já inserida
+        self.image_xrefs: Dict[str, int] = {}
+
+    def add_page(self, page: Dict[str, Any]):
+        import fitz
+
+        with open(page['path'], 'rb') as f:
+            data = f.read()
+
+        image_hash = hashlib.blake2b(data, digest_size=20).hexdigest() if self.deduplicate_images else None
+        xref = self.image_xrefs.get(image_hash, 0) if image_hash else 0
+
+        # Apenas o cabeçalho é lido para obter as dimensões e o formato
+        width, height, image_format = _image_info(page['path'])
+        page_width, page_height, img_width_pt, img_height_pt, x, y = self._centered(width, height)
+
+        pdf_page = self.document.new_page(width=page_width, height=page_height)
+        # PyMuPDF usa origem no canto superior esquerdo
+        rect = fitz.Rect(x, page_height - y - img_height_pt, x + img_width_pt, page_height - y)
+        if xref:
+            pdf_page.insert_image(rect, xref=xref)
+            self.stats['images_reused'] += 1
+            self.stats['bytes_saved'] += len(data)
+        else:
+            if image_format not in self.NATIVE_FORMATS:
+                data = _png_bytes(page['path'])
+            xref = pdf_page.insert_image(rect, stream=data)
+            self.stats['images_embedded'] += 1
+            if image_hash:
+                self.image_xrefs[image_hash] = xref
+        self.stats['pages'] += 1
+
+    def close(self):
+        try:
+            self.document.save(self.output_pdf, garbage=3, deflate=True)
+        finally:
+            self.document.close()
+
+    def abort(self):
+        self.document.close()
+        _remove_partial(self.output_pdf)
+
+
+def _image_info(img_path: str) -> Tuple[int, int, Optional[str]]:
+    """Lê as dimensões e o formato da imagem sem decodificar os pixels."""
+    from PIL import Image
+
+    with Image.open(img_path) as img:
+        return img.width, img.height, img.format
+
+
+def _png_bytes(img_path: str) -> bytes:
+    """Decodifica a imagem com o Pillow e a recodifica como PNG (sem perda)."""
+    from PIL import Image
+
+    with Image.open(img_path) as img:
+        img = scale_to_8bit(img)
+        if img.mode not in ("1", "L", "LA", "P", "RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def _remove_partial(output_pdf: str):
+    try:
+        if os.path.exists(output_pdf):
+            os.remove(output_pdf)
+    except OSError:
+        pass
+
+
+PDF_ENGINES = {
+    NativePDFEngine.name: NativePDFEngine,
+    ReportlabPDFEngine.name: ReportlabPDFEngine,
+    PyMuPDFEngine.name: PyMuPDFEngine,
+}
+
+
+def get_engine_class(name: Optional[str]):
+    """Retorna a classe do motor pelo nome, usando o motor nativo para nomes desconhecidos."""
+    engine_class = PDF_ENGINES.get((name or '').lower())
+    if engine_class is None:
+        print(f"Motor de PDF desconhecido '{name}', usando '{NativePDFEngine.name}'")
+        engine_class = NativePDFEngine
+    return engine_class
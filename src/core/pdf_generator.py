@@ -1,89 +1,448 @@
 from PIL import Image, ImageFile, ImageDraw
-from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
-from typing import List, Dict, Any
-from src.config.config import DEFAULT_DPI
-from tkinter import messagebox
+from typing import List, Dict, Any, Iterator, Tuple, Callable, Optional
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from src.config.config import (
+    DEFAULT_DPI, PDF_ENGINE, PDF_MAX_DECODED_IMAGES, PDF_ZLIB_LEVEL,
+    PDF_WORKERS, PDF_PARALLEL_MIN_PAGES, PDF_DEDUPLICATE_IMAGES, PDF_DROP_DUPLICATE_PAGES,
+    PDF_VECTOR_ANNOTATIONS, PDF_PROFILES, PDF_PROFILE
+)
+from src.core.pdf_engines import get_engine_class
+from src.core.image_streams import read_png_stream, read_jpeg_stream, scale_to_8bit
+from src.core.pdf_manifest import (
+    load_manifest, save_manifest, remove_manifest, page_entry, pdf_matches, file_version
+)
 import os
+import json
+import zlib
+import hashlib
+import threading
 
 # Permite carregar imagens truncadas
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
+# Margem ao redor da imagem em cada página
+PAGE_MARGIN = 5 * mm
+
+
+def _content_hash(prepared: Dict[str, Any], payload: bytes) -> str:
+    """Calcula o hash que identifica imagens idênticas (formato + dados)."""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{prepared['width']}x{prepared['height']}:{prepared['color_space']}:"
+                  f"{prepared['bits']}:{prepared.get('filter')}:{prepared.get('decode')}".encode())
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+# Filtros de redimensionamento aceitos nos perfis de saída
+RESAMPLE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'box': Image.Resampling.BOX,
+    'bilinear': Image.Resampling.BILINEAR,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+
+
+def _target_size(width: int, height: int, profile: Optional[Dict[str, Any]],
+                 dpi: int) -> Optional[Tuple[int, int]]:
+    """Retorna o tamanho reduzido exigido pelo perfil, ou None se a imagem já cabe nele."""
+    if not profile:
+        return None
+    scale = 1.0
+    if profile.get('dpi') and profile['dpi'] < dpi:
+        scale = profile['dpi'] / dpi
+    if profile.get('max_dimension'):
+        # Páginas longas (captura com rolagem) são limitadas pela largura, senão o texto fica ilegível
+        longest = width if height > 2 * width else max(width, height)
+        scale = min(scale, profile['max_dimension'] / longest)
+    if scale >= 1.0:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _prepare_image(img_path: str, profile: Optional[Dict[str, Any]] = None,
+                   dpi: int = DEFAULT_DPI) -> Dict[str, Any]:
+    """
+    Converte uma imagem em um stream pronto para ser embutido no PDF.
+    PNGs e JPEGs compatíveis são copiados sem recompressão; os demais são decodificados
+    e a imagem decodificada é descartada ao final, restando apenas os dados comprimidos.
+
+    Se o perfil de saída exigir redução ou tons de cinza, a imagem é recodificada e
+    'display_size' guarda o tamanho original, usado para o layout da página.
+    """
+    grayscale = bool(profile and profile.get('grayscale'))
+    extension = os.path.splitext(img_path)[1].lower()
+    prepared = None
+    if extension == '.png':
+        prepared = read_png_stream(img_path)
+    elif extension in ('.jpg', '.jpeg'):
+        prepared = read_jpeg_stream(img_path)
+    if prepared and (_target_size(prepared['width'], prepared['height'], profile, dpi)
+                     or (grayscale and prepared['color_space'] != "/DeviceGray")):
+        prepared = None
+    if prepared and extension == '.png':
+        parms = prepared['decode_parms']
+        row_size = (parms['Columns'] * parms['Colors'] * parms['BitsPerComponent'] + 7) // 8
+        if len(prepared['data']) >= prepared['height'] * (row_size + 1):
+            # PNG gravado sem compressão (compress_level 0): comprime os mesmos dados filtrados
+            prepared['data'] = zlib.compress(zlib.decompress(prepared['data']), PDF_ZLIB_LEVEL)
+    if prepared:
+        # Para streams copiados, dados iguais significam pixels iguais
+        prepared['hash'] = _content_hash(prepared, prepared['data'])
+        return prepared
+
+    with open(img_path, 'rb') as f:
+        img = Image.open(f)
+        display_size = img.size
+        target_size = _target_size(img.width, img.height, profile, dpi)
+        if target_size:
+            # JPEGs podem ser decodificados já em escala reduzida (1/2, 1/4, 1/8)
+            img.draft('L' if grayscale else 'RGB', target_size)
+        img.load()
+
+    # 16 bits em tons de cinza: escala para 8 bits (e continua em /DeviceGray)
+    img = scale_to_8bit(img)
+    if grayscale or img.mode == '1' or img.mode == 'L':
+        img = img.convert('L')
+        color_space = "/DeviceGray"
+    else:
+        img = img.convert('RGB')
+        color_space = "/DeviceRGB"
+
+    if target_size and img.size != target_size:
+        resample = RESAMPLE_FILTERS.get(profile.get('resample'), Image.Resampling.BILINEAR)
+        # reducing_gap reduz primeiro por um fator inteiro (rápido) antes do filtro final
+        img = img.resize(target_size, resample=resample, reducing_gap=2.0)
+
+    width, height = img.size
+    pixels = img.tobytes()
+    img.close()
+
+    prepared = {
+        'width': width,
+        'height': height,
+        'color_space': color_space,
+        'bits': 8,
+        'filter': 'FlateDecode',
+    }
+    if (width, height) != display_size:
+        prepared['display_size'] = display_size
+    prepared['hash'] = _content_hash(prepared, pixels)
+    prepared['data'] = zlib.compress(pixels, PDF_ZLIB_LEVEL)
+    return prepared
+
+
+class PDFGenerationCancelled(Exception):
+    """Geração interrompida por PDFGenerator.cancel()."""
+
+
 class PDFGenerator:
-    def __init__(self, dpi: int = DEFAULT_DPI):
+    def __init__(self, dpi: int = DEFAULT_DPI, engine: str = PDF_ENGINE,
+                 max_images_in_memory: int = PDF_MAX_DECODED_IMAGES,
+                 workers: int = PDF_WORKERS,
+                 deduplicate_images: bool = PDF_DEDUPLICATE_IMAGES,
+                 drop_duplicate_pages: bool = PDF_DROP_DUPLICATE_PAGES,
+                 vector_annotations: bool = PDF_VECTOR_ANNOTATIONS,
+                 profile: str = PDF_PROFILE,
+                 error_callback: Optional[Callable[[str], None]] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
         self.dpi = dpi
+        # Motor de escrita: "native" (streaming), "reportlab" ou "pymupdf"
+        self.engine = engine
+        self.max_images_in_memory = max(1, max_images_in_memory)
+        # 0 = um processo por núcleo; 1 = preparação em threads no próprio processo
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.deduplicate_images = deduplicate_images
+        self.drop_duplicate_pages = drop_duplicate_pages
+        # Desenhar anotações como vetores sobre a imagem original (se o motor suportar)
+        self.vector_annotations = vector_annotations
+        # Perfil de saída ("archive", "screen", "email"): resolução e cores das imagens embutidas
+        if profile not in PDF_PROFILES:
+            print(f"Perfil de PDF desconhecido '{profile}', usando '{PDF_PROFILE}'")
+            profile = PDF_PROFILE
+        self.profile = profile
+        # Chamado com a mensagem de cada erro (a interface mostra um messagebox; sem callback,
+        # o erro é apenas impresso) e com (páginas processadas, total) após cada página
+        self.error_callback = error_callback
+        self.progress_callback = progress_callback
+        # Estatísticas da última geração (páginas, imagens reaproveitadas, bytes economizados)
+        self.last_stats: Dict[str, int] = {}
+        # Imagens que não puderam ser incluídas na última geração
+        self.last_errors: List[str] = []
+        # Se a última geração apenas acrescentou páginas a um PDF existente
+        self.last_appended = False
+        # Cancelamento pedido por outra thread (ex: botão "Cancelar" da interface)
+        self._cancel_event = threading.Event()
+        self.cancelled = False
+
+    def cancel(self):
+        """Interrompe a geração em andamento; o arquivo parcial é removido."""
+        self._cancel_event.set()
     
-    def generate_pdf(self, image_paths: List[str], output_pdf: str) -> bool:
+    def generate_pdf(self, image_paths: List[str], output_pdf: str, incremental: bool = False) -> bool:
         """
         Gera um PDF com as imagens, respeitando as dimensões originais.
         Cada página do PDF terá o tamanho da imagem correspondente.
+
+        Com o motor nativo as páginas são gravadas no arquivo assim que processadas e no
+        máximo `max_images_in_memory` imagens são decodificadas ao mesmo tempo.
+
+        Com `incremental`, se `output_pdf` é o último PDF da sessão e as imagens já incluídas
+        não mudaram (mesma ordem, arquivos e anotações), apenas as novas páginas são
+        acrescentadas ao arquivo; caso contrário, o PDF é gerado por completo.
         """
+        engine = get_engine_class(self.engine)(
+            self._page_layout, self.dpi, deduplicate_images=self.deduplicate_images)
+        vector = self.vector_annotations and engine.supports_vector_annotations
+        annotation_manager = self._create_annotation_manager(image_paths)
+        session_dir = os.path.dirname(image_paths[0]) if image_paths else None
+        entries = self._page_entries(image_paths, annotation_manager) if engine.supports_append else []
+        append_from, append_state = 0, None
+        if incremental:
+            append_from, append_state = self._append_plan(engine, session_dir, entries, output_pdf)
+        self.last_appended = append_state is not None
+
+        previous_key = None
+        opened = False
+        self.last_errors = []
+        self.cancelled = False
         try:
-            c = canvas.Canvas(output_pdf)
-            
-            # Verificar se temos um gerenciador de anotações disponível
-            from src.core.annotation_manager import AnnotationManager
-            
-            # Tentar criar um gerenciador de anotações para a pasta da sessão
-            annotation_manager = None
-            try:
-                session_dir = os.path.dirname(image_paths[0]) if image_paths else None
-                if session_dir:
-                    annotation_manager = AnnotationManager(session_dir)
-            except Exception as e:
-                print(f"Aviso: Não foi possível criar gerenciador de anotações: {e}")
-            
-            # Processar cada imagem
-            for img_path in image_paths:
-                # Se temos um gerenciador de anotações, verificar se há versão anotada
-                path_to_use = img_path
-                if annotation_manager and annotation_manager.has_annotations(img_path):
-                    annotated_path = annotation_manager.get_image_for_pdf(img_path)
-                    if annotated_path and os.path.exists(annotated_path):
-                        path_to_use = annotated_path
-                
-                if self._add_image_to_pdf(c, path_to_use):
-                    c.showPage()
+            if append_state:
+                if append_from == len(image_paths):
+                    # Nenhuma imagem nova: o PDF já está atualizado
+                    engine._reset_stats()
+                    self.last_stats = engine.stats
+                    return True
+                engine.open_append(output_pdf, append_state)
+                if append_state.get('last_page_key'):
+                    previous_key = tuple(append_state['last_page_key'])
+            else:
+                engine.open(output_pdf)
+            opened = True
+
+            new_paths = image_paths[append_from:]
+            pages = self._resolve_page_paths(new_paths, vector, annotation_manager)
+            if not engine.uses_prepared_images and self._profile_settings():
+                print(f"Perfil '{self.profile}' ignorado: o motor '{engine.name}' "
+                      f"embute as imagens originais")
+            if engine.uses_prepared_images:
+                parallel = self.workers > 1 and len(new_paths) >= PDF_PARALLEL_MIN_PAGES
+                pages = self._iter_prepared(pages, parallel)
+
+            total = len(new_paths)
+            for index, page in enumerate(pages, start=1):
+                if self._cancel_event.is_set():
+                    raise PDFGenerationCancelled()
+                try:
+                    if 'future' in page:
+                        page['prepared'] = page.pop('future').result()
+
+                    # Descartar páginas idênticas à anterior (mesma imagem e mesmas anotações)
+                    prepared = page.get('prepared')
+                    page_key = None
+                    if prepared and prepared.get('hash'):
+                        page_key = (prepared['hash'], json.dumps(page['annotations'], sort_keys=True))
+                    if self.drop_duplicate_pages and page_key and page_key == previous_key:
+                        engine.stats['pages_dropped'] += 1
+                        engine.stats['bytes_saved'] += len(prepared['data'])
+                        continue
+                    previous_key = page_key
+
+                    engine.add_page(page)
+                except Exception as e:
+                    self.last_errors.append(page['source'])
+                    self._report_error(f"Erro ao processar imagem {page['source']}: {e}")
+                finally:
+                    if self.progress_callback:
+                        self.progress_callback(index, total)
+
+            engine.close()
+            self.last_stats = engine.stats
+            if engine.supports_append and session_dir:
+                if self.last_errors:
+                    # Páginas com erro não estão no arquivo; a próxima exportação será completa
+                    remove_manifest(session_dir)
                 else:
-                    messagebox.showerror("Erro", f"Falha ao processar imagem: {img_path}")
-            
-            c.save()
+                    self.write_manifest(session_dir, output_pdf, entries, engine, previous_key)
+            if self.last_stats['bytes_saved']:
+                print(f"PDF: {self.last_stats['images_reused']} imagens reaproveitadas, "
+                      f"{self.last_stats['pages_dropped']} páginas repetidas removidas, "
+                      f"{self.last_stats['bytes_saved']} bytes economizados")
             return True
+        except PDFGenerationCancelled:
+            engine.abort()
+            self.last_stats = engine.stats
+            self.cancelled = True
+            print(f"Geração do PDF cancelada: {output_pdf}")
+            return False
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao gerar PDF: {e}")
+            if opened:
+                engine.abort()
+            self.last_stats = engine.stats
+            self._report_error(f"Erro ao gerar PDF: {e}")
             return False
-    
-    def _add_image_to_pdf(self, canvas_obj, img_path: str) -> bool:
-        """Adiciona uma imagem ao PDF."""
+        finally:
+            self._cancel_event.clear()
+
+    def _report_error(self, message: str):
+        """Encaminha a mensagem de erro ao callback ou a imprime no console."""
+        if self.error_callback:
+            self.error_callback(message)
+        else:
+            print(message)
+
+    def can_append(self, image_paths: List[str], output_pdf: str) -> bool:
+        """Verifica se `generate_pdf(..., incremental=True)` apenas acrescentaria páginas ao arquivo."""
+        engine = get_engine_class(self.engine)(
+            self._page_layout, self.dpi, deduplicate_images=self.deduplicate_images)
+        if not engine.supports_append or not os.path.exists(output_pdf):
+            return False
+        entries = self._page_entries(image_paths, self._create_annotation_manager(image_paths))
+        session_dir = os.path.dirname(image_paths[0]) if image_paths else None
+        return self._append_plan(engine, session_dir, entries, output_pdf)[1] is not None
+
+    def _append_plan(self, engine, session_dir: Optional[str], entries: List[Dict[str, Any]],
+                     output_pdf: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Compara as páginas com o manifesto do último PDF da sessão.
+        Retorna (índice da primeira página nova, estado do motor) ou (0, None) se o PDF
+        precisa ser gerado por completo.
+        """
+        if not engine.supports_append or not entries or not session_dir:
+            return 0, None
+        manifest = load_manifest(session_dir)
         try:
-            with open(img_path, 'rb') as f:
-                img = Image.open(f)
-                img.load()
-                
-                # Obtém dimensões em pixels
-                img_width_px, img_height_px = img.size
-                
-                # Converte pixels para pontos
-                img_width_pt = img_width_px * 72.0 / self.dpi
-                img_height_pt = img_height_px * 72.0 / self.dpi
-                
-                # Adiciona margem
-                margin = 5 * mm
-                page_width = img_width_pt + 2 * margin
-                page_height = img_height_pt + 2 * margin
-                
-                # Define o tamanho da página
-                canvas_obj.setPageSize((page_width, page_height))
-                
-                # Desenha a imagem centralizada
-                x = (page_width - img_width_pt) / 2
-                y = (page_height - img_height_pt) / 2
-                canvas_obj.drawImage(img_path, x, y, width=img_width_pt, height=img_height_pt)
-                
-                return True
+            if (not manifest or manifest.get('settings') != self._manifest_settings()
+                    or not os.path.exists(output_pdf) or not pdf_matches(manifest, output_pdf)):
+                return 0, None
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao processar imagem {img_path}: {e}")
-            return False
+            print(f"Erro ao verificar o PDF existente: {e}")
+            return 0, None
+
+        done = manifest.get('pages', [])
+        if not done or entries[:len(done)] != done:
+            return 0, None
+        return len(done), manifest['state']
+
+    def write_manifest(self, session_dir: str, output_pdf: str, entries: List[Dict[str, Any]],
+                       engine, previous_key: Optional[Tuple[str, str]]):
+        """Registra o PDF recém-fechado pelo motor como o último PDF da sessão."""
+        state = engine.append_state()
+        state['last_page_key'] = previous_key
+        save_manifest(session_dir, {
+            'pdf': os.path.abspath(output_pdf),
+            'pdf_version': file_version(output_pdf),
+            'settings': self._manifest_settings(),
+            'pages': entries,
+            'state': state,
+        })
+
+    def _page_entries(self, image_paths: List[str], annotation_manager) -> List[Dict[str, Any]]:
+        """Registra as imagens e a versão das anotações de cada página para o manifesto."""
+        entries = []
+        for img_path in image_paths:
+            annotation_path = None
+            if annotation_manager and annotation_manager.has_annotations(img_path):
+                annotation_path = annotation_manager.get_annotation_file_path(img_path)
+            entries.append(page_entry(img_path, annotation_path))
+        return entries
+
+    def _manifest_settings(self) -> Dict[str, Any]:
+        """Opções que mudam o conteúdo das páginas; se forem alteradas, o PDF é gerado de novo."""
+        return {
+            'engine': self.engine,
+            'dpi': self.dpi,
+            'profile': self.profile,
+            'vector_annotations': self.vector_annotations,
+            'deduplicate_images': self.deduplicate_images,
+            'drop_duplicate_pages': self.drop_duplicate_pages,
+        }
+
+    def _create_annotation_manager(self, image_paths: List[str]):
+        """Cria o gerenciador de anotações da pasta da sessão, se possível."""
+        from src.core.annotation_manager import AnnotationManager
+
+        try:
+            session_dir = os.path.dirname(image_paths[0]) if image_paths else None
+            if session_dir:
+                return AnnotationManager(session_dir)
+        except Exception as e:
+            print(f"Aviso: Não foi possível criar gerenciador de anotações: {e}")
+        return None
+
+    def _resolve_page_paths(self, image_paths: List[str], vector: bool,
+                            annotation_manager=None) -> Iterator[Dict[str, Any]]:
+        """
+        Retorna, para cada página, a imagem original ('source'), a imagem a usar no PDF ('path')
+        e as anotações vetoriais ('annotations').
+        Com `vector`, a imagem original é usada e as anotações são desenhadas no PDF;
+        caso contrário, usa-se a versão renderizada da imagem e a lista fica vazia.
+        """
+        for img_path in image_paths:
+            # Se temos um gerenciador de anotações, verificar se há versão anotada
+            path_to_use = img_path
+            annotations: List[Dict[str, Any]] = []
+            if annotation_manager and annotation_manager.has_annotations(img_path):
+                if vector:
+                    annotations = annotation_manager.load_annotations(img_path)
+                else:
+                    annotated_path = annotation_manager.get_image_for_pdf(img_path)
+                    if annotated_path and os.path.exists(annotated_path):
+                        path_to_use = annotated_path
+            yield {'source': img_path, 'path': path_to_use, 'annotations': annotations}
+
+    def _profile_settings(self) -> Optional[Dict[str, Any]]:
+        """Retorna as opções do perfil atual, ou None se ele mantém as imagens originais."""
+        settings = PDF_PROFILES[self.profile]
+        if settings.get('dpi') or settings.get('max_dimension') or settings.get('grayscale'):
+            return settings
+        return None
+
+    def _page_layout(self, img_width_px: int, img_height_px: int) -> Tuple[float, float, float, float]:
+        """Calcula (largura da página, altura da página, largura da imagem, altura da imagem) em pontos."""
+        # Converte pixels para pontos
+        img_width_pt = img_width_px * 72.0 / self.dpi
+        img_height_pt = img_height_px * 72.0 / self.dpi
+        
+        # Adiciona margem
+        page_width = img_width_pt + 2 * PAGE_MARGIN
+        page_height = img_height_pt + 2 * PAGE_MARGIN
+        return page_width, page_height, img_width_pt, img_height_pt
+
+    def _iter_prepared(self, pages: Iterator[Dict[str, Any]],
+                       parallel: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Prepara as imagens em segundo plano mantendo uma janela fixa de páginas em andamento.
+        As páginas são devolvidas na ordem original da sessão, com o resultado em page['future'].
+
+        Em modo paralelo cada processo decodifica e comprime uma imagem por vez; a janela
+        guarda apenas os streams já comprimidos, suficientes para manter todos ocupados.
+        """
+        profile = self._profile_settings()
+        executor: Executor
+        if parallel:
+            window = max(self.max_images_in_memory, 2 * self.workers)
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            window = self.max_images_in_memory
+            executor = ThreadPoolExecutor(max_workers=window)
+
+        with executor:
+            pending: deque = deque()
+            try:
+                for page in pages:
+                    page['future'] = executor.submit(_prepare_image, page['path'], profile, self.dpi)
+                    pending.append(page)
+                    if len(pending) >= window:
+                        yield pending.popleft()
+                while pending:
+                    yield pending.popleft()
+            finally:
+                # Geração interrompida: não iniciar as páginas que ainda estão na fila
+                for page in pending:
+                    page['future'].cancel()
     
     def render_annotated_image(self, image_path: str, annotations: List[Dict[str, Any]]) -> str:
         """Renderiza uma imagem com suas anotações."""
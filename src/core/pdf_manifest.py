@@ -0,0 +1,95 @@
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+# Manifesto do último PDF gerado para uma sessão: quais imagens (e qual versão das anotações)
+# já estão no arquivo e o estado do PDFStreamWriter para acrescentar novas páginas depois.
+
+MANIFEST_FILE = ".pdf_manifest.json"
+MANIFEST_VERSION = 2
+
+
+def manifest_path(session_dir: str) -> str:
+    return os.path.join(session_dir, MANIFEST_FILE)
+
+
+def load_manifest(session_dir: str) -> Optional[Dict[str, Any]]:
+    """Carrega o manifesto da sessão, ou None se não existir ou for de outra versão."""
+    path = manifest_path(session_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"Erro ao carregar manifesto do PDF: {e}")
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(session_dir: str, manifest: Dict[str, Any]) -> bool:
+    """Grava o manifesto em um arquivo temporário e o substitui de uma vez."""
+    path = manifest_path(session_dir)
+    temp_path = path + ".tmp"
+    try:
+        manifest = dict(manifest, version=MANIFEST_VERSION)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar manifesto do PDF: {e}")
+        return False
+
+
+def remove_manifest(session_dir: str):
+    try:
+        os.remove(manifest_path(session_dir))
+    except OSError:
+        pass
+
+
+def file_version(path: Optional[str]) -> Optional[List[int]]:
+    """Identifica a versão de um arquivo por (tamanho, mtime em ns)."""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def page_entry(img_path: str, annotation_path: Optional[str]) -> Dict[str, Any]:
+    """Registro de uma página: imagem e versão das anotações usadas."""
+    return {
+        'image': os.path.basename(img_path),
+        'image_version': file_version(img_path),
+        'annotations_version': file_version(annotation_path),
+    }
+
+
+def pdf_matches(manifest: Dict[str, Any], pdf_path: str) -> bool:
+    """Verifica se o PDF é o mesmo arquivo gravado junto com o manifesto (não foi alterado)."""
+    if os.path.abspath(pdf_path) != os.path.abspath(manifest.get('pdf', '')):
+        return False
+    if file_version(pdf_path) != manifest.get('pdf_version'):
+        return False
+    # O arquivo precisa terminar com o trailer gravado por último
+    tail = f"startxref\n{manifest['state']['writer']['startxref']}\n%%EOF\n".encode('latin-1')
+    with open(pdf_path, 'rb') as f:
+        f.seek(max(0, os.path.getsize(pdf_path) - len(tail)))
+        return f.read() == tail
+
+
+def last_pdf_path(session_dir: str) -> Optional[str]:
+    """Retorna o último PDF gerado para a sessão, se ainda puder receber novas páginas."""
+    manifest = load_manifest(session_dir)
+    if not manifest:
+        return None
+    pdf_path = manifest.get('pdf')
+    try:
+        if pdf_path and os.path.exists(pdf_path) and pdf_matches(manifest, pdf_path):
+            return pdf_path
+    except Exception as e:
+        print(f"Erro ao verificar o último PDF da sessão: {e}")
+    return None
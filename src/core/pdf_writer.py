@@ -0,0 +1,247 @@
+import os
+from typing import Any, Dict, List, Optional
+
+# Objetos fixos do documento: catálogo e raiz da árvore de páginas
+CATALOG_OBJ = 1
+PAGES_OBJ = 2
+# Páginas por folha da árvore de páginas. A raiz aponta para as folhas e cada folha para até
+# PAGE_TREE_LEAF_SIZE páginas, então fechar o arquivo (a cada checkpoint do PDF ao vivo) reescreve
+# apenas a raiz e a folha em aberto, e não a lista de todas as páginas.
+PAGE_TREE_LEAF_SIZE = 64
+
+
+def pdf_number(value: float) -> str:
+    """Formata um número no formato aceito pelo PDF (sem notação científica)."""
+    if isinstance(value, int):
+        return str(value)
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return text if text not in ("", "-0") else "0"
+
+
+def pdf_value(value: Any) -> str:
+    """
+    Serializa um valor Python para a sintaxe do PDF.
+    Strings são escritas sem alteração (ex: "/DeviceRGB" ou "5 0 R").
+    """
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return pdf_number(value)
+    if isinstance(value, dict):
+        items = " ".join(f"/{key} {pdf_value(val)}" for key, val in value.items())
+        return f"<< {items} >>"
+    if isinstance(value, (list, tuple)):
+        return "[" + " ".join(pdf_value(item) for item in value) + "]"
+    return str(value)
+
+
+def pdf_ref(obj_num: int) -> str:
+    """Retorna a referência indireta para um objeto."""
+    return f"{obj_num} 0 R"
+
+
+class PDFStreamWriter:
+    """
+    Escreve um PDF objeto a objeto diretamente no arquivo de saída.
+    Nada além da tabela de offsets e da lista de páginas fica em memória,
+    então o consumo é o mesmo para 10 ou 10.000 páginas.
+
+    Com `append_state` (retornado por `state()` após gravar o arquivo), as novas páginas são
+    acrescentadas como uma atualização incremental: novos objetos, a raiz e as folhas alteradas
+    da árvore de páginas e uma seção xref com /Prev apontando para a anterior. Os bytes
+    existentes não mudam.
+    """
+    def __init__(self, output_path: str, append_state: Optional[Dict[str, Any]] = None):
+        self.output_path = output_path
+        self._offsets: Dict[int, int] = {}
+        self._prev_xref: Optional[int] = None
+        self.startxref: Optional[int] = None
+
+        if append_state:
+            stat = os.stat(output_path)
+            self._initial_times = (stat.st_atime_ns, stat.st_mtime_ns)
+            self._file = open(output_path, 'r+b')
+            self._file.seek(0, os.SEEK_END)
+            self.bytes_written = self._file.tell()
+            self._next_obj = append_state['size']
+            # Folhas da árvore de páginas: [número do objeto, [páginas]]
+            self._leaves: List[List[Any]] = [[leaf, list(kids)] for leaf, kids in append_state['leaves']]
+            self._prev_xref = append_state['startxref']
+        else:
+            self._file = open(output_path, 'wb')
+            self.bytes_written = 0
+            self._next_obj = PAGES_OBJ + 1
+            self._leaves = []
+            # Cabeçalho com bytes binários para que ferramentas tratem o arquivo como binário
+            self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # Tamanho original do arquivo, restaurado se uma atualização incremental for abortada
+        self._initial_size = self.bytes_written if append_state else 0
+        # Folhas que ganharam páginas nesta gravação e precisam ser reescritas no fechamento
+        self._changed_leaves: List[int] = []
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def reserve_object(self) -> int:
+        """Reserva um número de objeto para ser escrito depois."""
+        obj_num = self._next_obj
+        self._next_obj += 1
+        return obj_num
+
+    def write_object(self, obj_num: int, body: str):
+        """Escreve um objeto indireto já reservado."""
+        self._offsets[obj_num] = self.bytes_written
+        self._write(f"{obj_num} 0 obj\n{body}\nendobj\n".encode('latin-1'))
+
+    def add_object(self, body: str) -> int:
+        """Escreve um novo objeto indireto e retorna seu número."""
+        obj_num = self.reserve_object()
+        self.write_object(obj_num, body)
+        return obj_num
+
+    def add_stream(self, entries: Dict[str, Any], data: bytes) -> int:
+        """Escreve um objeto stream com o dicionário informado."""
+        obj_num = self.reserve_object()
+        entries = dict(entries)
+        entries['Length'] = len(data)
+        self._offsets[obj_num] = self.bytes_written
+        self._write(f"{obj_num} 0 obj\n{pdf_value(entries)}\nstream\n".encode('latin-1'))
+        self._write(data)
+        self._write(b"\nendstream\nendobj\n")
+        return obj_num
+
+    def add_image(self, width: int, height: int, color_space: Any, bits: int,
+                  data: bytes, filter_name: Optional[str] = None,
+                  decode_parms: Optional[Dict[str, Any]] = None,
+                  extra: Optional[Dict[str, Any]] = None) -> int:
+        """Escreve um XObject de imagem e retorna seu número."""
+        entries: Dict[str, Any] = {
+            'Type': "/XObject",
+            'Subtype': "/Image",
+            'Width': width,
+            'Height': height,
+            'ColorSpace': color_space,
+            'BitsPerComponent': bits,
+        }
+        if filter_name:
+            entries['Filter'] = f"/{filter_name}"
+        if decode_parms:
+            entries['DecodeParms'] = decode_parms
+        if extra:
+            entries.update(extra)
+        return self.add_stream(entries, data)
+
+    def add_page(self, width: float, height: float, content: bytes,
+                 xobjects: Optional[Dict[str, int]] = None,
+                 fonts: Optional[Dict[str, int]] = None) -> int:
+        """Escreve o conteúdo e o objeto de uma página, retornando o número da página."""
+        content_obj = self.add_stream({}, content)
+
+        resources: Dict[str, Any] = {}
+        if xobjects:
+            resources['XObject'] = {name: pdf_ref(num) for name, num in xobjects.items()}
+        if fonts:
+            resources['Font'] = {name: pdf_ref(num) for name, num in fonts.items()}
+
+        if not self._leaves or len(self._leaves[-1][1]) >= PAGE_TREE_LEAF_SIZE:
+            self._leaves.append([self.reserve_object(), []])
+        leaf_obj, leaf_kids = self._leaves[-1]
+        if leaf_obj not in self._changed_leaves:
+            self._changed_leaves.append(leaf_obj)
+
+        page_obj = self.add_object(pdf_value({
+            'Type': "/Page",
+            'Parent': pdf_ref(leaf_obj),
+            'MediaBox': [0, 0, width, height],
+            'Resources': resources,
+            'Contents': pdf_ref(content_obj),
+        }))
+        leaf_kids.append(page_obj)
+        return page_obj
+
+    @property
+    def page_count(self) -> int:
+        return sum(len(kids) for _, kids in self._leaves)
+
+    def close(self):
+        """Escreve a árvore de páginas, a tabela xref e o trailer."""
+        if self._file.closed:
+            return
+        try:
+            # As folhas já gravadas e completas continuam valendo; só as alteradas são reescritas
+            for leaf_obj, kids in self._leaves:
+                if leaf_obj in self._changed_leaves:
+                    self.write_object(leaf_obj, pdf_value({
+                        'Type': "/Pages", 'Parent': pdf_ref(PAGES_OBJ),
+                        'Kids': [pdf_ref(num) for num in kids], 'Count': len(kids)
+                    }))
+            self.write_object(PAGES_OBJ, pdf_value({
+                'Type': "/Pages", 'Kids': [pdf_ref(leaf_obj) for leaf_obj, _ in self._leaves],
+                'Count': self.page_count
+            }))
+
+            # Numa atualização incremental o catálogo existente continua apontando para o objeto 2
+            if self._prev_xref is None:
+                self.write_object(CATALOG_OBJ, pdf_value({
+                    'Type': "/Catalog", 'Pages': pdf_ref(PAGES_OBJ)
+                }))
+
+            xref_offset = self.bytes_written
+            size = self._next_obj
+            trailer_entries: Dict[str, Any] = {'Size': size, 'Root': pdf_ref(CATALOG_OBJ)}
+            if self._prev_xref is None:
+                lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+                for obj_num in range(1, size):
+                    offset = self._offsets.get(obj_num)
+                    if offset is None:
+                        lines.append("0000000000 65535 f \n")
+                    else:
+                        lines.append(f"{offset:010d} 00000 n \n")
+            else:
+                # Atualização incremental: apenas os objetos novos ou alterados, em subseções contíguas
+                trailer_entries['Prev'] = self._prev_xref
+                lines = ["xref\n"]
+                obj_nums = sorted(self._offsets)
+                start = 0
+                while start < len(obj_nums):
+                    end = start
+                    while end + 1 < len(obj_nums) and obj_nums[end + 1] == obj_nums[end] + 1:
+                        end += 1
+                    lines.append(f"{obj_nums[start]} {end - start + 1}\n")
+                    lines.extend(f"{self._offsets[num]:010d} 00000 n \n" for num in obj_nums[start:end + 1])
+                    start = end + 1
+            self._write("".join(lines).encode('latin-1'))
+
+            trailer = pdf_value(trailer_entries)
+            self._write(f"trailer\n{trailer}\nstartxref\n{xref_offset}\n%%EOF\n".encode('latin-1'))
+            self.startxref = xref_offset
+        finally:
+            self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def state(self) -> Dict[str, Any]:
+        """Informações necessárias para acrescentar páginas ao arquivo depois de fechado."""
+        return {'startxref': self.startxref, 'size': self._next_obj,
+                'leaves': [[leaf_obj, list(kids)] for leaf_obj, kids in self._leaves]}
+
+    def abort(self):
+        """
+        Fecha o arquivo sem finalizá-lo e remove a saída parcial.
+        Em uma atualização incremental, o arquivo volta ao tamanho e à data originais.
+        """
+        if self._prev_xref is not None:
+            if not self._file.closed:
+                self._file.truncate(self._initial_size)
+                self._file.close()
+                os.utime(self.output_path, ns=self._initial_times)
+            return
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.output_path)
+        except OSError:
+            pass
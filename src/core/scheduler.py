@@ -0,0 +1,107 @@
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Agendamento das capturas da automação por prazos fixos em time.monotonic():
+# a captura n acontece em início + n * intervalo, independentemente de quanto tempo a
+# captura, a gravação e a ação entre capturas levaram. O atraso de cada captura em relação
+# ao prazo é registrado para as estatísticas de pontualidade (atraso médio, máximo e jitter).
+#
+# Quando uma iteração passa do prazo seguinte (estouro), a política define o que acontece:
+#   skip     - pula os horários perdidos e segue a grade original (bom para time-lapse)
+#   catch_up - captura os horários perdidos em sequência, sem pausa, até alcançar a grade
+#   stretch  - captura imediatamente e recomeça a grade a partir desse instante
+
+OVERRUN_POLICIES = ("skip", "catch_up", "stretch")
+
+
+class CaptureScheduler:
+    """Calcula os prazos das capturas e espera por eles."""
+
+    def __init__(self, interval: float, policy: str = "skip",
+                 stop_event: Optional[threading.Event] = None):
+        self.interval = max(0.0, float(interval))
+        self.policy = policy if policy in OVERRUN_POLICIES else "skip"
+        self.stop_event = stop_event or threading.Event()
+        self.origin: Optional[float] = None
+        self.next_deadline: Optional[float] = None
+        self.lateness: List[float] = []  # Atraso de cada captura em relação ao prazo (s)
+        self.fired: List[float] = []     # Instante de cada captura
+        self.skipped = 0                 # Horários pulados (política "skip")
+        self.overruns = 0                # Iterações que passaram do prazo seguinte
+
+    def start(self):
+        """Define o início da grade: a primeira captura acontece imediatamente."""
+        self.origin = time.monotonic()
+        self.next_deadline = self.origin
+
+    def elapsed(self) -> float:
+        """Segundos desde o início da grade."""
+        return time.monotonic() - self.origin if self.origin is not None else 0.0
+
+    def wait(self) -> bool:
+        """
+        Espera até o prazo da próxima captura. Retorna False se `stop_event` for acionado
+        durante a espera.
+        """
+        if self.origin is None:
+            self.start()
+        remaining = self.next_deadline - time.monotonic()
+        if remaining > 0 and self.stop_event.wait(remaining):
+            return False
+        now = time.monotonic()
+        self.lateness.append(max(0.0, now - self.next_deadline))
+        self.fired.append(now)
+        return not self.stop_event.is_set()
+
+    def advance(self):
+        """Calcula o prazo da próxima captura conforme a política de estouro."""
+        deadline = self.next_deadline + self.interval
+        now = time.monotonic()
+        if now > deadline:
+            self.overruns += 1
+            if self.policy == "skip" and self.interval > 0:
+                missed = int((now - deadline) // self.interval) + 1
+                self.skipped += missed
+                deadline += missed * self.interval
+            elif self.policy == "stretch":
+                deadline = now
+            # "catch_up": mantém o prazo já vencido; a próxima captura sai sem espera
+        self.next_deadline = deadline
+
+    def restart(self):
+        """A próxima captura acontece agora, e a grade passa a contar a partir dela."""
+        self.next_deadline = time.monotonic()
+
+    def stats(self) -> Dict[str, float]:
+        """Estatísticas de pontualidade em ms: atraso médio, p95 e máximo, e jitter do período."""
+        if not self.lateness:
+            return {}
+        lateness_ms = sorted(value * 1000 for value in self.lateness)
+        periods_ms = [(b - a) * 1000 for a, b in zip(self.fired, self.fired[1:])]
+        result = {
+            'captures': len(lateness_ms),
+            'lateness_mean_ms': statistics.fmean(lateness_ms),
+            'lateness_p95_ms': lateness_ms[min(len(lateness_ms) - 1, int(len(lateness_ms) * 0.95))],
+            'lateness_max_ms': lateness_ms[-1],
+            'period_mean_ms': statistics.fmean(periods_ms) if periods_ms else 0.0,
+            'jitter_ms': statistics.pstdev(periods_ms) if len(periods_ms) > 1 else 0.0,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+        }
+        return result
+
+    def status_text(self) -> str:
+        """Resumo para o log ao fim da automação."""
+        stats = self.stats()
+        if not stats:
+            return ""
+        text = (f"período médio {stats['period_mean_ms']:.1f} ms (alvo {self.interval * 1000:.0f} ms), "
+                f"jitter {stats['jitter_ms']:.1f} ms, atraso médio {stats['lateness_mean_ms']:.1f} ms, "
+                f"p95 {stats['lateness_p95_ms']:.1f} ms, máximo {stats['lateness_max_ms']:.1f} ms")
+        if stats['overruns']:
+            text += f", estouros: {stats['overruns']}"
+        if stats['skipped']:
+            text += f", horários pulados: {stats['skipped']}"
+        return text
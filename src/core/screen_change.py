@@ -0,0 +1,129 @@
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from PIL import Image, ImageChops
+from src.config.config import (
+    CHANGE_SAMPLE_WIDTH, CHANGE_PIXEL_TOLERANCE, DEFAULT_CHANGE_THRESHOLD,
+    DEFAULT_CHANGE_DEBOUNCE, DEFAULT_CHANGE_MIN_GAP, SETTLE_POLL_INTERVAL,
+    SETTLE_STABLE_SAMPLES, SETTLE_THRESHOLD, SETTLE_START_GRACE, DEFAULT_SETTLE_TIMEOUT
+)
+
+# Comparação barata entre capturas: cada captura é reduzida a uma amostra em tons de cinza com
+# CHANGE_SAMPLE_WIDTH pixels de largura, e a mudança é a fração de pixels da amostra cuja
+# diferença passa de CHANGE_PIXEL_TOLERANCE (ignora ruído de compressão e antialiasing).
+
+
+def sample_image(image: Image.Image, width: int = CHANGE_SAMPLE_WIDTH) -> Image.Image:
+    """Reduz a captura a uma amostra em tons de cinza para comparação."""
+    if image.width > width:
+        # Redução inteira primeiro (rápida), depois o ajuste fino em poucos pixels
+        factor = image.width // width
+        if factor > 1:
+            image = image.reduce(factor)
+        height = max(1, round(image.height * width / image.width))
+        image = image.convert('L').resize((width, height), Image.Resampling.BOX)
+        return image
+    return image.convert('L')
+
+
+def changed_fraction(sample: Image.Image, reference: Optional[Image.Image],
+                     tolerance: int = CHANGE_PIXEL_TOLERANCE) -> float:
+    """Fração (0 a 1) dos pixels da amostra que mudaram em relação à referência."""
+    if reference is None or reference.size != sample.size:
+        return 1.0
+    difference = ImageChops.difference(sample, reference)
+    changed = difference.point(lambda value: 255 if value > tolerance else 0).histogram()[255]
+    return changed / (sample.width * sample.height)
+
+
+class ChangeTrigger:
+    """
+    Decide quando salvar no modo de captura por mudança de tela.
+
+    A primeira amostra é sempre salva. Depois, uma captura é salva quando a amostra difere da
+    última captura salva em pelo menos `threshold` (fração de pixels), a tela ficou estável por
+    `debounce` segundos (nenhuma mudança entre amostras seguidas) e passaram ao menos `min_gap`
+    segundos desde a última captura salva.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_CHANGE_THRESHOLD / 100,
+                 debounce: float = DEFAULT_CHANGE_DEBOUNCE,
+                 min_gap: float = DEFAULT_CHANGE_MIN_GAP):
+        self.threshold = max(0.0, threshold)
+        self.debounce = max(0.0, debounce)
+        self.min_gap = max(0.0, min_gap)
+        self.reset()
+
+    def reset(self):
+        self.reference: Optional[Image.Image] = None  # Amostra da última captura salva
+        self.previous: Optional[Image.Image] = None   # Amostra anterior
+        self.stable_since: Optional[float] = None
+        self.last_saved: Optional[float] = None
+        self.samples = 0
+
+    def update(self, sample: Image.Image, now: Optional[float] = None) -> bool:
+        """Registra uma amostra e retorna True se a captura correspondente deve ser salva."""
+        now = time.monotonic() if now is None else now
+        self.samples += 1
+        previous, self.previous = self.previous, sample
+
+        if self.reference is None:
+            return self._saved(sample, now)
+
+        if changed_fraction(sample, self.reference) < self.threshold:
+            # Igual à última captura salva (ou a mudança foi desfeita)
+            self.stable_since = None
+            return False
+
+        # Mudou: esperar a tela parar de mudar antes de salvar
+        if self.stable_since is None or changed_fraction(sample, previous) >= self.threshold:
+            self.stable_since = now
+        if now - self.stable_since < self.debounce:
+            return False
+        if self.last_saved is not None and now - self.last_saved < self.min_gap:
+            return False
+        return self._saved(sample, now)
+
+    def _saved(self, sample: Image.Image, now: float) -> bool:
+        self.reference = sample
+        self.stable_since = None
+        self.last_saved = now
+        return True
+
+
+def wait_until_stable(grab: Callable[[], Image.Image], before: Optional[Image.Image],
+                      stop_event: threading.Event, timeout: float = DEFAULT_SETTLE_TIMEOUT,
+                      poll_interval: float = SETTLE_POLL_INTERVAL,
+                      threshold: float = SETTLE_THRESHOLD / 100,
+                      stable_samples: int = SETTLE_STABLE_SAMPLES,
+                      start_grace: float = SETTLE_START_GRACE) -> Tuple[Optional[Image.Image], bool]:
+    """
+    Captura a tela repetidamente até ela parar de mudar, após uma ação (ex: trocar de página).
+
+    `before` é a amostra da tela antes da ação: enquanto a tela for igual a ela, a ação ainda
+    não teve efeito e a espera continua (até `start_grace` segundos). Retorna a última imagem
+    capturada, já estável e pronta para salvar, e se a tela estabilizou antes de `timeout`.
+    """
+    started = time.monotonic()
+    changed = before is None
+    previous: Optional[Image.Image] = None
+    stable = 0
+    image = None
+    while True:
+        image = grab()
+        sample = sample_image(image)
+        elapsed = time.monotonic() - started
+        if not changed and changed_fraction(sample, before) >= threshold:
+            changed = True
+        if previous is not None and changed_fraction(sample, previous) < threshold:
+            stable += 1
+        else:
+            stable = 0
+        previous = sample
+
+        if stable >= stable_samples and (changed or elapsed >= start_grace):
+            return image, True
+        if elapsed >= timeout:
+            return image, False
+        if stop_event.wait(poll_interval):
+            return None, False
@@ -1,22 +1,44 @@
 import os
 import sys
-import pyautogui
 import time
-import tkinter as tk
-from tkinter import filedialog
 from datetime import datetime
 from typing import Optional, Tuple, Dict, Any
-from src.config.config import IMAGES_DIR
-
-# Importar pygetwindow para capturar janelas específicas
-try:
-    import pygetwindow as gw
-except ImportError:
-    # Se não conseguir importar, instalar a biblioteca
-    import subprocess
-    import sys
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pygetwindow"])
-    import pygetwindow as gw
+from src.config.config import IMAGES_DIR, SUPPORTED_IMAGE_FORMATS, WINDOW_ACTIVATE_TIMEOUT
+from src.core.capture_writer import save_image_atomic, capture_format_settings
+
+# pyautogui, pygetwindow e tkinter são importados apenas ao capturar ou abrir diálogos,
+# para que a listagem de imagens funcione sem interface gráfica (exportação pela linha de comando)
+
+
+def _get_window_module():
+    """Importa o pygetwindow para capturar janelas específicas."""
+    try:
+        import pygetwindow as gw
+    except ImportError:
+        # Se não conseguir importar, instalar a biblioteca
+        import subprocess
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "pygetwindow"])
+        import pygetwindow as gw
+    return gw
+
+
+def _is_window(handle) -> bool:
+    """Verifica se o handle ainda pertence a uma janela existente."""
+    try:
+        import win32gui
+    except ImportError:
+        return True  # Sem pywin32 não há como validar; um erro ao usar a janela força nova busca
+    return bool(win32gui.IsWindow(handle))
+
+
+def _foreground_handle():
+    """Handle da janela em primeiro plano, ou None se não for possível consultar."""
+    try:
+        import win32gui
+    except ImportError:
+        return None
+    return win32gui.GetForegroundWindow()
+
 
 class ScreenshotManager:
     def __init__(self, images_dir: str = IMAGES_DIR):
@@ -24,6 +46,13 @@ class ScreenshotManager:
         self.images_dir = None
         self.capture_area = None  # Para captura de área específica (x1, y1, x2, y2)
         self.selected_window = None  # Para captura de janela específica
+        self.capture_format = capture_format_settings()  # Formato dos arquivos salvos
+        self._window = None  # Janela do pygetwindow já localizada para selected_window
+        # Tempo de cada etapa da última captura, em segundos (window, activate, grab, filter, save)
+        self.last_timings: Dict[str, float] = {}
+        self.last_frame = None  # Última imagem capturada (comparada com a tela após a ação entre capturas)
+        self._last_timestamp = None
+        self._same_timestamp = 0
         
     def set_directory(self, base_dir: Optional[str] = None):
         """Define o diretório base para salvar arquivos."""
@@ -50,9 +79,18 @@ class ScreenshotManager:
     def set_window(self, window_info: Optional[Dict[str, Any]]):
         """Define a janela a ser capturada"""
         self.selected_window = window_info
+        self._window = None
+
+    def set_capture_format(self, name: str, compress_level: Optional[int] = None,
+                           optimize: Optional[bool] = None):
+        """Define o formato dos arquivos salvos ("png", "webp" ou "bmp", ver CAPTURE_FORMATS)."""
+        self.capture_format = capture_format_settings(name, compress_level, optimize)
     
     def _ask_user_for_directory(self) -> str:
         """Pergunta ao usuário onde salvar as capturas de tela."""
+        import tkinter as tk
+        from tkinter import filedialog
+
         root = tk.Tk()
         root.withdraw()  # Esconder janela
         
@@ -90,78 +128,146 @@ class ScreenshotManager:
             print(f"Erro inesperado ao criar diretório: {e}")
             raise
         
+    def next_capture_path(self) -> str:
+        """Caminho do próximo arquivo de captura: horário com milissegundos e a extensão do formato."""
+        # Gerar timestamp para o nome do arquivo com milissegundos
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")[:-3]  # Inclui milissegundos
+
+        # Verificar se o diretório ainda existe antes de salvar
+        if not self.images_dir or not os.path.exists(self.images_dir):
+            print(f"Diretório de screenshots não definido ou não existe. Criando diretório da sessão...")
+            if self.images_dir:
+                os.makedirs(self.images_dir, exist_ok=True)
+            else:
+                # fallback para temporário
+                import tempfile
+                temp_base = os.path.join(tempfile.gettempdir(), "PDF_Maker")
+                self.base_dir = temp_base
+                self.images_dir = temp_base
+                os.makedirs(self.images_dir, exist_ok=True)
+
+        filename = f"screenshot_{timestamp}"
+        # Capturas salvas no mesmo milissegundo (ex: partes de uma captura com rolagem)
+        if timestamp == self._last_timestamp:
+            self._same_timestamp += 1
+            filename += f"_{self._same_timestamp}"
+        else:
+            self._last_timestamp = timestamp
+            self._same_timestamp = 0
+        return os.path.join(self.images_dir, f"{filename}{self.capture_format['extension']}")
+
     def take_screenshot(self) -> Optional[str]:
         """Captura uma screenshot e salva no diretório de imagens."""
         try:
-            # Gerar timestamp para o nome do arquivo com milissegundos
-            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")[:-3]  # Inclui milissegundos
-
-            # Verificar se o diretório ainda existe antes de salvar
-            if not self.images_dir or not os.path.exists(self.images_dir):
-                print(f"Diretório de screenshots não definido ou não existe. Criando diretório da sessão...")
-                if self.images_dir:
-                    os.makedirs(self.images_dir, exist_ok=True)
-                else:
-                    # fallback para temporário
-                    import tempfile
-                    temp_base = os.path.join(tempfile.gettempdir(), "PDF_Maker")
-                    self.base_dir = temp_base
-                    self.images_dir = temp_base
-                    os.makedirs(self.images_dir, exist_ok=True)
+            self.last_timings = {}
+            screenshot = self.grab_screenshot()
 
             # Criar o nome do arquivo com timestamp
-            filename = f"screenshot_{timestamp}.png"
-            path = os.path.join(self.images_dir, filename)
-
-            # Capturar baseado no tipo de captura definido
-            if self.capture_area:
-                # Capturar área específica
-                x1, y1, x2, y2 = self.capture_area
-                screenshot = pyautogui.screenshot(region=(x1, y1, x2-x1, y2-y1))
-            elif self.selected_window:
-                # Capturar janela específica
-                try:
-                    # Tentar localizar a janela pelo handle
-                    handle = self.selected_window.get('handle')
-                    window = gw.getWindowsWithTitle(self.selected_window.get('title', ''))[0]
-                    
-                    # Se a janela ainda existe e está visível
-                    if window.visible:
-                        # Trazer a janela para frente para garantir que está visível
-                        window.activate()
-                        time.sleep(0.2)  # Pequena pausa para garantir que a janela ativou
-                        
-                        # Capturar a região da janela
-                        left = window.left
-                        top = window.top
-                        width = window.width
-                        height = window.height
-                        screenshot = pyautogui.screenshot(region=(left, top, width, height))
-                    else:
-                        # Se a janela não estiver mais visível, usar tela inteira
-                        print("Janela não está mais visível, usando tela inteira")
-                        screenshot = pyautogui.screenshot()
-                except Exception as e:
-                    # Se houve erro ao capturar a janela, usar tela inteira
-                    print(f"Erro ao capturar janela: {e}. Usando tela inteira.")
-                    screenshot = pyautogui.screenshot()
-            else:
-                # Capturar tela inteira (comportamento padrão)
-                screenshot = pyautogui.screenshot()
-                
-            screenshot.save(path)
-
-            # Verifica se o arquivo foi salvo corretamente
-            if os.path.exists(path) and os.path.getsize(path) > 0:
-                time.sleep(0.1)  # Pausa para garantir que o arquivo foi escrito
+            capture_format = self.capture_format
+            path = self.next_capture_path()
+            started = time.perf_counter()
+            # Arquivo temporário + renomear: o arquivo final só aparece completo
+            saved = save_image_atomic(screenshot, path, capture_format['format'], capture_format['options'])
+            self.last_timings['save'] = time.perf_counter() - started
+            if saved:
                 print(f"Screenshot salva com sucesso: {path}")
                 return path
-            else:
-                print(f"Falha ao verificar arquivo salvo: {path}")
-                return None
+            return None
         except Exception as e:
             print(f"Erro ao salvar screenshot: {e}")
             return None
+
+    def grab_screenshot(self):
+        """Captura a tela inteira, a área ou a janela configurada e retorna a imagem em memória."""
+        import pyautogui
+
+        # Capturar baseado no tipo de captura definido
+        if self.capture_area:
+            # Capturar área específica
+            x1, y1, x2, y2 = self.capture_area
+            return self._grab(pyautogui, region=(x1, y1, x2-x1, y2-y1))
+        if self.selected_window:
+            # Capturar janela específica
+            try:
+                started = time.perf_counter()
+                window = self._resolve_window()
+                self.last_timings['window'] = time.perf_counter() - started
+
+                # Se a janela ainda existe e está visível
+                if window and window.visible:
+                    started = time.perf_counter()
+                    self._bring_to_front(window)
+                    self.last_timings['activate'] = time.perf_counter() - started
+
+                    # Capturar a região da janela
+                    left = window.left
+                    top = window.top
+                    width = window.width
+                    height = window.height
+                    return self._grab(pyautogui, region=(left, top, width, height))
+                # Se a janela não estiver mais visível, usar tela inteira
+                print("Janela não está mais visível, usando tela inteira")
+            except Exception as e:
+                # Se houve erro ao capturar a janela, usar tela inteira
+                self._window = None
+                print(f"Erro ao capturar janela: {e}. Usando tela inteira.")
+        # Capturar tela inteira (comportamento padrão)
+        return self._grab(pyautogui)
+
+    def capture_origin(self) -> Tuple[int, int]:
+        """Canto superior esquerdo da área ou janela capturada, na tela (base das coordenadas das macros)."""
+        if self.capture_area:
+            return self.capture_area[0], self.capture_area[1]
+        if self.selected_window:
+            try:
+                window = self._resolve_window()
+                if window:
+                    return window.left, window.top
+            except Exception as e:
+                self._window = None
+                print(f"Erro ao localizar janela: {e}")
+        return 0, 0
+
+    def _grab(self, pyautogui, region=None):
+        started = time.perf_counter()
+        screenshot = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+        self.last_timings['grab'] = time.perf_counter() - started
+        return screenshot
+
+    def _resolve_window(self):
+        """
+        Retorna a janela de selected_window. A janela localizada fica guardada e só é procurada
+        de novo quando o handle deixa de ser válido (janela fechada).
+        """
+        if self._window is not None and _is_window(self._window._hWnd):
+            return self._window
+
+        gw = _get_window_module()
+        # Tentar localizar a janela pelo handle salvo no preset, sem enumerar todas as janelas
+        handle = self.selected_window.get('handle')
+        window = None
+        if handle and hasattr(gw, 'Win32Window') and _is_window(handle):
+            window = gw.Win32Window(handle)
+        else:
+            # Handle inválido (programa reaberto): procurar pelo título
+            windows = gw.getWindowsWithTitle(self.selected_window.get('title', ''))
+            window = windows[0] if windows else None
+        self._window = window
+        return window
+
+    def _bring_to_front(self, window):
+        """Ativa a janela, se ainda não estiver em primeiro plano, e espera a ativação."""
+        foreground = _foreground_handle()
+        if foreground is not None and foreground == window._hWnd:
+            return
+        window.activate()
+        if foreground is None:
+            time.sleep(WINDOW_ACTIVATE_TIMEOUT)  # Sem como consultar, pausa fixa
+            return
+        # Esperar só o necessário para a janela ficar em primeiro plano
+        deadline = time.perf_counter() + WINDOW_ACTIVATE_TIMEOUT
+        while _foreground_handle() != window._hWnd and time.perf_counter() < deadline:
+            time.sleep(0.01)
     
     def get_image_paths(self) -> list[str]:
         """Retorna lista de caminhos das imagens ordenadas."""
@@ -174,7 +280,7 @@ class ScreenshotManager:
             files = [
                 os.path.join(self.images_dir, f) 
                 for f in os.listdir(self.images_dir) 
-                if f.lower().endswith('.png')
+                if f.lower().endswith(tuple(SUPPORTED_IMAGE_FORMATS))
             ]
             files.sort()
             print(f"Encontradas {len(files)} imagens em {self.images_dir}")
@@ -205,7 +311,7 @@ class ScreenshotManager:
             count = 0
             
             for f in os.listdir(self.images_dir):
-                if f.lower().endswith(('.png', '.jpg', '.jpeg')):
+                if f.lower().endswith(tuple(SUPPORTED_IMAGE_FORMATS)):
                     file_path = os.path.join(self.images_dir, f)
                     try:
                         os.remove(file_path)
@@ -0,0 +1,205 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from src.config.config import (
+    STITCH_IGNORE_RIGHT, STITCH_MIN_MATCH, STITCH_MIN_OVERLAP, STITCH_MAX_HEIGHT
+)
+
+# Captura com rolagem: cada captura é comparada com a anterior linha a linha. Cada linha de pixels
+# vira um hash, e a rolagem é o deslocamento em que as linhas da captura nova coincidem com as da
+# anterior. Só as linhas que entraram na tela são acrescentadas à imagem emendada.
+#
+# Cabeçalhos e rodapés fixos (barras de ferramentas, menus que não rolam) aparecem na mesma
+# posição nas duas capturas: o cabeçalho é ignorado na comparação e fica só no topo da imagem
+# emendada; o rodapé é ignorado e fica só no fim.
+
+# Linhas que aparecem mais vezes que isso na captura anterior (bordas de tabela, listras) não
+# servem para votar no deslocamento
+_MAX_ROW_REPEATS = 4
+# Deslocamentos mais votados que são verificados linha a linha
+_CANDIDATES = 5
+
+
+def row_hashes(image: Image.Image, ignore_right: int = STITCH_IGNORE_RIGHT) -> List[Optional[int]]:
+    """Hash de cada linha da imagem; None para linhas lisas (uma só cor), que não servem para alinhar."""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    width = image.width
+    if width > 2 * ignore_right:
+        # A barra de rolagem muda de posição a cada rolagem: fica de fora da comparação
+        width -= ignore_right
+        image = image.crop((0, 0, width, image.height))
+    data = image.tobytes()
+    stride = width * 3
+    hashes = []
+    for start in range(0, len(data), stride):
+        row = data[start:start + stride]
+        hashes.append(None if row == row[:3] * width else hash(row))
+    return hashes
+
+
+def _fixed_rows(previous: List[Optional[int]], current: List[Optional[int]], from_end: bool) -> int:
+    """
+    Linhas iguais na mesma posição no início (ou no fim) das duas capturas. Linhas lisas que na
+    verdade rolaram podem entrar na conta; isso não atrapalha a emenda, porque o rodapé sai do fim
+    da imagem emendada e volta com a captura nova.
+    """
+    pairs = zip(reversed(previous), reversed(current)) if from_end else zip(previous, current)
+    count = 0
+    for a, b in pairs:
+        if a != b:
+            break
+        count += 1
+    return count
+
+
+def find_scroll(previous: List[Optional[int]], current: List[Optional[int]], header: int = 0,
+                footer: int = 0, min_match: float = STITCH_MIN_MATCH,
+                min_overlap: int = STITCH_MIN_OVERLAP) -> Optional[int]:
+    """
+    Quantas linhas o conteúdo subiu entre duas capturas (hashes de `row_hashes`).
+    Retorna 0 se a tela não mudou e None se não há uma sobreposição confiável.
+    """
+    if previous == current:
+        return 0
+    end = min(len(previous), len(current)) - footer
+
+    # Cada linha da captura nova vota nos deslocamentos em que ela aparece na anterior
+    positions: Dict[int, List[int]] = {}
+    for j in range(header, end):
+        if previous[j] is not None:
+            positions.setdefault(previous[j], []).append(j)
+    votes: Counter = Counter()
+    for i in range(header, end):
+        matches = positions.get(current[i])
+        if matches and len(matches) <= _MAX_ROW_REPEATS:
+            for j in matches:
+                if j > i:
+                    votes[j - i] += 1
+
+    # Confere os mais votados: as linhas com conteúdo da sobreposição precisam bater
+    best: Optional[Tuple[int, int]] = None
+    for shift, _ in votes.most_common(_CANDIDATES):
+        compared = matched = 0
+        for i in range(header, end - shift):
+            a, b = current[i], previous[i + shift]
+            if a is None or b is None:
+                continue
+            compared += 1
+            matched += a == b
+        if matched >= min_overlap and matched >= min_match * compared:
+            if best is None or matched > best[1]:
+                best = (shift, matched)
+    return best[0] if best else None
+
+
+class ScrollStitcher:
+    """
+    Emenda as capturas de um conteúdo rolado em uma imagem longa.
+
+    `add` recebe cada captura e acrescenta só as linhas novas; `compose` monta a imagem final,
+    dividida em partes de até `max_height` linhas (em uma linha lisa perto do limite, quando há).
+    """
+
+    def __init__(self, max_height: int = STITCH_MAX_HEIGHT):
+        self.max_height = max(1, int(max_height))
+        self.reset()
+
+    def reset(self):
+        self.strips: List[Image.Image] = []           # Trechos da imagem emendada, em ordem
+        self.blank_rows: List[bool] = []              # Linha lisa, para cada linha da imagem emendada
+        self.previous: Optional[List[Optional[int]]] = None
+        self.frame_size: Optional[Tuple[int, int]] = None
+        self.frames = 0
+        self.gaps = 0       # Capturas sem sobreposição com a anterior, acrescentadas inteiras
+        self.unchanged = 0  # Capturas seguidas sem linhas novas (fim do conteúdo)
+
+    @property
+    def height(self) -> int:
+        """Altura atual da imagem emendada."""
+        return len(self.blank_rows)
+
+    def add(self, image: Image.Image) -> int:
+        """Acrescenta uma captura e retorna quantas linhas novas entraram na imagem emendada."""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        hashes = row_hashes(image)
+        previous, self.previous = self.previous, hashes
+        self.frames += 1
+
+        if previous is None or image.size != self.frame_size:
+            if previous is not None:
+                self.gaps += 1
+            self.frame_size = image.size
+            return self._append(image, hashes, 0)
+
+        height = image.height
+        header = _fixed_rows(previous, hashes, from_end=False)
+        footer = _fixed_rows(previous, hashes, from_end=True)
+        if header + footer >= height:
+            header = footer = 0
+        shift = find_scroll(previous, hashes, header, footer)
+        if shift == 0:
+            self.unchanged += 1
+            return 0
+        if shift is None:
+            # Rolou demais ou o conteúdo mudou: acrescenta a captura inteira
+            self.gaps += 1
+            print("Captura com rolagem: sem sobreposição com a captura anterior")
+            return self._append(image, hashes, 0)
+
+        # A imagem emendada termina com o rodapé da captura anterior: ele vai para depois das linhas novas
+        self._trim(footer)
+        self._append(image, hashes, height - footer - shift)
+        return shift
+
+    def compose(self) -> List[Image.Image]:
+        """Monta a imagem emendada, dividida em partes de até `max_height` linhas."""
+        parts = []
+        start = 0
+        total = self.height
+        while start < total:
+            end = min(total, start + self.max_height)
+            if end < total:
+                # Dividir entre parágrafos, se houver uma linha lisa no último quarto da parte
+                for row in range(end, end - self.max_height // 4, -1):
+                    if self.blank_rows[row - 1]:
+                        end = row
+                        break
+            parts.append(self._render(start, end))
+            start = end
+        return parts
+
+    def _append(self, image: Image.Image, hashes: List[Optional[int]], top: int) -> int:
+        self.unchanged = 0
+        self.strips.append(image if top == 0 else image.crop((0, top, image.width, image.height)))
+        self.blank_rows.extend(row is None for row in hashes[top:])
+        return image.height - top
+
+    def _trim(self, rows: int):
+        """Remove as últimas `rows` linhas da imagem emendada."""
+        if rows <= 0:
+            return
+        del self.blank_rows[-rows:]
+        while rows and self.strips:
+            last = self.strips[-1]
+            if last.height <= rows:
+                rows -= last.height
+                self.strips.pop()
+            else:
+                self.strips[-1] = last.crop((0, 0, last.width, last.height - rows))
+                rows = 0
+
+    def _render(self, start: int, end: int) -> Image.Image:
+        width = max(strip.width for strip in self.strips)
+        image = Image.new('RGB', (width, end - start), (255, 255, 255))
+        top = 0
+        for strip in self.strips:
+            bottom = top + strip.height
+            if bottom > start and top < end:
+                piece = strip.crop((0, max(start, top) - top, strip.width, min(end, bottom) - top))
+                image.paste(piece, (0, max(start, top) - start))
+            top = bottom
+            if top >= end:
+                break
+        return image
@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from src.config.config import TELEMETRY_FILE, TELEMETRY_WINDOW
+
+# Telemetria da automação: o tempo de cada etapa, captura por captura. Cada captura tem um
+# registro (dict) que acompanha a imagem pelo pipeline; cada etapa acrescenta o seu tempo e, ao
+# fim da gravação, o registro vira uma linha do arquivo TELEMETRY_FILE da sessão (JSONL, tempos
+# em ms). No fim da automação é acrescentada uma linha com o resumo (p50/p95/máximo por etapa).
+#
+# Etapas (quem mede entre parênteses):
+#   ciclo       tempo desde a captura anterior (thread da automação)
+#   atraso      atraso em relação ao prazo da captura, depois da espera (CaptureScheduler)
+#   ação        ação entre capturas que levou a esta captura, incluindo as esperas da macro
+#   estabiliz.  espera pela tela parar de mudar depois da ação
+#   window, activate, grab          etapas da captura (ScreenshotManager.last_timings)
+#   fila        da captura até o início da análise, incluindo a espera por vaga (CapturePipeline)
+#   análise     hash, repetidas e fim do conteúdo (CapturePipeline)
+#   encode, write                   codificação e gravação do arquivo (CaptureWriter)
+#   callback    PDF ao vivo e aviso à interface depois da gravação
+#   preview     atualização das miniaturas na interface (sem captura associada)
+
+STAGE_NAMES = {
+    'cycle': 'ciclo', 'overshoot': 'atraso', 'action': 'ação', 'settle': 'estabilização',
+    'window': 'janela', 'activate': 'ativação', 'grab': 'captura', 'queue': 'fila',
+    'analysis': 'análise', 'encode': 'codificação', 'write': 'gravação', 'callback': 'callback',
+    'preview': 'miniaturas',
+}
+# Etapas que não são trabalho (esperas e o ciclo inteiro) ficam de fora da "etapa mais lenta"
+_WAIT_STAGES = ('cycle', 'overshoot', 'action', 'settle')
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def slowest_stage(summary: Dict[str, Dict[str, float]]) -> Optional[str]:
+    """Etapa de trabalho com o maior p95 em um resumo de `CaptureTelemetry.summary` (sem as esperas)."""
+    stages = [stage for stage in summary if stage not in _WAIT_STAGES]
+    return max(stages, key=lambda stage: summary[stage]['p95']) if stages else None
+
+
+class CaptureTelemetry:
+    """
+    Registra o tempo de cada etapa das capturas de uma automação.
+
+    `new_record` cria o registro de uma captura na thread da automação; as etapas acrescentam
+    `record[etapa] = segundos`; `finish` grava a linha no arquivo e atualiza as janelas móveis
+    (as últimas `window` capturas) usadas em `status_text`. `close` grava o resumo.
+    """
+
+    def __init__(self, path: Optional[str] = None, window: int = TELEMETRY_WINDOW):
+        self.path = path
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self._file = None
+        self._origin: Optional[float] = None
+        self._last_capture: Optional[float] = None
+        self._count = 0
+        self.run_id = ""
+        self.recent: Dict[str, Deque[float]] = {}
+        self.values: Dict[str, List[float]] = {}  # Todos os tempos da automação, para o resumo
+        self.records = 0
+
+    @staticmethod
+    def default_path(session_dir: str) -> str:
+        return os.path.join(session_dir, TELEMETRY_FILE)
+
+    def start(self):
+        """Início da automação: abre o arquivo (acrescentando às automações anteriores da sessão)."""
+        self._origin = time.monotonic()
+        self.run_id = time.strftime("%Y%m%d_%H%M%S")
+        if self.path:
+            try:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            except OSError as e:
+                print(f"Erro ao abrir o arquivo de telemetria {self.path}: {e}")
+                self._file = None
+
+    def new_record(self) -> Dict[str, Any]:
+        """Registro de uma nova captura, com o número, o instante e o ciclo desde a anterior."""
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = now
+        record: Dict[str, Any] = {'i': self._count, 't': now - self._origin}
+        if self._last_capture is not None:
+            record['cycle'] = now - self._last_capture
+        self._last_capture = now
+        self._count += 1
+        return record
+
+    def finish(self, record: Optional[Dict[str, Any]], path: Optional[str] = None):
+        """Captura concluída (gravada, descartada ou com falha): grava a linha e atualiza as estatísticas."""
+        if record is None:
+            return
+        stages = {key: value for key, value in record.items() if key in STAGE_NAMES}
+        line = {'run': self.run_id, 'i': record['i'], 't': round(record['t'], 3),
+                'file': os.path.basename(path) if path else None}
+        line.update((stage, round(seconds * 1000, 1)) for stage, seconds in stages.items())
+        with self._lock:
+            self.records += 1
+            for stage, seconds in stages.items():
+                self._add(stage, seconds)
+            self._write(line)
+
+    def add_sample(self, stage: str, seconds: float):
+        """Tempo de uma etapa sem captura associada (ex.: atualização das miniaturas)."""
+        with self._lock:
+            self._add(stage, seconds)
+
+    def rolling(self, stage: str) -> Optional[Dict[str, float]]:
+        """p50 e p95 (ms) das últimas `window` medições de uma etapa."""
+        with self._lock:
+            values = sorted(self.recent.get(stage, ()))
+        if not values:
+            return None
+        return {'p50': _percentile(values, 0.5) * 1000, 'p95': _percentile(values, 0.95) * 1000}
+
+    def status_text(self) -> str:
+        """Trecho para a barra de status: ciclo e etapa mais lenta (p50/p95 das últimas capturas)."""
+        parts = []
+        cycle = self.rolling('cycle')
+        if cycle:
+            parts.append(f"ciclo p50/p95 {cycle['p50']:.0f}/{cycle['p95']:.0f} ms")
+        slowest = None
+        for stage in STAGE_NAMES:
+            if stage in _WAIT_STAGES:
+                continue
+            stats = self.rolling(stage)
+            if stats and (slowest is None or stats['p95'] > slowest[1]['p95']):
+                slowest = (stage, stats)
+        if slowest:
+            stage, stats = slowest
+            parts.append(f"{STAGE_NAMES[stage]} {stats['p50']:.0f}/{stats['p95']:.0f} ms")
+        return " - " + ", ".join(parts) if parts else ""
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Por etapa: medições, média, p50, p95 e máximo (ms) da automação inteira."""
+        with self._lock:
+            values = {stage: sorted(seconds) for stage, seconds in self.values.items()}
+        result = {}
+        for stage in STAGE_NAMES:
+            stage_values = values.get(stage)
+            if not stage_values:
+                continue
+            result[stage] = {
+                'count': len(stage_values),
+                'mean': sum(stage_values) * 1000 / len(stage_values),
+                'p50': _percentile(stage_values, 0.5) * 1000,
+                'p95': _percentile(stage_values, 0.95) * 1000,
+                'max': stage_values[-1] * 1000,
+            }
+        return result
+
+    def report(self) -> str:
+        """Relatório do fim da automação: uma linha por etapa."""
+        lines = []
+        for stage, stats in self.summary().items():
+            lines.append(f"  {STAGE_NAMES[stage]:<14} {stats['count']:>5}  média {stats['mean']:7.1f}  "
+                         f"p50 {stats['p50']:7.1f}  p95 {stats['p95']:7.1f}  máximo {stats['max']:7.1f} ms")
+        return "\n".join(lines)
+
+    def close(self):
+        """Fim da automação: grava a linha de resumo e fecha o arquivo."""
+        summary = self.summary()
+        with self._lock:
+            if summary:
+                self._write({'run': self.run_id, 'captures': self.records, 'summary': {
+                    stage: {key: round(value, 1) for key, value in stats.items()}
+                    for stage, stats in summary.items()}})
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _add(self, stage: str, seconds: float):
+        # Chamado com o lock
+        if stage not in self.recent:
+            self.recent[stage] = deque(maxlen=self.window)
+            self.values[stage] = []
+        self.recent[stage].append(seconds)
+        self.values[stage].append(seconds)
+
+    def _write(self, line: Dict[str, Any]):
+        # Chamado com o lock
+        if not self._file:
+            return
+        try:
+            self._file.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + "\n")
+            self._file.flush()
+        except OSError as e:
+            print(f"Erro ao gravar a telemetria: {e}")
+            self._file.close()
+            self._file = None
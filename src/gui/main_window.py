@@ -2,10 +2,10 @@ import os
 import sys
 import threading
 import shutil
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk, ImageFile
-import keyboard
 import json
 import platform
 from datetime import datetime
@@ -13,11 +13,14 @@ from src.config.config import (
     MAIN_WINDOW_SIZE, DEFAULT_IMAGE_DISPLAY_SIZE, 
     DEFAULT_INTERVAL, DEFAULT_NUM_CAPTURES, ICON,
     SCREENSHOT_HOTKEY, AUTOMATION_HOTKEY, APP_VERSION,
-    MIN_MAIN_WINDOW_SIZE, DIALOG_WINDOW_SIZE
+    MIN_MAIN_WINDOW_SIZE, DIALOG_WINDOW_SIZE, PDF_PROGRESS_UPDATE_MS, PDF_INCREMENTAL
 )
 from src.core.screenshot import ScreenshotManager
 from src.core.pdf_generator import PDFGenerator
+from src.core.pdf_manifest import last_pdf_path
 from src.core.automation import AutomationManager
+from src.core.input_events import get_input_service
+from src.core.telemetry import STAGE_NAMES, slowest_stage
 from src.core.update_checker import UpdateChecker
 from src.gui.preset_window import PresetConfigWindow
 from src.gui.hotkey_config import HotkeyConfigWindow
@@ -127,9 +130,10 @@ class PDFMakerApp:
         
         # Managers
         self.screenshot_manager = ScreenshotManager()
-        self.pdf_generator = PDFGenerator()
         self.automation_manager = AutomationManager(self.screenshot_manager)
         self.update_checker = UpdateChecker()
+        self.hotkey_handles = []  # Atalhos globais registrados no serviço de teclado
+        self._preview_pending = False  # Atualização das miniaturas já agendada
         
         # Estado da aplicação
         self.counter = 0
@@ -140,6 +144,8 @@ class PDFMakerApp:
         self.base_directory = self._load_last_directory()  # Carrega a última pasta usada
         self.session_screenshots_dir = None  # Novo: diretório da sessão atual
         self.session_name = None  # Nome da sessão atual
+        # Exportações de PDF em segundo plano (pasta da sessão -> tarefa), uma por sessão
+        self.pdf_exports = {}
 
         # Variáveis para automação
         self.interval_var = tk.StringVar(value=str(DEFAULT_INTERVAL))
@@ -229,6 +235,7 @@ class PDFMakerApp:
         # Menu Ajuda
         help_menu = tk.Menu(self.menu_bar, tearoff=0)
         help_menu.add_command(label="Verificar Atualizações", command=self._manual_check_updates)
+        help_menu.add_command(label="Diagnóstico", command=self._show_diagnostics)
         help_menu.add_separator()
         help_menu.add_command(label=f"Sobre", 
                              command=lambda: messagebox.showinfo(
@@ -262,10 +269,12 @@ class PDFMakerApp:
     
     def _setup_automation_callbacks(self):
         """Configura os callbacks da automação."""
+        # Os callbacks são chamados na thread da automação: status e fim mexem nos widgets e
+        # nas miniaturas, então passam para a thread da interface
         self.automation_manager.set_callbacks(
             on_screenshot=self._on_automation_screenshot,
-            on_status=self._on_automation_status,
-            on_finish=self._on_automation_finish
+            on_status=lambda status: self.root.after(0, self._on_automation_status, status),
+            on_finish=lambda: self.root.after(0, self._on_automation_finish)
         )
     
     def _build_ui(self):
@@ -290,6 +299,9 @@ class PDFMakerApp:
         
         # Frame de botões rápidos (versão simplificada)
         self._build_quick_actions_frame()
+
+        # Progresso da geração de PDF (exibido apenas durante a exportação)
+        self._build_pdf_progress_frame()
     
     def _open_selected_directory(self):
         """Abre o diretório selecionado no Explorer."""
@@ -352,6 +364,20 @@ class PDFMakerApp:
                                          command=self._reset_session)
         self.btn_reset_session.pack(side=tk.RIGHT, padx=5, pady=5)
     
+    def _build_pdf_progress_frame(self):
+        """Constrói o frame com o progresso da geração de PDF em segundo plano."""
+        self.frame_pdf_progress = ttk.Frame(self.root)
+
+        self.pdf_progress_label = ttk.Label(self.frame_pdf_progress, text="")
+        self.pdf_progress_label.pack(side=tk.LEFT, padx=5)
+
+        self.btn_cancel_pdf = ttk.Button(self.frame_pdf_progress, text="Cancelar",
+                                         command=self._cancel_pdf_export)
+        self.btn_cancel_pdf.pack(side=tk.RIGHT, padx=5)
+
+        self.pdf_progress_bar = ttk.Progressbar(self.frame_pdf_progress, mode='determinate')
+        self.pdf_progress_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5)
+
     def _browse_directory(self):
         """Abre diálogo para selecionar diretório base."""
         # Usar o último diretório como inicial, se disponível
@@ -586,14 +612,35 @@ class PDFMakerApp:
         # Configura o automation manager com ações e condições
         self.automation_manager.set_action_between_captures(
             preset_data.get('action_type'),
-            preset_data.get('action_key')
+            preset_data.get('action_key'),
+            preset_data.get('action_macro')
         )
         
         self.automation_manager.set_stop_conditions(
             preset_data.get('stop_on_key'),
             preset_data.get('stop_key'),
             preset_data.get('stop_after_time'),
-            preset_data.get('stop_time_value')
+            preset_data.get('stop_time_value'),
+            preset_data.get('stop_on_repeat', False),
+            preset_data.get('stop_repeat_count'),
+            preset_data.get('delete_repeated', False)
+        )
+
+        self.automation_manager.set_duplicate_filter(
+            preset_data.get('duplicate_mode', 'off'),
+            preset_data.get('duplicate_distance')
+        )
+        self.automation_manager.set_live_pdf(preset_data.get('live_pdf', False))
+        self.automation_manager.set_overrun_policy(preset_data.get('overrun_policy'))
+        self.automation_manager.set_wait_for_settle(
+            preset_data.get('wait_for_settle', False),
+            preset_data.get('settle_timeout')
+        )
+        self.automation_manager.set_trigger_mode(
+            preset_data.get('trigger_mode'),
+            preset_data.get('change_threshold'),
+            preset_data.get('change_debounce'),
+            preset_data.get('change_min_gap')
         )
         
         print("Preset aplicado com sucesso! Pronto para iniciar automação.")
@@ -605,7 +652,10 @@ class PDFMakerApp:
 
     def _on_hotkey_save(self, config_data):
         """Callback chamado quando os atalhos são salvos."""
-        # Atualiza os rótulos dos botões e menus (mesmo que os atalhos só funcionem após reiniciar)
+        # Troca os atalhos registrados pelos novos
+        self._start_hotkey_listener(config_data['screenshot_hotkey'], config_data['automation_hotkey'])
+
+        # Atualiza os rótulos dos botões e menus
         tools_menu = self.menu_bar.winfo_children()[1]
         tools_menu.entryconfig("Tirar Screenshot", 
                              accelerator=f"({config_data['screenshot_hotkey']})")
@@ -622,18 +672,33 @@ class PDFMakerApp:
                         elif "Iniciar Automação" in child['text']:
                             child['text'] = f"Iniciar Automação ({config_data['automation_hotkey']})"
 
-    def _start_hotkey_listener(self):
-        """Inicia o listener de atalhos de teclado."""
-        # Carrega as configurações atuais (que podem ter sido carregadas no config.py)
-        screenshot_hotkey = SCREENSHOT_HOTKEY
-        automation_hotkey = AUTOMATION_HOTKEY
-        
-        def listen_hotkeys():
-            keyboard.add_hotkey(screenshot_hotkey, self._take_screenshot)
-            keyboard.add_hotkey(automation_hotkey, self._start_automation_hotkey)
-            keyboard.wait()
-        
-        threading.Thread(target=listen_hotkeys, daemon=True).start()
+    def _start_hotkey_listener(self, screenshot_hotkey: str = SCREENSHOT_HOTKEY,
+                               automation_hotkey: str = AUTOMATION_HOTKEY):
+        """Registra os atalhos globais no serviço de teclado, substituindo os anteriores."""
+        input_service = get_input_service()
+        for handle in self.hotkey_handles:
+            input_service.unregister(handle)
+        self.hotkey_handles = []
+        try:
+            # Os handlers rodam na thread do hook: a primeira coisa é passar para a thread da
+            # interface, que é a única que lê o estado da automação e mexe nos widgets
+            self.hotkey_handles.append(input_service.register_hotkey(
+                screenshot_hotkey, lambda: self.root.after(0, self._take_screenshot)))
+            self.hotkey_handles.append(input_service.register_hotkey(
+                automation_hotkey, lambda: self.root.after(0, self._start_automation_hotkey)))
+        except Exception as e:
+            print(f"Erro ao registrar atalhos de teclado: {e}")
+
+    def _show_diagnostics(self):
+        """Mostra o estado do serviço de teclado (handlers ativos e custo por tecla)."""
+        stats = get_input_service().stats()
+        messagebox.showinfo(
+            "Diagnóstico",
+            f"Handlers de teclado ativos: {stats['active_handlers']}\n"
+            f"Hook do teclado instalado: {'sim' if stats['hooked'] else 'não'}\n"
+            f"Teclas processadas: {stats['events']}\n"
+            f"Tempo médio por tecla: {stats['dispatch_mean_us']:.0f} µs"
+        )
     
     def _take_screenshot(self):
         """Captura uma screenshot."""
@@ -658,9 +723,9 @@ class PDFMakerApp:
             print("Falha ao capturar screenshot")
     
     def _start_automation_hotkey(self):
-        """Inicia automação via atalho se disponível."""
+        """Inicia automação via atalho se disponível (chamado na thread da interface)."""
         if not self.automation_manager.is_running and self.btn_start['state'] != tk.DISABLED:
-            self.root.after(0, self._start_automation)
+            self._start_automation()
     
     def _start_automation(self):
         """Inicia o processo de automação."""
@@ -715,7 +780,18 @@ class PDFMakerApp:
         self.counter += 1
         self.last_image = self.current_image
         self.current_image = img_path
-        self.root.after(0, self._update_images)
+        # Capturas que chegam enquanto a atualização espera são mostradas por ela mesma
+        if not self._preview_pending:
+            self._preview_pending = True
+            self.root.after(0, self._refresh_automation_preview)
+
+    def _refresh_automation_preview(self):
+        self._preview_pending = False
+        started = time.perf_counter()
+        self._update_images()
+        telemetry = self.automation_manager.telemetry
+        if telemetry:
+            telemetry.add_sample('preview', time.perf_counter() - started)
     
     def _on_automation_status(self, status: str):
         """Callback para atualização de status da automação."""
@@ -725,7 +801,33 @@ class PDFMakerApp:
         """Callback chamado quando a automação termina."""
         self._set_automation_controls_state(True)
         self.automation_status.config(text="Status: Concluído")
-        messagebox.showinfo("Automação", "Concluída com sucesso!")
+        message = "Concluída com sucesso!"
+        duplicate_filter = self.automation_manager.duplicate_filter
+        if duplicate_filter.duplicates:
+            action = "ignoradas" if duplicate_filter.mode == "skip" else "marcadas com _dup"
+            message += f"\n\nCapturas repetidas {action}: {duplicate_filter.duplicates}"
+        deleted_repeated = self.automation_manager.deleted_repeated
+        if deleted_repeated:
+            message += f"\n\nCapturas repetidas do fim excluídas: {len(deleted_repeated)}"
+            # As imagens exibidas podem ter sido excluídas: mostrar as últimas que restaram
+            paths = self.screenshot_manager.get_image_paths()
+            self.current_image = paths[-1] if paths else None
+            self.last_image = paths[-2] if len(paths) > 1 else None
+            self._update_images()
+        if self.automation_manager.last_live_pdf:
+            message += f"\n\nPDF gerado: {self.automation_manager.last_live_pdf}"
+            if deleted_repeated:
+                message += "\n(inclui as repetidas; use Gerar PDF para um PDF sem elas)"
+        capture_ms = self.automation_manager.capture_timings.get('total')
+        if capture_ms is not None:
+            message += f"\n\nTempo médio por captura: {capture_ms:.0f} ms"
+        telemetry_summary = self.automation_manager.telemetry_summary
+        slowest = slowest_stage(telemetry_summary)
+        if slowest:
+            stats = telemetry_summary[slowest]
+            message += (f"\nEtapa mais lenta: {STAGE_NAMES[slowest]} "
+                        f"(p50 {stats['p50']:.0f} ms, p95 {stats['p95']:.0f} ms)")
+        messagebox.showinfo("Automação", message)
     
     def _initial_resize(self):
         """Redimensionamento inicial."""
@@ -809,15 +911,124 @@ class PDFMakerApp:
         # Usar o diretório da sessão para salvar o PDF
         screenshots_dir = self.session_screenshots_dir or self.screenshot_manager.get_images_dir()
         
-        # Definir caminho para o PDF com timestamp
+        # Gerar o PDF em segundo plano (o arquivo de saída é escolhido na própria exportação)
+        self._start_pdf_export(paths, screenshots_dir)
+
+    def _pdf_output_path(self, paths, screenshots_dir):
+        """
+        Escolhe o arquivo de saída do PDF da sessão: o último PDF, se puder receber apenas as
+        novas capturas, ou um novo arquivo com timestamp. Lê o manifesto e confere cada imagem,
+        por isso roda na thread da exportação, nunca na thread da interface.
+        """
+        if PDF_INCREMENTAL:
+            last_pdf = last_pdf_path(screenshots_dir)
+            if last_pdf and PDFGenerator().can_append(paths, last_pdf):
+                return last_pdf
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        pdf_path = os.path.join(screenshots_dir, f"PDF Maker_{timestamp}.pdf")
-        
-        # Gerar o PDF
-        if self.pdf_generator.generate_pdf(paths, pdf_path):
-            messagebox.showinfo("PDF", f"PDF gerado: {pdf_path}")
+        return os.path.join(screenshots_dir, f"PDF Maker_{timestamp}.pdf")
+
+    def _start_pdf_export(self, paths, session_dir):
+        """
+        Gera o PDF da sessão em uma thread, mantendo a janela responsiva (inclusive a escolha do
+        arquivo de saída, ver _pdf_output_path). O progresso é lido periodicamente pelo root.after;
+        cada sessão tem no máximo uma exportação.
+        """
+        if session_dir in self.pdf_exports:
+            messagebox.showwarning("PDF", "Já existe um PDF sendo gerado para esta sessão.")
+            return
+
+        job = {'pdf_path': None, 'done': 0, 'total': len(paths),
+               'started': time.monotonic(), 'result': False}
+
+        def on_progress(done, total):
+            # Chamado pela thread da exportação; a interface apenas lê estes valores
+            job['done'] = done
+            job['total'] = total
+
+        def on_error(message):
+            self.root.after(0, lambda: messagebox.showerror("Erro", message))
+
+        job['generator'] = PDFGenerator(error_callback=on_error, progress_callback=on_progress)
+
+        def run():
+            job['pdf_path'] = self._pdf_output_path(paths, session_dir)
+            job['result'] = job['generator'].generate_pdf(paths, job['pdf_path'],
+                                                          incremental=PDF_INCREMENTAL)
+
+        job['thread'] = threading.Thread(target=run, daemon=True)
+        self.pdf_exports[session_dir] = job
+        job['thread'].start()
+
+        self.btn_cancel_pdf.config(state=tk.NORMAL)
+        self.frame_pdf_progress.pack(fill=tk.X, padx=10, pady=5)
+        if len(self.pdf_exports) == 1:
+            self.root.after(PDF_PROGRESS_UPDATE_MS, self._poll_pdf_exports)
+
+    def _poll_pdf_exports(self):
+        """Atualiza a barra de progresso e trata as exportações concluídas."""
+        for session_dir, job in list(self.pdf_exports.items()):
+            if not job['thread'].is_alive():
+                del self.pdf_exports[session_dir]
+                self._finish_pdf_export(job)
+
+        if not self.pdf_exports:
+            self.frame_pdf_progress.pack_forget()
+            return
+
+        # Exibe a exportação mais recente
+        job = list(self.pdf_exports.values())[-1]
+        done, total = job['done'], max(1, job['total'])
+        text = f"Gerando PDF: {done}/{total} páginas"
+        if done:
+            elapsed = time.monotonic() - job['started']
+            text += f" - restante: {self._format_duration(elapsed / done * (total - done))}"
+        if len(self.pdf_exports) > 1:
+            text += f" (+{len(self.pdf_exports) - 1} em andamento)"
+        if job.get('cancelling'):
+            text = "Cancelando geração do PDF..."
+        self.pdf_progress_label.config(text=text)
+        self.btn_cancel_pdf.config(state=tk.DISABLED if job.get('cancelling') else tk.NORMAL)
+        self.pdf_progress_bar.config(maximum=total, value=done)
+        self.root.after(PDF_PROGRESS_UPDATE_MS, self._poll_pdf_exports)
+
+    def _format_duration(self, seconds):
+        """Formata a estimativa de tempo restante (ex: '42 s', '3 min 05 s')."""
+        seconds = int(round(seconds))
+        if seconds < 60:
+            return f"{seconds} s"
+        return f"{seconds // 60} min {seconds % 60:02d} s"
+
+    def _finish_pdf_export(self, job):
+        """Informa o resultado de uma exportação concluída."""
+        generator = job['generator']
+        if generator.cancelled:
+            self.automation_status.config(text="Status: Geração do PDF cancelada")
+        elif job['result'] and generator.last_appended:
+            messagebox.showinfo("PDF", f"PDF atualizado: {job['pdf_path']}\n\n"
+                                       f"Páginas adicionadas: {generator.last_stats.get('pages', 0)}")
+        elif job['result']:
+            messagebox.showinfo("PDF", self._format_pdf_result(job['pdf_path'], generator.last_stats))
         else:
             messagebox.showerror("Erro", "Falha ao gerar PDF.")
+
+    def _cancel_pdf_export(self):
+        """Cancela a exportação exibida; o arquivo parcial é removido pelo gerador."""
+        if not self.pdf_exports:
+            return
+        job = list(self.pdf_exports.values())[-1]
+        job['cancelling'] = True
+        job['generator'].cancel()
+        self.btn_cancel_pdf.config(state=tk.DISABLED)
+        self.pdf_progress_label.config(text="Cancelando geração do PDF...")
+
+    def _format_pdf_result(self, pdf_path, stats):
+        """Monta a mensagem de conclusão do PDF, incluindo a economia com imagens repetidas."""
+        message = f"PDF gerado: {pdf_path}"
+        if stats.get('bytes_saved'):
+            message += (f"\n\nImagens repetidas reaproveitadas: {stats['images_reused']}"
+                        f"\nPáginas repetidas removidas: {stats['pages_dropped']}"
+                        f"\nEspaço economizado: {stats['bytes_saved'] / (1024 * 1024):.1f} MB")
+        return message
     
     def _edit_session(self):
         """Abre o editor de sessão para organizar e editar as imagens capturadas."""
@@ -855,15 +1066,9 @@ class PDFMakerApp:
         # Usar o diretório da sessão para salvar o PDF
         screenshots_dir = self.session_screenshots_dir or self.screenshot_manager.get_images_dir()
         
-        # Definir caminho para o PDF com timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        pdf_path = os.path.join(screenshots_dir, f"PDF Maker_{timestamp}.pdf")
-        
-        # Gerar o PDF com os caminhos reordenados e possíveis anotações
-        if self.pdf_generator.generate_pdf(paths, pdf_path):
-            messagebox.showinfo("PDF", f"PDF gerado: {pdf_path}")
-        else:
-            messagebox.showerror("Erro", "Falha ao gerar PDF.")
+        # Gerar o PDF com os caminhos reordenados e possíveis anotações (no último PDF da
+        # sessão, se apenas houver novas capturas)
+        self._start_pdf_export(paths, screenshots_dir)
     
     def _open_sessions_menu(self):
         """Abre o menu de sessões salvas."""
@@ -1185,6 +1390,11 @@ class PDFMakerApp:
             print("Usuário cancelou a saída")
             return  # Usuário cancelou, não sai do programa
         
+        # Interromper exportações em andamento para não deixar PDFs incompletos
+        for job in list(self.pdf_exports.values()):
+            job['generator'].cancel()
+            job['thread'].join(timeout=10)
+
         print("Usuário confirmou a saída, limpando sessões vazias...")
         
         # Verificar se a sessão atual está vazia
@@ -1192,7 +1402,7 @@ class PDFMakerApp:
             # Verificar se tem arquivos reais (não ocultos/temporários)
             files = [f for f in os.listdir(self.session_screenshots_dir) 
                      if not f.startswith('.') and os.path.isfile(os.path.join(self.session_screenshots_dir, f)) and
-                     any(f.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
+                     any(f.lower().endswith(ext) for ext in ['.png', '.webp', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
             
             if not files:
                 # Sessão vazia: deletar a pasta
@@ -1249,7 +1459,7 @@ class PDFMakerApp:
                         files = [f for f in os.listdir(session_path) 
                                 if not f.startswith('.') and 
                                 os.path.isfile(os.path.join(session_path, f)) and
-                                any(f.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
+                                any(f.lower().endswith(ext) for ext in ['.png', '.webp', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
                         has_content = len(files) > 0
                     
                     # Se não tiver conteúdo, deletar
@@ -1305,7 +1515,7 @@ class PDFMakerApp:
                             files = [f for f in os.listdir(folder_path) 
                                      if not f.startswith('.') and 
                                      os.path.isfile(os.path.join(folder_path, f)) and
-                                     any(f.lower().endswith(ext) for ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
+                                     any(f.lower().endswith(ext) for ext in ['.png', '.webp', '.jpg', '.jpeg', '.gif', '.bmp', '.pdf'])]
                             
                             if not files:
                                 print(f"Removendo pasta vazia: {folder_path}")
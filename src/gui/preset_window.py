@@ -12,8 +12,13 @@ from typing import Dict, Any, Optional, Tuple, List
 from src.gui.preset_components.area_selector import AreaSelector
 from src.gui.preset_components.window_selector import WindowSelector
 from src.gui.preset_components.key_capture import KeyCaptureDialog
+from src.core.macro import compile_macro
 
-from src.config.config import ICON, PRESET_WINDOW_SIZE, MIN_PRESET_WINDOW_SIZE
+from src.config.config import (ICON, PRESET_WINDOW_SIZE, MIN_PRESET_WINDOW_SIZE,
+                               DEFAULT_DUPLICATE_FRAME_DISTANCE, DEFAULT_OVERRUN_POLICY,
+                               DEFAULT_CHANGE_THRESHOLD, DEFAULT_CHANGE_DEBOUNCE,
+                               DEFAULT_CHANGE_MIN_GAP, DEFAULT_SETTLE_TIMEOUT,
+                               DEFAULT_STOP_REPEAT_COUNT)
 
 class PresetConfigWindow:
     """Janela de configuração de presets para automação de capturas"""
@@ -42,6 +47,11 @@ class PresetConfigWindow:
         self.interval_unit = tk.StringVar(value="segundos")
         self.start_delay = tk.StringVar(value="3")
         self.capture_type = tk.StringVar(value="fullscreen")
+        # Quando capturar: a cada intervalo, quando a tela mudar ou rolando e emendando
+        self.trigger_mode = tk.StringVar(value="interval")
+        self.change_threshold = tk.StringVar(value=str(DEFAULT_CHANGE_THRESHOLD))
+        self.change_debounce = tk.StringVar(value=str(DEFAULT_CHANGE_DEBOUNCE))
+        self.change_min_gap = tk.StringVar(value=str(DEFAULT_CHANGE_MIN_GAP))
         self.use_same_area = tk.BooleanVar(value=True)
         
         # Variáveis para opções avançadas
@@ -49,10 +59,26 @@ class PresetConfigWindow:
         self.stop_key = None
         self.stop_after_time = tk.BooleanVar(value=False)
         self.stop_time = tk.StringVar(value="60")
+        self.stop_on_repeat = tk.BooleanVar(value=False)
+        self.stop_repeat_count = tk.StringVar(value=str(DEFAULT_STOP_REPEAT_COUNT))
+        self.delete_repeated = tk.BooleanVar(value=False)
         
+        # Capturas repetidas
+        self.duplicate_mode = tk.StringVar(value="off")
+        self.duplicate_distance = tk.StringVar(value=str(DEFAULT_DUPLICATE_FRAME_DISTANCE))
+
+        # Gerar o PDF durante a automação
+        self.live_pdf = tk.BooleanVar(value=False)
+
+        # Capturas que passam do horário seguinte
+        self.overrun_policy = tk.StringVar(value=DEFAULT_OVERRUN_POLICY)
+
         # Ação entre capturas
         self.action_type = tk.StringVar(value="none")
         self.action_key = None
+        self.action_macro = ""  # Texto da macro (ver src/core/macro.py); o campo é um tk.Text
+        self.wait_for_settle = tk.BooleanVar(value=False)
+        self.settle_timeout = tk.StringVar(value=str(DEFAULT_SETTLE_TIMEOUT))
         
         # Variáveis para armazenar configurações de janela e área
         self.capture_area = None
@@ -190,6 +216,28 @@ class PresetConfigWindow:
         self.area_feedback_label = ttk.Label(area_frame, text="(Nenhuma área selecionada)")
         self.area_feedback_label.pack(side=tk.LEFT, padx=5)
         
+        # Quando capturar
+        ttk.Label(grid, text="Quando capturar:").grid(row=5, column=0, sticky=tk.NW, padx=5, pady=5)
+        trigger_frame = ttk.Frame(grid)
+        trigger_frame.grid(row=5, column=1, columnspan=3, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Radiobutton(trigger_frame, text="A cada intervalo", variable=self.trigger_mode,
+                        value="interval").pack(anchor=tk.W)
+        ttk.Radiobutton(trigger_frame, text="Quando a tela mudar (sem ação entre capturas)",
+                        variable=self.trigger_mode, value="change").pack(anchor=tk.W)
+
+        change_frame = ttk.Frame(trigger_frame)
+        change_frame.pack(anchor=tk.W, padx=20)
+        ttk.Label(change_frame, text="Mudança mínima:").pack(side=tk.LEFT)
+        ttk.Entry(change_frame, textvariable=self.change_threshold, width=4).pack(side=tk.LEFT, padx=2)
+        ttk.Label(change_frame, text="%  Estável por:").pack(side=tk.LEFT)
+        ttk.Entry(change_frame, textvariable=self.change_debounce, width=4).pack(side=tk.LEFT, padx=2)
+        ttk.Label(change_frame, text="s  Intervalo mínimo:").pack(side=tk.LEFT)
+        ttk.Entry(change_frame, textvariable=self.change_min_gap, width=4).pack(side=tk.LEFT, padx=2)
+        ttk.Label(change_frame, text="s").pack(side=tk.LEFT)
+        ttk.Radiobutton(trigger_frame, text="Rolar e emendar em uma página longa (a ação entre capturas rola)",
+                        variable=self.trigger_mode, value="stitch").pack(anchor=tk.W)
+        
         # Configurações avançadas
         advanced_frame = ttk.LabelFrame(main_frame, text="Comportamentos Inteligentes")
         advanced_frame.pack(fill=tk.X, pady=(0, 10))
@@ -218,6 +266,16 @@ class PresetConfigWindow:
         ttk.Entry(stop_time_frame, textvariable=self.stop_time, width=5).pack(side=tk.LEFT, padx=5)
         ttk.Label(stop_time_frame, text="segundos").pack(side=tk.LEFT)
         
+        # Parar no fim do conteúdo (a ação não muda mais a tela)
+        stop_repeat_frame = ttk.Frame(stop_frame)
+        stop_repeat_frame.pack(fill=tk.X, padx=15, pady=2)
+        
+        ttk.Checkbutton(stop_repeat_frame, text="Após", variable=self.stop_on_repeat).pack(side=tk.LEFT)
+        ttk.Entry(stop_repeat_frame, textvariable=self.stop_repeat_count, width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(stop_repeat_frame, text="capturas iguais seguidas").pack(side=tk.LEFT)
+        ttk.Checkbutton(stop_repeat_frame, text="Excluir as repetidas",
+                        variable=self.delete_repeated).pack(side=tk.LEFT, padx=10)
+        
         # Ação entre capturas
         action_frame = ttk.Frame(advanced_frame)
         action_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -239,6 +297,70 @@ class PresetConfigWindow:
         self.action_key_btn.pack(side=tk.LEFT, padx=5)
         self.action_key_label = ttk.Label(key_action_frame, text="(Não definido)")
         self.action_key_label.pack(side=tk.LEFT, padx=5)
+
+        # Macro: vários passos com tempos próprios
+        macro_frame = ttk.Frame(action_type_frame)
+        macro_frame.pack(anchor=tk.W, fill=tk.X, pady=2)
+
+        ttk.Radiobutton(macro_frame, text="Macro (um passo por linha):",
+                        variable=self.action_type, value="macro").pack(anchor=tk.W)
+        self.macro_text = tk.Text(macro_frame, height=4, width=40, font=("Consolas", 9))
+        self.macro_text.pack(anchor=tk.W, fill=tk.X, padx=20, pady=2)
+        ttk.Label(macro_frame, text="key ctrl+pagedown | keys down tab | wait 0.5 | click x y | "
+                                    "scroll -5 [x y] | delay=s no fim do passo\n"
+                                    "Coordenadas relativas à área ou janela capturada",
+                  foreground="gray").pack(anchor=tk.W, padx=20)
+
+        # Esperar a tela estabilizar após a tecla
+        settle_frame = ttk.Frame(action_type_frame)
+        settle_frame.pack(anchor=tk.W, fill=tk.X, padx=20, pady=2)
+
+        ttk.Checkbutton(settle_frame, text="Esperar a tela parar de mudar e capturar em seguida, até",
+                        variable=self.wait_for_settle).pack(side=tk.LEFT)
+        ttk.Entry(settle_frame, textvariable=self.settle_timeout, width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Label(settle_frame, text="segundos").pack(side=tk.LEFT)
+
+        # Capturas repetidas
+        duplicate_frame = ttk.Frame(advanced_frame)
+        duplicate_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Label(duplicate_frame, text="Capturas iguais à anterior:").pack(anchor=tk.W, pady=(5, 0))
+
+        duplicate_mode_frame = ttk.Frame(duplicate_frame)
+        duplicate_mode_frame.pack(fill=tk.X, padx=15, pady=2)
+
+        ttk.Radiobutton(duplicate_mode_frame, text="Salvar", variable=self.duplicate_mode,
+                        value="off").pack(side=tk.LEFT)
+        ttk.Radiobutton(duplicate_mode_frame, text="Ignorar", variable=self.duplicate_mode,
+                        value="skip").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(duplicate_mode_frame, text="Marcar (_dup)", variable=self.duplicate_mode,
+                        value="tag").pack(side=tk.LEFT, padx=5)
+        ttk.Label(duplicate_mode_frame, text="Tolerância ao marcar:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Entry(duplicate_mode_frame, textvariable=self.duplicate_distance, width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Label(duplicate_mode_frame, text="bits").pack(side=tk.LEFT)
+
+        # PDF ao vivo
+        live_pdf_frame = ttk.Frame(advanced_frame)
+        live_pdf_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Checkbutton(live_pdf_frame, text="Gerar o PDF durante a automação",
+                        variable=self.live_pdf).pack(anchor=tk.W)
+
+        # Capturas atrasadas
+        overrun_frame = ttk.Frame(advanced_frame)
+        overrun_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        ttk.Label(overrun_frame, text="Se uma captura passar do horário da seguinte:").pack(anchor=tk.W, pady=(5, 0))
+
+        overrun_policy_frame = ttk.Frame(overrun_frame)
+        overrun_policy_frame.pack(fill=tk.X, padx=15, pady=2)
+
+        ttk.Radiobutton(overrun_policy_frame, text="Pular horários perdidos", variable=self.overrun_policy,
+                        value="skip").pack(side=tk.LEFT)
+        ttk.Radiobutton(overrun_policy_frame, text="Recuperar em sequência", variable=self.overrun_policy,
+                        value="catch_up").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(overrun_policy_frame, text="Adiar as seguintes", variable=self.overrun_policy,
+                        value="stretch").pack(side=tk.LEFT, padx=5)
         
         # Botões de ação
         button_frame = ttk.Frame(main_frame)
@@ -540,8 +662,22 @@ class PresetConfigWindow:
             "stop_key": self.stop_key,
             "stop_after_time": self.stop_after_time.get(),
             "stop_time_value": float(self.stop_time.get() or "0"),
+            "stop_on_repeat": self.stop_on_repeat.get(),
+            "stop_repeat_count": int(self.stop_repeat_count.get() or DEFAULT_STOP_REPEAT_COUNT),
+            "delete_repeated": self.delete_repeated.get(),
             "action_type": self.action_type.get(),
-            "action_key": self.action_key
+            "action_key": self.action_key,
+            "action_macro": self._collect_macro(),
+            "wait_for_settle": self.wait_for_settle.get(),
+            "settle_timeout": float(self.settle_timeout.get() or DEFAULT_SETTLE_TIMEOUT),
+            "duplicate_mode": self.duplicate_mode.get(),
+            "duplicate_distance": int(self.duplicate_distance.get() or "0"),
+            "live_pdf": self.live_pdf.get(),
+            "overrun_policy": self.overrun_policy.get(),
+            "trigger_mode": self.trigger_mode.get(),
+            "change_threshold": float(self.change_threshold.get() or DEFAULT_CHANGE_THRESHOLD),
+            "change_debounce": float(self.change_debounce.get() or "0"),
+            "change_min_gap": float(self.change_min_gap.get() or "0")
         }
         
         # Adicionar área capturada se disponível
@@ -554,6 +690,13 @@ class PresetConfigWindow:
             
         return preset_data
     
+    def _collect_macro(self) -> str:
+        """Texto da macro; com a ação "macro" selecionada, a macro precisa ser válida."""
+        source = self.macro_text.get("1.0", "end-1c").strip()
+        if self.action_type.get() == "macro":
+            compile_macro(source)  # MacroError com a linha do problema
+        return source
+
     def _load_preset(self, silent=False):
         """Carrega um preset selecionado"""
         selected = self.preset_combobox.get()
@@ -626,14 +769,30 @@ class PresetConfigWindow:
         
         self.stop_after_time.set(preset_data.get("stop_after_time", False))
         self.stop_time.set(str(preset_data.get("stop_time_value", 60)))
+        self.stop_on_repeat.set(preset_data.get("stop_on_repeat", False))
+        self.stop_repeat_count.set(str(preset_data.get("stop_repeat_count", DEFAULT_STOP_REPEAT_COUNT)))
+        self.delete_repeated.set(preset_data.get("delete_repeated", False))
         
         self.action_type.set(preset_data.get("action_type", "none"))
         self.action_key = preset_data.get("action_key")
+        self.macro_text.delete("1.0", tk.END)
+        self.macro_text.insert("1.0", preset_data.get("action_macro", ""))
         if self.action_key:
             display_name = self._get_friendly_key_name(self.action_key)
             self.action_key_label.config(text=display_name)
         else:
             self.action_key_label.config(text="(Não definido)")
+
+        self.duplicate_mode.set(preset_data.get("duplicate_mode", "off"))
+        self.duplicate_distance.set(str(preset_data.get("duplicate_distance", DEFAULT_DUPLICATE_FRAME_DISTANCE)))
+        self.live_pdf.set(preset_data.get("live_pdf", False))
+        self.overrun_policy.set(preset_data.get("overrun_policy", DEFAULT_OVERRUN_POLICY))
+        self.wait_for_settle.set(preset_data.get("wait_for_settle", False))
+        self.settle_timeout.set(str(preset_data.get("settle_timeout", DEFAULT_SETTLE_TIMEOUT)))
+        self.trigger_mode.set(preset_data.get("trigger_mode", "interval"))
+        self.change_threshold.set(str(preset_data.get("change_threshold", DEFAULT_CHANGE_THRESHOLD)))
+        self.change_debounce.set(str(preset_data.get("change_debounce", DEFAULT_CHANGE_DEBOUNCE)))
+        self.change_min_gap.set(str(preset_data.get("change_min_gap", DEFAULT_CHANGE_MIN_GAP)))
     
     def _delete_preset(self):
         """Exclui o preset selecionado"""